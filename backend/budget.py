@@ -0,0 +1,54 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+class Budget:
+    """Time and Spotify-call allowance for one slice of a resumable scan.
+
+    Scans check ``exhausted()`` between chunks of work and, once it is true,
+    stop and hand back their cursor instead of finishing (see
+    ``tasks._resumable_flight``). Calls are counted by ``tasks._backoff`` through
+    ``charge_call``, including calls made on fan-out threads, so ``charge`` is locked.
+    """
+
+    def __init__(self, seconds: float | None = None, calls: int | None = None) -> None:
+        self.seconds = seconds
+        self.calls = calls
+        self.started = time.monotonic()
+        self.calls_used = 0
+        self._lock = threading.Lock()
+
+    def charge(self, calls: int = 1) -> None:
+        with self._lock:
+            self.calls_used += calls
+
+    def exhausted(self) -> bool:
+        if self.seconds is not None and time.monotonic() - self.started >= self.seconds:
+            return True
+        return self.calls is not None and self.calls_used >= self.calls
+
+
+# The budget governing the current context's scan; None means run to completion.
+_BUDGET: ContextVar[Budget | None] = ContextVar("scan_budget", default=None)
+
+
+@contextmanager
+def budget(allowance: Budget | None):
+    token = _BUDGET.set(allowance)
+    try:
+        yield allowance
+    finally:
+        _BUDGET.reset(token)
+
+
+def charge_call() -> None:
+    allowance = _BUDGET.get()
+    if allowance is not None:
+        allowance.charge()
+
+
+def budget_exhausted() -> bool:
+    allowance = _BUDGET.get()
+    return allowance is not None and allowance.exhausted()
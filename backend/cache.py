@@ -0,0 +1,260 @@
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from .config import Settings
+from .db import delete_cached_response, get_cached_response, purge_cached_responses, put_cached_response
+
+
+DEFAULT_TTL_SECONDS = 120
+# Freshness per payload family; the namespace is the cache key up to its first ":".
+NAMESPACE_TTL_SECONDS = {
+    "playlists": 120,
+    "library_source": 180,
+    "overview": 120,
+    "top_lists": 120,
+    "track_longevity": 300,
+    "genre_recs": 120,
+    "recently_played": 60,
+    "listening_pattern": 120,
+    "catalog": 300,
+    "genre_breakdown": 600,
+    "mood_timeline": 300,
+    "playlist_freshness": 180,
+    # Keyed by snapshot_id, so an entry can only go unused, never out of date.
+    "playlist_added": 30 * 24 * 3600,
+    "warmup": 900,
+    "resume": 900,
+}
+# Past its TTL an entry in these namespaces is still served, marked stale, for this
+# many extra seconds while one background rebuild runs; only then does a request block.
+NAMESPACE_STALE_SECONDS = {
+    "overview": 1800,
+    "top_lists": 1800,
+    "genre_breakdown": 6 * 3600,
+}
+
+
+def _namespace(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+def _serialize(value) -> str:
+    # Serialized length doubles as the entry size: it tracks the footprint of these
+    # JSON-shaped payloads closely enough for budgeting and is far cheaper than
+    # walking every object.
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def _new_counters() -> dict[str, int]:
+    return {"hits": 0, "durable_hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+
+class _Entry:
+    __slots__ = ("stored_at", "fresh_until", "expires_at", "value", "size")
+
+    def __init__(self, stored_at: float, fresh_until: float, expires_at: float, value, size: int) -> None:
+        self.stored_at = stored_at
+        self.fresh_until = fresh_until
+        self.expires_at = expires_at
+        self.value = value
+        self.size = size
+
+
+class ResponseCache:
+    """In-process LRU cache with a byte budget and per-namespace TTLs.
+
+    An entry is fresh for its TTL; namespaces listed in ``stale_windows`` keep it
+    servable as stale for that many seconds more (see ``lookup``), after which it is
+    never served, only kept as the ``last_known`` copy for outages. When a write
+    pushes the total past ``max_bytes``, expired entries are reclaimed first and
+    then the least recently used ones are evicted. Hits, misses and evictions are
+    counted per namespace.
+
+    With ``settings`` the cache also writes through to the ``response_cache``
+    table, which every worker shares and which outlives restarts; an in-memory
+    miss is answered from there before counting as a miss.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        namespace_ttls: dict[str, int] | None = None,
+        stale_windows: dict[str, int] | None = None,
+        settings: Settings | None = None,
+    ) -> None:
+        self.max_bytes = max(int(max_bytes), 0)
+        self.namespace_ttls = dict(namespace_ttls or {})
+        self.stale_windows = dict(stale_windows or {})
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._counters: dict[str, dict[str, int]] = defaultdict(_new_counters)
+
+    def ttl_for(self, key: str) -> int:
+        return self.namespace_ttls.get(_namespace(key), DEFAULT_TTL_SECONDS)
+
+    def stale_window_for(self, key: str) -> int:
+        return self.stale_windows.get(_namespace(key), 0)
+
+    def _drop(self, key: str, reason: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        self._counters[_namespace(key)][reason] += 1
+
+    def _sweep_expired(self, now: float) -> None:
+        for key in [k for k, entry in self._entries.items() if entry.expires_at <= now]:
+            self._drop(key, "expirations")
+
+    def get(self, key: str):
+        """Return the value only while it is fresh."""
+        found = self.lookup(key)
+        if found is None or not found[2]:
+            return None
+        return found[0]
+
+    def lookup(self, key: str) -> tuple[object, float, bool] | None:
+        """Return ``(value, age_seconds, fresh)`` for any servable entry, stale included."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            # An expired entry is not served, but stays for ``last_known`` until its space is needed.
+            if entry is not None and entry.expires_at <= now:
+                entry = None
+            if entry is not None:
+                fresh = now < entry.fresh_until
+                self._counters[_namespace(key)]["hits" if fresh else "stale_hits"] += 1
+                self._entries.move_to_end(key)
+                return entry.value, now - entry.stored_at, fresh
+
+        stored = get_cached_response(self.settings, key, now) if self.settings else None
+        if stored is None:
+            with self._lock:
+                self._counters[_namespace(key)]["misses"] += 1
+            return None
+        serialized, stored_at, expires_at = stored
+        fresh_until = expires_at - self.stale_window_for(key)
+        fresh = now < fresh_until
+        with self._lock:
+            self._counters[_namespace(key)]["durable_hits" if fresh else "stale_hits"] += 1
+        value = json.loads(serialized)
+        self._put_local(key, value, len(serialized), stored_at, fresh_until, expires_at, now)
+        return value, now - stored_at, fresh
+
+    def last_known(self, key: str) -> tuple[object, float] | None:
+        """Return ``(value, age_seconds)`` for any copy still held, however old.
+
+        Only for degraded answers while Spotify is unreachable; expired rows stay in
+        the shared tier until ``purge_durable`` removes them.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry.value, now - entry.stored_at
+        stored = get_cached_response(self.settings, key, 0.0) if self.settings else None
+        if stored is None:
+            return None
+        serialized, stored_at, _ = stored
+        return json.loads(serialized), now - stored_at
+
+    def _put_local(
+        self, key: str, value, size: int, stored_at: float, fresh_until: float, expires_at: float, now: float
+    ) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key).size
+            # A payload larger than the whole budget would only flush everything else.
+            if size > self.max_bytes:
+                return
+            self._entries[key] = _Entry(stored_at, fresh_until, expires_at, value, size)
+            self._bytes += size
+            if self._bytes > self.max_bytes:
+                self._sweep_expired(now)
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)), "evictions")
+
+    def set(self, key: str, value, ttl: float | None = None):
+        serialized = _serialize(value)
+        now = time.time()
+        fresh_until = now + (self.ttl_for(key) if ttl is None else ttl)
+        expires_at = fresh_until + self.stale_window_for(key)
+        self._put_local(key, value, len(serialized), now, fresh_until, expires_at, now)
+        if self.settings:
+            put_cached_response(self.settings, key, serialized, now, expires_at)
+        return value
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key).size
+        if self.settings:
+            delete_cached_response(self.settings, key)
+
+    def purge_durable(self) -> int:
+        """Delete expired rows from the shared tier; returns how many were removed."""
+        return purge_cached_responses(self.settings, time.time()) if self.settings else 0
+
+    def stats(self, largest: int = 20) -> dict:
+        now = time.time()
+        with self._lock:
+            namespaces: dict[str, dict] = {
+                ns: {**counters, "entries": 0, "expired_entries": 0, "bytes": 0}
+                for ns, counters in self._counters.items()
+            }
+            for key, entry in self._entries.items():
+                ns = namespaces.setdefault(
+                    _namespace(key), {**_new_counters(), "entries": 0, "expired_entries": 0, "bytes": 0}
+                )
+                ns["entries"] += 1
+                ns["expired_entries"] += entry.expires_at <= now
+                ns["bytes"] += entry.size
+            biggest = sorted(self._entries.items(), key=lambda kv: kv[1].size, reverse=True)[:largest]
+            total_bytes = self._bytes
+            entry_count = len(self._entries)
+
+        for ns in namespaces.values():
+            served = ns["hits"] + ns["durable_hits"] + ns["stale_hits"]
+            lookups = served + ns["misses"]
+            ns["hit_ratio"] = round(served / lookups, 3) if lookups else 0.0
+        return {
+            "durable": self.settings is not None,
+            "max_bytes": self.max_bytes,
+            "bytes": total_bytes,
+            "entries": entry_count,
+            "namespaces": namespaces,
+            "largest_entries": [
+                {
+                    "key": key,
+                    "bytes": entry.size,
+                    "age": round(now - entry.stored_at, 1),
+                    "stale": now >= entry.fresh_until,
+                    "expires_in": round(entry.expires_at - now, 1),
+                }
+                for key, entry in biggest
+            ],
+        }
+
+
+_cache: ResponseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def configure_response_cache(settings: Settings) -> ResponseCache:
+    global _cache
+    with _cache_lock:
+        _cache = ResponseCache(
+            max_bytes=settings.cache_max_bytes,
+            namespace_ttls=NAMESPACE_TTL_SECONDS,
+            stale_windows=NAMESPACE_STALE_SECONDS,
+            settings=settings if settings.cache_durable else None,
+        )
+    return _cache
+
+
+def get_response_cache() -> ResponseCache:
+    if _cache is None:
+        return configure_response_cache(Settings())
+    return _cache
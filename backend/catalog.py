@@ -0,0 +1,72 @@
+import time
+
+from .config import Settings
+from .db import get_catalog_entities, get_catalog_stats, put_catalog_entities, record_catalog_stats
+from .executors import ContextThreadPoolExecutor
+
+
+# Catalog metadata is not user-specific, so one stored copy serves every user and script.
+ENTITY_TTL_SECONDS = {
+    "artist": 7 * 24 * 3600,
+    "album": 30 * 24 * 3600,
+    "track": 30 * 24 * 3600,
+    "artist_top_tracks": 24 * 3600,
+}
+# Maximum IDs per multi-get request for each kind.
+BATCH_SIZES = {"artist": 50, "album": 20, "track": 50, "artist_top_tracks": 1}
+MAX_FETCH_WORKERS = 8
+
+
+def _compact(entity):
+    # Market lists are by far the largest part of track/album objects and nothing reads them.
+    if isinstance(entity, dict):
+        return {k: _compact(v) for k, v in entity.items() if k != "available_markets"}
+    if isinstance(entity, list):
+        return [_compact(v) for v in entity]
+    return entity
+
+
+def get_entities(settings: Settings, kind: str, entity_ids, fetch_batch) -> dict[str, dict]:
+    """Resolve catalog entities by Spotify ID, consulting the shared store first.
+
+    ``fetch_batch(ids)`` is called with at most ``BATCH_SIZES[kind]`` missing IDs and
+    must return the entity objects (``None`` entries are skipped). Hits, misses and
+    the API calls spent are recorded so the store's savings can be reported.
+    """
+    unique_ids = list(dict.fromkeys(eid for eid in entity_ids if eid))
+    if not unique_ids:
+        return {}
+
+    found = get_catalog_entities(settings, kind, unique_ids, time.time())
+    missing = [eid for eid in unique_ids if eid not in found]
+    batch_size = BATCH_SIZES.get(kind, 50)
+    batches = [missing[i : i + batch_size] for i in range(0, len(missing), batch_size)]
+
+    fetched: dict[str, dict] = {}
+    if batches:
+        with ContextThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(batches))) as pool:
+            for entities in pool.map(fetch_batch, batches):
+                for entity in entities or []:
+                    if entity and entity.get("id"):
+                        fetched[entity["id"]] = _compact(entity)
+        put_catalog_entities(settings, kind, fetched, time.time() + ENTITY_TTL_SECONDS.get(kind, 24 * 3600))
+
+    record_catalog_stats(settings, kind, hits=len(found), misses=len(missing), api_calls=len(batches))
+    found.update(fetched)
+    return found
+
+
+def catalog_stats(settings: Settings) -> dict:
+    kinds = []
+    for row in get_catalog_stats(settings):
+        lookups = row["hits"] + row["misses"]
+        batch_size = BATCH_SIZES.get(row["kind"], 50)
+        kinds.append(
+            {
+                **row,
+                "hit_ratio": round(row["hits"] / lookups, 3) if lookups else 0.0,
+                # Hits would otherwise have cost roughly one multi-get per batch.
+                "api_calls_saved_est": -(-row["hits"] // batch_size),
+            }
+        )
+    return {"kinds": kinds}
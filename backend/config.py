@@ -8,6 +8,21 @@ class Settings:
     database_url: str
     app_secret_key: str
     frontend_url: str
+    admin_token: str
+    spotify_http2: bool
+    governor_path: str
+    spotify_rate_per_second: float
+    spotify_rate_burst: float
+    spotify_max_concurrency: int
+    spotify_bulk_share: float
+    request_deadline_seconds: float
+    stats_budget_seconds: float
+    cache_max_bytes: int
+    cache_durable: bool
+    job_workers: int
+    job_lease_seconds: float
+    scheduler_concurrency: int
+    scheduler_parallel_users: int
 
     def __init__(self) -> None:
         self.spotify_client_id = os.getenv("SPOTIPY_CLIENT_ID", "").strip()
@@ -16,6 +31,27 @@ class Settings:
         self.database_url = os.getenv("DATABASE_URL", "sqlite:///local_dev.db").strip()
         self.app_secret_key = os.getenv("APP_SECRET_KEY", "").strip()
         self.frontend_url = os.getenv("FRONTEND_URL", "").strip()
+        self.admin_token = os.getenv("ADMIN_TOKEN", "").strip()
+        self.spotify_http2 = os.getenv("SPOTIFY_HTTP2", "").strip().lower() in {"1", "true", "yes"}
+        self.governor_path = os.getenv("SPOTIFY_GOVERNOR_PATH", "spotify_governor.db").strip()
+        self.spotify_rate_per_second = float(os.getenv("SPOTIFY_RATE_PER_SECOND", "10"))
+        self.spotify_rate_burst = float(os.getenv("SPOTIFY_RATE_BURST", "20"))
+        self.spotify_max_concurrency = int(os.getenv("SPOTIFY_MAX_CONCURRENCY", "16"))
+        self.spotify_bulk_share = float(os.getenv("SPOTIFY_BULK_SHARE", "0.5"))
+        # Spotify retries within a request stop once this much time has passed since it arrived.
+        self.request_deadline_seconds = float(os.getenv("REQUEST_DEADLINE_SECONDS", "20"))
+        # Default slice of a resumable stats scan; what is left continues on the next request.
+        self.stats_budget_seconds = float(os.getenv("STATS_BUDGET_SECONDS", "10"))
+        self.cache_max_bytes = int(float(os.getenv("CACHE_MAX_MB", "64")) * 1024 * 1024)
+        self.cache_durable = os.getenv("CACHE_DURABLE", "true").strip().lower() in {"1", "true", "yes"}
+        self.job_workers = max(int(os.getenv("JOB_WORKERS", "2")), 0)
+        self.job_lease_seconds = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+        # Slots the nightly scheduler's users share; the rest of the governor's concurrency
+        # stays free for interactive traffic.
+        self.scheduler_concurrency = int(
+            os.getenv("SCHEDULER_CONCURRENCY", str(max(1, self.spotify_max_concurrency // 2)))
+        )
+        self.scheduler_parallel_users = int(os.getenv("SCHEDULER_PARALLEL_USERS", "4"))
 
     def validate(self) -> None:
         missing = []
@@ -1,3 +1,4 @@
+import json
 import sqlite3
 from base64 import urlsafe_b64encode
 from datetime import datetime, timezone
@@ -63,6 +64,181 @@ def init_db(settings: Settings) -> None:
                 )
                 """
             )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS playlist_contents (
+                    playlist_id TEXT NOT NULL,
+                    snapshot_id TEXT NOT NULL,
+                    items TEXT NOT NULL,
+                    updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+                    PRIMARY KEY (playlist_id, snapshot_id)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS playlist_snapshots (
+                    playlist_id TEXT NOT NULL,
+                    snapshot_id TEXT NOT NULL,
+                    track_total INTEGER NOT NULL,
+                    first_seen_at REAL NOT NULL,
+                    PRIMARY KEY (playlist_id, snapshot_id)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS playlist_snapshots_seen ON playlist_snapshots (playlist_id, first_seen_at)"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS catalog_entities (
+                    kind TEXT NOT NULL,
+                    entity_id TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (kind, entity_id)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS catalog_stats (
+                    kind TEXT PRIMARY KEY,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    misses INTEGER NOT NULL DEFAULT 0,
+                    api_calls INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS saved_tracks (
+                    spotify_user_id TEXT NOT NULL,
+                    track_id TEXT NOT NULL,
+                    added_at TEXT NOT NULL,
+                    artist_ids TEXT NOT NULL,
+                    album_id TEXT NOT NULL,
+                    PRIMARY KEY (spotify_user_id, track_id)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS saved_tracks_added_at ON saved_tracks (spotify_user_id, added_at)"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS saved_tracks_sync (
+                    spotify_user_id TEXT PRIMARY KEY,
+                    watermark TEXT NOT NULL,
+                    total INTEGER NOT NULL,
+                    unindexed INTEGER NOT NULL,
+                    full_synced_at REAL NOT NULL
+                )
+                """
+            )
+            # A full Liked Songs load in progress: rows are staged here page by page and
+            # swapped into ``saved_tracks`` once the last page is in.
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS saved_tracks_load (
+                    spotify_user_id TEXT PRIMARY KEY,
+                    next_offset INTEGER NOT NULL,
+                    watermark TEXT NOT NULL,
+                    unindexed INTEGER NOT NULL,
+                    boundary TEXT NOT NULL,
+                    started_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS saved_tracks_staged (
+                    spotify_user_id TEXT NOT NULL,
+                    track_id TEXT NOT NULL,
+                    added_at TEXT NOT NULL,
+                    artist_ids TEXT NOT NULL,
+                    album_id TEXT NOT NULL,
+                    PRIMARY KEY (spotify_user_id, track_id)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS vaulted_sources (
+                    spotify_user_id TEXT NOT NULL,
+                    source_id TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    track_ids TEXT NOT NULL,
+                    PRIMARY KEY (spotify_user_id, source_id)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS vaulted_counts (
+                    spotify_user_id TEXT NOT NULL,
+                    track_id TEXT NOT NULL,
+                    refs INTEGER NOT NULL,
+                    PRIMARY KEY (spotify_user_id, track_id)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS vaulted_targets (
+                    spotify_user_id TEXT PRIMARY KEY,
+                    playlist_id TEXT NOT NULL,
+                    snapshot_id TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    spotify_user_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    phase TEXT NOT NULL,
+                    progress TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    updated_at REAL NOT NULL,
+                    worker_id TEXT,
+                    lease_expires_at REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_state_created ON jobs (state, created_at)")
+            conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS jobs_one_active ON jobs (spotify_user_id, kind)"
+                " WHERE state IN ('queued', 'running')"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scheduler_runs (
+                    run_id TEXT PRIMARY KEY,
+                    started_at REAL NOT NULL,
+                    finished_at REAL NOT NULL,
+                    report TEXT NOT NULL
+                )
+                """
+            )
     else:
         with psycopg.connect(settings.database_url) as conn:
             with conn.cursor() as cur:
@@ -78,6 +254,180 @@ def init_db(settings: Settings) -> None:
                     )
                     """
                 )
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS playlist_contents (
+                        playlist_id TEXT NOT NULL,
+                        snapshot_id TEXT NOT NULL,
+                        items TEXT NOT NULL,
+                        updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                        PRIMARY KEY (playlist_id, snapshot_id)
+                    )
+                    """
+                )
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS playlist_snapshots (
+                        playlist_id TEXT NOT NULL,
+                        snapshot_id TEXT NOT NULL,
+                        track_total INTEGER NOT NULL,
+                        first_seen_at DOUBLE PRECISION NOT NULL,
+                        PRIMARY KEY (playlist_id, snapshot_id)
+                    )
+                    """
+                )
+                cur.execute(
+                    "CREATE INDEX IF NOT EXISTS playlist_snapshots_seen"
+                    " ON playlist_snapshots (playlist_id, first_seen_at)"
+                )
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS catalog_entities (
+                        kind TEXT NOT NULL,
+                        entity_id TEXT NOT NULL,
+                        payload TEXT NOT NULL,
+                        expires_at DOUBLE PRECISION NOT NULL,
+                        PRIMARY KEY (kind, entity_id)
+                    )
+                    """
+                )
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS catalog_stats (
+                        kind TEXT PRIMARY KEY,
+                        hits BIGINT NOT NULL DEFAULT 0,
+                        misses BIGINT NOT NULL DEFAULT 0,
+                        api_calls BIGINT NOT NULL DEFAULT 0
+                    )
+                    """
+                )
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS response_cache (
+                        cache_key TEXT PRIMARY KEY,
+                        payload TEXT NOT NULL,
+                        stored_at DOUBLE PRECISION NOT NULL,
+                        expires_at DOUBLE PRECISION NOT NULL
+                    )
+                    """
+                )
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS saved_tracks (
+                        spotify_user_id TEXT NOT NULL,
+                        track_id TEXT NOT NULL,
+                        added_at TEXT NOT NULL,
+                        artist_ids TEXT NOT NULL,
+                        album_id TEXT NOT NULL,
+                        PRIMARY KEY (spotify_user_id, track_id)
+                    )
+                    """
+                )
+                cur.execute(
+                    "CREATE INDEX IF NOT EXISTS saved_tracks_added_at ON saved_tracks (spotify_user_id, added_at)"
+                )
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS saved_tracks_sync (
+                        spotify_user_id TEXT PRIMARY KEY,
+                        watermark TEXT NOT NULL,
+                        total INTEGER NOT NULL,
+                        unindexed INTEGER NOT NULL,
+                        full_synced_at DOUBLE PRECISION NOT NULL
+                    )
+                    """
+                )
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS saved_tracks_load (
+                        spotify_user_id TEXT PRIMARY KEY,
+                        next_offset INTEGER NOT NULL,
+                        watermark TEXT NOT NULL,
+                        unindexed INTEGER NOT NULL,
+                        boundary TEXT NOT NULL,
+                        started_at DOUBLE PRECISION NOT NULL
+                    )
+                    """
+                )
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS saved_tracks_staged (
+                        spotify_user_id TEXT NOT NULL,
+                        track_id TEXT NOT NULL,
+                        added_at TEXT NOT NULL,
+                        artist_ids TEXT NOT NULL,
+                        album_id TEXT NOT NULL,
+                        PRIMARY KEY (spotify_user_id, track_id)
+                    )
+                    """
+                )
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS vaulted_sources (
+                        spotify_user_id TEXT NOT NULL,
+                        source_id TEXT NOT NULL,
+                        version TEXT NOT NULL,
+                        track_ids TEXT NOT NULL,
+                        PRIMARY KEY (spotify_user_id, source_id)
+                    )
+                    """
+                )
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS vaulted_counts (
+                        spotify_user_id TEXT NOT NULL,
+                        track_id TEXT NOT NULL,
+                        refs INTEGER NOT NULL,
+                        PRIMARY KEY (spotify_user_id, track_id)
+                    )
+                    """
+                )
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS vaulted_targets (
+                        spotify_user_id TEXT PRIMARY KEY,
+                        playlist_id TEXT NOT NULL,
+                        snapshot_id TEXT NOT NULL
+                    )
+                    """
+                )
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS jobs (
+                        job_id TEXT PRIMARY KEY,
+                        spotify_user_id TEXT NOT NULL,
+                        kind TEXT NOT NULL,
+                        params TEXT NOT NULL,
+                        state TEXT NOT NULL,
+                        phase TEXT NOT NULL,
+                        progress TEXT NOT NULL,
+                        result TEXT,
+                        error TEXT,
+                        created_at DOUBLE PRECISION NOT NULL,
+                        started_at DOUBLE PRECISION,
+                        finished_at DOUBLE PRECISION,
+                        updated_at DOUBLE PRECISION NOT NULL,
+                        worker_id TEXT,
+                        lease_expires_at DOUBLE PRECISION,
+                        attempts INTEGER NOT NULL DEFAULT 0
+                    )
+                    """
+                )
+                cur.execute("CREATE INDEX IF NOT EXISTS jobs_state_created ON jobs (state, created_at)")
+                cur.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS jobs_one_active ON jobs (spotify_user_id, kind)"
+                    " WHERE state IN ('queued', 'running')"
+                )
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS scheduler_runs (
+                        run_id TEXT PRIMARY KEY,
+                        started_at DOUBLE PRECISION NOT NULL,
+                        finished_at DOUBLE PRECISION NOT NULL,
+                        report TEXT NOT NULL
+                    )
+                    """
+                )
                 conn.commit()
 
 
@@ -188,5 +538,925 @@ def delete_tokens(settings: Settings, spotify_user_id: str) -> None:
                 conn.commit()
 
 
+def get_playlist_contents(settings: Settings, snapshots: dict[str, str]) -> dict[str, list[list[str]]]:
+    """Return stored items for every ``playlist_id -> snapshot_id`` pair that is still current.
+
+    Items are ``[track_id, added_at]`` pairs in playlist order. Playlists whose stored
+    snapshot differs from the requested one are omitted.
+    """
+    if not snapshots:
+        return {}
+    pairs = [(pid, snap) for pid, snap in snapshots.items() if pid and snap]
+    rows: list[tuple] = []
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            for i in range(0, len(pairs), 400):
+                batch = pairs[i : i + 400]
+                placeholders = ", ".join("(?, ?)" for _ in batch)
+                rows.extend(
+                    conn.execute(
+                        "SELECT playlist_id, items FROM playlist_contents"
+                        f" WHERE (playlist_id, snapshot_id) IN (VALUES {placeholders})",
+                        [value for pair in batch for value in pair],
+                    ).fetchall()
+                )
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT c.playlist_id, c.items FROM playlist_contents c"
+                    " JOIN UNNEST(%s::text[], %s::text[]) AS w(playlist_id, snapshot_id)"
+                    " ON c.playlist_id = w.playlist_id AND c.snapshot_id = w.snapshot_id",
+                    ([pid for pid, _ in pairs], [snap for _, snap in pairs]),
+                )
+                rows = cur.fetchall()
+    return {row[0]: json.loads(row[1]) for row in rows}
+
+
+def put_playlist_contents(settings: Settings, playlist_id: str, snapshot_id: str, items: list[list[str]]) -> None:
+    """Store a playlist's items under its snapshot, replacing older snapshots of the same playlist."""
+    payload = json.dumps(items, separators=(",", ":"))
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            conn.execute(
+                "DELETE FROM playlist_contents WHERE playlist_id = ? AND snapshot_id <> ?",
+                (playlist_id, snapshot_id),
+            )
+            conn.execute(
+                """
+                INSERT INTO playlist_contents (playlist_id, snapshot_id, items, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(playlist_id, snapshot_id) DO UPDATE SET
+                    items = excluded.items,
+                    updated_at = excluded.updated_at
+                """,
+                (playlist_id, snapshot_id, payload, datetime.now(timezone.utc).isoformat()),
+            )
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM playlist_contents WHERE playlist_id = %s AND snapshot_id <> %s",
+                    (playlist_id, snapshot_id),
+                )
+                cur.execute(
+                    """
+                    INSERT INTO playlist_contents (playlist_id, snapshot_id, items, updated_at)
+                    VALUES (%s, %s, %s, NOW())
+                    ON CONFLICT (playlist_id, snapshot_id) DO UPDATE SET
+                        items = EXCLUDED.items,
+                        updated_at = NOW()
+                    """,
+                    (playlist_id, snapshot_id, payload),
+                )
+                conn.commit()
+
+
+def record_playlist_snapshots(settings: Settings, observations: list[tuple[str, str, int]], now: float) -> None:
+    """Append ``(playlist_id, snapshot_id, track_total)`` observations; snapshots already seen are left as they were."""
+    if not observations:
+        return
+    query = (
+        "INSERT INTO playlist_snapshots (playlist_id, snapshot_id, track_total, first_seen_at)"
+        " VALUES ({0}, {0}, {0}, {0}) ON CONFLICT (playlist_id, snapshot_id) DO NOTHING"
+    )
+    params = [(pid, snap, total, now) for pid, snap, total in observations]
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            conn.executemany(query.format("?"), params)
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.executemany(query.format("%s"), params)
+                conn.commit()
+
+
+def get_playlist_last_changes(settings: Settings, playlist_ids: list[str]) -> dict[str, tuple[float, float]]:
+    """When each playlist's track count last changed, from ``playlist_snapshots``.
+
+    A change is a snapshot whose ``track_total`` differs from the one observed before
+    it, so renames and other edits that keep the tracks do not count. A playlist's
+    first observed snapshot is never a change: its ``first_seen_at`` only says when
+    we started watching. Returns ``(first_seen_at, previous_seen_at)`` of the latest
+    change, i.e. the change happened after the second time and by the first;
+    playlists with no change on record are omitted.
+    """
+    ids = [pid for pid in playlist_ids if pid]
+    if not ids:
+        return {}
+    query = (
+        "SELECT playlist_id, first_seen_at, previous_seen_at FROM ("
+        " SELECT playlist_id, first_seen_at, previous_seen_at,"
+        " ROW_NUMBER() OVER (PARTITION BY playlist_id ORDER BY first_seen_at DESC) AS recency"
+        " FROM ("
+        "  SELECT playlist_id, track_total, first_seen_at,"
+        "  LAG(track_total) OVER (PARTITION BY playlist_id ORDER BY first_seen_at) AS previous_total,"
+        "  LAG(first_seen_at) OVER (PARTITION BY playlist_id ORDER BY first_seen_at) AS previous_seen_at"
+        "  FROM playlist_snapshots WHERE playlist_id {}"
+        " ) AS history WHERE previous_seen_at IS NOT NULL AND previous_total <> track_total"
+        ") AS changes WHERE recency = 1"
+    )
+    rows: list[tuple] = []
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            for i in range(0, len(ids), 400):
+                batch = ids[i : i + 400]
+                in_list = "IN (" + ", ".join("?" for _ in batch) + ")"
+                rows.extend(conn.execute(query.format(in_list), batch).fetchall())
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query.format("= ANY(%s)"), (ids,))
+                rows = cur.fetchall()
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+
+def get_catalog_entities(settings: Settings, kind: str, entity_ids: list[str], now: float) -> dict[str, dict]:
+    """Return unexpired stored catalog entities of ``kind`` keyed by Spotify ID."""
+    if not entity_ids:
+        return {}
+    rows: list[tuple] = []
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            for i in range(0, len(entity_ids), 500):
+                batch = entity_ids[i : i + 500]
+                placeholders = ", ".join("?" for _ in batch)
+                rows.extend(
+                    conn.execute(
+                        "SELECT entity_id, payload FROM catalog_entities"
+                        f" WHERE kind = ? AND expires_at > ? AND entity_id IN ({placeholders})",
+                        [kind, now, *batch],
+                    ).fetchall()
+                )
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT entity_id, payload FROM catalog_entities"
+                    " WHERE kind = %s AND expires_at > %s AND entity_id = ANY(%s)",
+                    (kind, now, entity_ids),
+                )
+                rows = cur.fetchall()
+    return {row[0]: json.loads(row[1]) for row in rows}
+
+
+def put_catalog_entities(settings: Settings, kind: str, entities: dict[str, dict], expires_at: float) -> None:
+    if not entities:
+        return
+    params = [
+        (kind, entity_id, json.dumps(payload, separators=(",", ":")), expires_at)
+        for entity_id, payload in entities.items()
+    ]
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            conn.executemany(
+                """
+                INSERT INTO catalog_entities (kind, entity_id, payload, expires_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(kind, entity_id) DO UPDATE SET
+                    payload = excluded.payload,
+                    expires_at = excluded.expires_at
+                """,
+                params,
+            )
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    """
+                    INSERT INTO catalog_entities (kind, entity_id, payload, expires_at)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (kind, entity_id) DO UPDATE SET
+                        payload = EXCLUDED.payload,
+                        expires_at = EXCLUDED.expires_at
+                    """,
+                    params,
+                )
+                conn.commit()
+
+
+def record_catalog_stats(settings: Settings, kind: str, hits: int, misses: int, api_calls: int) -> None:
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            conn.execute(
+                """
+                INSERT INTO catalog_stats (kind, hits, misses, api_calls) VALUES (?, ?, ?, ?)
+                ON CONFLICT(kind) DO UPDATE SET
+                    hits = hits + excluded.hits,
+                    misses = misses + excluded.misses,
+                    api_calls = api_calls + excluded.api_calls
+                """,
+                (kind, hits, misses, api_calls),
+            )
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO catalog_stats (kind, hits, misses, api_calls) VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (kind) DO UPDATE SET
+                        hits = catalog_stats.hits + EXCLUDED.hits,
+                        misses = catalog_stats.misses + EXCLUDED.misses,
+                        api_calls = catalog_stats.api_calls + EXCLUDED.api_calls
+                    """,
+                    (kind, hits, misses, api_calls),
+                )
+                conn.commit()
+
+
+def get_catalog_stats(settings: Settings) -> list[dict]:
+    query = "SELECT kind, hits, misses, api_calls FROM catalog_stats ORDER BY kind"
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            rows = conn.execute(query).fetchall()
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query)
+                rows = cur.fetchall()
+    return [{"kind": r[0], "hits": r[1], "misses": r[2], "api_calls": r[3]} for r in rows]
+
+
+def get_cached_response(settings: Settings, cache_key: str, now: float) -> tuple[str, float, float] | None:
+    """Return ``(serialized_payload, stored_at, expires_at)`` for an unexpired entry."""
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            row = conn.execute(
+                "SELECT payload, stored_at, expires_at FROM response_cache WHERE cache_key = ? AND expires_at > ?",
+                (cache_key, now),
+            ).fetchone()
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT payload, stored_at, expires_at FROM response_cache"
+                    " WHERE cache_key = %s AND expires_at > %s",
+                    (cache_key, now),
+                )
+                row = cur.fetchone()
+    return (row[0], row[1], row[2]) if row else None
+
+
+def put_cached_response(settings: Settings, cache_key: str, payload: str, stored_at: float, expires_at: float) -> None:
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            conn.execute(
+                """
+                INSERT INTO response_cache (cache_key, payload, stored_at, expires_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    payload = excluded.payload,
+                    stored_at = excluded.stored_at,
+                    expires_at = excluded.expires_at
+                """,
+                (cache_key, payload, stored_at, expires_at),
+            )
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO response_cache (cache_key, payload, stored_at, expires_at)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (cache_key) DO UPDATE SET
+                        payload = EXCLUDED.payload,
+                        stored_at = EXCLUDED.stored_at,
+                        expires_at = EXCLUDED.expires_at
+                    """,
+                    (cache_key, payload, stored_at, expires_at),
+                )
+                conn.commit()
+
+
+def delete_cached_response(settings: Settings, cache_key: str) -> None:
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            conn.execute("DELETE FROM response_cache WHERE cache_key = ?", (cache_key,))
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM response_cache WHERE cache_key = %s", (cache_key,))
+                conn.commit()
+
+
+def purge_cached_responses(settings: Settings, now: float) -> int:
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            return conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,)).rowcount
+    with psycopg.connect(settings.database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM response_cache WHERE expires_at <= %s", (now,))
+            deleted = cur.rowcount
+            conn.commit()
+    return deleted
+
+
+def get_saved_tracks_state(settings: Settings, spotify_user_id: str) -> dict | None:
+    query = "SELECT watermark, total, unindexed, full_synced_at FROM saved_tracks_sync WHERE spotify_user_id = {}"
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            row = conn.execute(query.format("?"), (spotify_user_id,)).fetchone()
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query.format("%s"), (spotify_user_id,))
+                row = cur.fetchone()
+    if not row:
+        return None
+    return {"watermark": row[0], "total": row[1], "unindexed": row[2], "full_synced_at": row[3]}
+
+
+def put_saved_tracks_state(
+    settings: Settings, spotify_user_id: str, watermark: str, total: int, unindexed: int, full_synced_at: float
+) -> None:
+    params = (spotify_user_id, watermark, total, unindexed, full_synced_at)
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            conn.execute(
+                """
+                INSERT INTO saved_tracks_sync (spotify_user_id, watermark, total, unindexed, full_synced_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(spotify_user_id) DO UPDATE SET
+                    watermark = excluded.watermark,
+                    total = excluded.total,
+                    unindexed = excluded.unindexed,
+                    full_synced_at = excluded.full_synced_at
+                """,
+                params,
+            )
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO saved_tracks_sync (spotify_user_id, watermark, total, unindexed, full_synced_at)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (spotify_user_id) DO UPDATE SET
+                        watermark = EXCLUDED.watermark,
+                        total = EXCLUDED.total,
+                        unindexed = EXCLUDED.unindexed,
+                        full_synced_at = EXCLUDED.full_synced_at
+                    """,
+                    params,
+                )
+                conn.commit()
+
+
+def upsert_saved_tracks(settings: Settings, spotify_user_id: str, entries: list[list], replace: bool = False) -> None:
+    """Store ``[track_id, added_at, artist_ids, album_id]`` records; ``replace`` drops all others first."""
+    params = [
+        (spotify_user_id, e[0], e[1], json.dumps(e[2], separators=(",", ":")), e[3]) for e in entries
+    ]
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            if replace:
+                conn.execute("DELETE FROM saved_tracks WHERE spotify_user_id = ?", (spotify_user_id,))
+            conn.executemany(
+                """
+                INSERT INTO saved_tracks (spotify_user_id, track_id, added_at, artist_ids, album_id)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(spotify_user_id, track_id) DO UPDATE SET
+                    added_at = excluded.added_at,
+                    artist_ids = excluded.artist_ids,
+                    album_id = excluded.album_id
+                """,
+                params,
+            )
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                if replace:
+                    cur.execute("DELETE FROM saved_tracks WHERE spotify_user_id = %s", (spotify_user_id,))
+                cur.executemany(
+                    """
+                    INSERT INTO saved_tracks (spotify_user_id, track_id, added_at, artist_ids, album_id)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (spotify_user_id, track_id) DO UPDATE SET
+                        added_at = EXCLUDED.added_at,
+                        artist_ids = EXCLUDED.artist_ids,
+                        album_id = EXCLUDED.album_id
+                    """,
+                    params,
+                )
+                conn.commit()
+
+
+def get_saved_tracks_load(settings: Settings, spotify_user_id: str) -> dict | None:
+    """The user's unfinished full Liked Songs load, if any: where it stopped and when it began."""
+    query = (
+        "SELECT next_offset, watermark, unindexed, boundary, started_at FROM saved_tracks_load"
+        " WHERE spotify_user_id = {}"
+    )
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            row = conn.execute(query.format("?"), (spotify_user_id,)).fetchone()
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query.format("%s"), (spotify_user_id,))
+                row = cur.fetchone()
+    if not row:
+        return None
+    return {"next_offset": row[0], "watermark": row[1], "unindexed": row[2], "boundary": row[3], "started_at": row[4]}
+
+
+def stage_saved_tracks(
+    settings: Settings, spotify_user_id: str, entries: list[list], load: dict, restart: bool = False
+) -> None:
+    """Stage one chunk of a full load and record the load's progress, in one transaction.
+
+    ``load`` is the ``get_saved_tracks_load`` shape: ``next_offset`` where the next
+    chunk starts, the ``watermark``, the running count of ``unindexed`` items (no
+    track ID) and the ``boundary`` track ID last read. ``restart`` discards whatever
+    an earlier, abandoned load had staged.
+    """
+    params = [
+        (spotify_user_id, e[0], e[1], json.dumps(e[2], separators=(",", ":")), e[3]) for e in entries
+    ]
+    queries = (
+        "DELETE FROM saved_tracks_staged WHERE spotify_user_id = {0}",
+        "INSERT INTO saved_tracks_staged (spotify_user_id, track_id, added_at, artist_ids, album_id)"
+        " VALUES ({0}, {0}, {0}, {0}, {0}) ON CONFLICT (spotify_user_id, track_id) DO UPDATE SET"
+        " added_at = excluded.added_at, artist_ids = excluded.artist_ids, album_id = excluded.album_id",
+        "INSERT INTO saved_tracks_load (spotify_user_id, next_offset, watermark, unindexed, boundary, started_at)"
+        " VALUES ({0}, {0}, {0}, {0}, {0}, {0}) ON CONFLICT (spotify_user_id) DO UPDATE SET"
+        " next_offset = excluded.next_offset, watermark = excluded.watermark, unindexed = excluded.unindexed,"
+        " boundary = excluded.boundary, started_at = excluded.started_at",
+    )
+    progress = (
+        spotify_user_id, load["next_offset"], load["watermark"], load["unindexed"], load["boundary"], load["started_at"]
+    )
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            if restart:
+                conn.execute(queries[0].format("?"), (spotify_user_id,))
+            conn.executemany(queries[1].format("?"), params)
+            conn.execute(queries[2].format("?"), progress)
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                if restart:
+                    cur.execute(queries[0].format("%s"), (spotify_user_id,))
+                cur.executemany(queries[1].format("%s"), params)
+                cur.execute(queries[2].format("%s"), progress)
+                conn.commit()
+
+
+def finish_saved_tracks_load(settings: Settings, spotify_user_id: str) -> None:
+    """Replace the user's ``saved_tracks`` with the staged rows and close the load, atomically."""
+    queries = (
+        "DELETE FROM saved_tracks WHERE spotify_user_id = {0}",
+        "INSERT INTO saved_tracks (spotify_user_id, track_id, added_at, artist_ids, album_id)"
+        " SELECT spotify_user_id, track_id, added_at, artist_ids, album_id FROM saved_tracks_staged"
+        " WHERE spotify_user_id = {0}",
+        "DELETE FROM saved_tracks_staged WHERE spotify_user_id = {0}",
+        "DELETE FROM saved_tracks_load WHERE spotify_user_id = {0}",
+    )
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            for query in queries:
+                conn.execute(query.format("?"), (spotify_user_id,))
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                for query in queries:
+                    cur.execute(query.format("%s"), (spotify_user_id,))
+                conn.commit()
+
+
+def get_saved_tracks(settings: Settings, spotify_user_id: str) -> list[list]:
+    """Stored Liked Songs records, newest first (the order Spotify lists them)."""
+    query = (
+        "SELECT track_id, added_at, artist_ids, album_id FROM saved_tracks"
+        " WHERE spotify_user_id = {} ORDER BY added_at DESC, track_id"
+    )
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            rows = conn.execute(query.format("?"), (spotify_user_id,)).fetchall()
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query.format("%s"), (spotify_user_id,))
+                rows = cur.fetchall()
+    return [[r[0], r[1], json.loads(r[2]), r[3]] for r in rows]
+
+
+def count_saved_tracks(settings: Settings, spotify_user_id: str, added_since: str = "") -> int:
+    """Count stored Liked Songs, optionally only those with ``added_at >= added_since`` (ISO 8601, UTC)."""
+    query = "SELECT COUNT(*) FROM saved_tracks WHERE spotify_user_id = {0} AND added_at >= {0}"
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            row = conn.execute(query.format("?"), (spotify_user_id, added_since)).fetchone()
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query.format("%s"), (spotify_user_id, added_since))
+                row = cur.fetchone()
+    return int(row[0])
+
+
+def get_vaulted_state(settings: Settings, spotify_user_id: str) -> dict:
+    """Load the reference-counted vaulted membership for a user.
+
+    Returns ``sources`` (source ID -> ``{"version", "track_ids"}``), ``counts``
+    (track ID -> number of contributing sources) and ``target`` (the playlist ID and
+    snapshot ID recorded after the last successful sync, or ``None``).
+    """
+    queries = (
+        "SELECT source_id, version, track_ids FROM vaulted_sources WHERE spotify_user_id = {}",
+        "SELECT track_id, refs FROM vaulted_counts WHERE spotify_user_id = {}",
+        "SELECT playlist_id, snapshot_id FROM vaulted_targets WHERE spotify_user_id = {}",
+    )
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            source_rows, count_rows, target_rows = (
+                conn.execute(q.format("?"), (spotify_user_id,)).fetchall() for q in queries
+            )
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                results = []
+                for q in queries:
+                    cur.execute(q.format("%s"), (spotify_user_id,))
+                    results.append(cur.fetchall())
+                source_rows, count_rows, target_rows = results
+    return {
+        "sources": {r[0]: {"version": r[1], "track_ids": json.loads(r[2])} for r in source_rows},
+        "counts": {r[0]: r[1] for r in count_rows},
+        "target": {"playlist_id": target_rows[0][0], "snapshot_id": target_rows[0][1]} if target_rows else None,
+    }
+
+
+def save_vaulted_state(
+    settings: Settings,
+    spotify_user_id: str,
+    changed_sources: dict[str, tuple[str, list[str]]],
+    removed_sources: list[str],
+    count_updates: dict[str, int],
+    target_playlist_id: str,
+    target_snapshot_id: str,
+) -> None:
+    """Apply one sync's changes atomically; counts of zero delete the track's row."""
+    user = spotify_user_id
+    source_params = [
+        (user, sid, version, json.dumps(ids, separators=(",", ":"))) for sid, (version, ids) in changed_sources.items()
+    ]
+    kept = [(user, tid, n) for tid, n in count_updates.items() if n > 0]
+    dropped = [(user, tid) for tid, n in count_updates.items() if n <= 0]
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            conn.executemany(
+                """
+                INSERT INTO vaulted_sources (spotify_user_id, source_id, version, track_ids) VALUES (?, ?, ?, ?)
+                ON CONFLICT(spotify_user_id, source_id) DO UPDATE SET
+                    version = excluded.version,
+                    track_ids = excluded.track_ids
+                """,
+                source_params,
+            )
+            conn.executemany(
+                "DELETE FROM vaulted_sources WHERE spotify_user_id = ? AND source_id = ?",
+                [(user, sid) for sid in removed_sources],
+            )
+            conn.executemany(
+                """
+                INSERT INTO vaulted_counts (spotify_user_id, track_id, refs) VALUES (?, ?, ?)
+                ON CONFLICT(spotify_user_id, track_id) DO UPDATE SET refs = excluded.refs
+                """,
+                kept,
+            )
+            conn.executemany("DELETE FROM vaulted_counts WHERE spotify_user_id = ? AND track_id = ?", dropped)
+            conn.execute(
+                """
+                INSERT INTO vaulted_targets (spotify_user_id, playlist_id, snapshot_id) VALUES (?, ?, ?)
+                ON CONFLICT(spotify_user_id) DO UPDATE SET
+                    playlist_id = excluded.playlist_id,
+                    snapshot_id = excluded.snapshot_id
+                """,
+                (user, target_playlist_id, target_snapshot_id),
+            )
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    """
+                    INSERT INTO vaulted_sources (spotify_user_id, source_id, version, track_ids)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (spotify_user_id, source_id) DO UPDATE SET
+                        version = EXCLUDED.version,
+                        track_ids = EXCLUDED.track_ids
+                    """,
+                    source_params,
+                )
+                cur.executemany(
+                    "DELETE FROM vaulted_sources WHERE spotify_user_id = %s AND source_id = %s",
+                    [(user, sid) for sid in removed_sources],
+                )
+                cur.executemany(
+                    """
+                    INSERT INTO vaulted_counts (spotify_user_id, track_id, refs) VALUES (%s, %s, %s)
+                    ON CONFLICT (spotify_user_id, track_id) DO UPDATE SET refs = EXCLUDED.refs
+                    """,
+                    kept,
+                )
+                cur.executemany("DELETE FROM vaulted_counts WHERE spotify_user_id = %s AND track_id = %s", dropped)
+                cur.execute(
+                    """
+                    INSERT INTO vaulted_targets (spotify_user_id, playlist_id, snapshot_id) VALUES (%s, %s, %s)
+                    ON CONFLICT (spotify_user_id) DO UPDATE SET
+                        playlist_id = EXCLUDED.playlist_id,
+                        snapshot_id = EXCLUDED.snapshot_id
+                    """,
+                    (user, target_playlist_id, target_snapshot_id),
+                )
+                conn.commit()
+
+
+_JOB_COLUMNS = (
+    "job_id, spotify_user_id, kind, params, state, phase, progress, result, error,"
+    " created_at, started_at, finished_at, updated_at, worker_id, lease_expires_at, attempts"
+)
+# Columns ``update_job`` may set; ``progress`` and ``result`` are stored as JSON.
+_JOB_UPDATABLE = ("state", "phase", "progress", "result", "error", "finished_at", "lease_expires_at")
+
+
+def _job_from_row(row) -> dict:
+    return {
+        "job_id": row[0],
+        "spotify_user_id": row[1],
+        "kind": row[2],
+        "params": json.loads(row[3]),
+        "state": row[4],
+        "phase": row[5],
+        "progress": json.loads(row[6]),
+        "result": json.loads(row[7]) if row[7] else None,
+        "error": row[8],
+        "created_at": row[9],
+        "started_at": row[10],
+        "finished_at": row[11],
+        "updated_at": row[12],
+        "worker_id": row[13],
+        "lease_expires_at": row[14],
+        "attempts": row[15],
+    }
+
+
+def create_job(
+    settings: Settings,
+    job_id: str,
+    spotify_user_id: str,
+    kind: str,
+    params: dict,
+    now: float,
+    worker_id: str | None = None,
+    lease_seconds: float | None = None,
+) -> dict | None:
+    """Insert a queued job; returns ``None`` if the user already has one of ``kind`` queued or running.
+
+    With ``worker_id`` the job is inserted already running under that worker's
+    lease, for callers that run the work themselves but must still exclude (and
+    be excluded by) the user's own submits.
+    """
+    if worker_id is None:
+        row = (
+            job_id, spotify_user_id, kind, json.dumps(params), "queued", "queued", "{}", None, None,
+            now, None, None, now, None, None, 0,
+        )
+    else:
+        row = (
+            job_id, spotify_user_id, kind, json.dumps(params), "running", "starting", "{}", None, None,
+            now, now, None, now, worker_id, now + (lease_seconds or 0.0), 1,
+        )
+    # ``jobs_one_active`` turns a concurrent duplicate submit, from any instance, into a no-op.
+    query = f"INSERT INTO jobs ({_JOB_COLUMNS}) VALUES (" + ", ".join(["{0}"] * len(row)) + ") ON CONFLICT DO NOTHING"
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            inserted = conn.execute(query.format("?"), row).rowcount
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query.format("%s"), row)
+                inserted = cur.rowcount
+                conn.commit()
+    return _job_from_row(row) if inserted else None
+
+
+def get_job(settings: Settings, job_id: str) -> dict | None:
+    query = f"SELECT {_JOB_COLUMNS} FROM jobs WHERE job_id = {{}}"
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            row = conn.execute(query.format("?"), (job_id,)).fetchone()
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query.format("%s"), (job_id,))
+                row = cur.fetchone()
+    return _job_from_row(row) if row else None
+
+
+def claim_job(settings: Settings, worker_id: str, now: float, lease_seconds: float, max_attempts: int) -> dict | None:
+    """Lease the oldest runnable job to ``worker_id`` and return it, or ``None`` if there is none.
+
+    Runnable means queued, or running under a lease that expired (its worker died)
+    with attempts to spare. Postgres picks the row with ``FOR UPDATE SKIP LOCKED``,
+    so concurrent workers never wait on or claim the same job; SQLite runs the
+    single ``UPDATE`` under its database write lock, which gives the same guarantee.
+    """
+    pick = (
+        "SELECT job_id FROM jobs"
+        " WHERE state = 'queued' OR (state = 'running' AND lease_expires_at < {0} AND attempts < {0})"
+        " ORDER BY created_at LIMIT 1"
+    )
+    query = (
+        "UPDATE jobs SET state = 'running', phase = 'starting', worker_id = {0}, lease_expires_at = {0},"
+        " started_at = COALESCE(started_at, {0}), attempts = attempts + 1, updated_at = {0}"
+        f" WHERE job_id = ({pick}{{1}}) RETURNING {_JOB_COLUMNS}"
+    )
+    params = (worker_id, now + lease_seconds, now, now, now, max_attempts)
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            row = conn.execute(query.format("?", ""), params).fetchone()
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query.format("%s", " FOR UPDATE SKIP LOCKED"), params)
+                row = cur.fetchone()
+                conn.commit()
+    return _job_from_row(row) if row else None
+
+
+def update_job(settings: Settings, job_id: str, now: float, worker_id: str | None = None, **fields) -> bool:
+    """Set any of ``_JOB_UPDATABLE`` on a job and bump its ``updated_at``.
+
+    With ``worker_id`` the write only applies while that worker holds the job, so a
+    worker whose lease was taken over cannot overwrite the new owner's state.
+    Returns whether a row was updated.
+    """
+    unknown = set(fields) - set(_JOB_UPDATABLE)
+    if unknown:
+        raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+    for name in ("progress", "result"):
+        if name in fields and fields[name] is not None:
+            fields[name] = json.dumps(fields[name], default=str)
+    names = list(fields)
+    params = (*fields.values(), now, job_id)
+    query = "UPDATE jobs SET " + "".join(f"{name} = {{0}}, " for name in names) + "updated_at = {0} WHERE job_id = {0}"
+    if worker_id is not None:
+        query += " AND worker_id = {0} AND state = 'running'"
+        params = (*params, worker_id)
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            return conn.execute(query.format("?"), params).rowcount == 1
+    with psycopg.connect(settings.database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute(query.format("%s"), params)
+            updated = cur.rowcount
+            conn.commit()
+    return updated == 1
+
+
+def find_active_job(settings: Settings, spotify_user_id: str, kind: str) -> dict | None:
+    """The user's queued or running job of ``kind``, if any."""
+    query = (
+        f"SELECT {_JOB_COLUMNS} FROM jobs WHERE spotify_user_id = {{0}} AND kind = {{0}}"
+        " AND state IN ('queued', 'running')"
+    )
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            row = conn.execute(query.format("?"), (spotify_user_id, kind)).fetchone()
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query.format("%s"), (spotify_user_id, kind))
+                row = cur.fetchone()
+    return _job_from_row(row) if row else None
+
+
+def list_jobs(settings: Settings, spotify_user_id: str, limit: int = 20) -> list[dict]:
+    query = f"SELECT {_JOB_COLUMNS} FROM jobs WHERE spotify_user_id = {{0}} ORDER BY created_at DESC LIMIT {{0}}"
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            rows = conn.execute(query.format("?"), (spotify_user_id, limit)).fetchall()
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query.format("%s"), (spotify_user_id, limit))
+                rows = cur.fetchall()
+    return [_job_from_row(r) for r in rows]
+
+
+def get_job_queue_stats(settings: Settings, created_before: float, finished_since: float) -> dict:
+    """Queued jobs older than ``created_before`` and jobs finished since ``finished_since``.
+
+    Returns ``ahead`` (queued count), ``running``, ``workers`` (distinct workers
+    holding a job), ``finished`` and ``avg_seconds`` (mean run time of the finished
+    ones, or ``None``).
+    """
+    queries = (
+        "SELECT COUNT(*) FROM jobs WHERE state = 'queued' AND created_at < {}",
+        "SELECT COUNT(*), COUNT(DISTINCT worker_id) FROM jobs WHERE state = 'running'",
+        "SELECT COUNT(*), AVG(finished_at - started_at) FROM jobs"
+        " WHERE state IN ('done', 'failed') AND started_at IS NOT NULL AND finished_at >= {}",
+    )
+    params = ((created_before,), (), (finished_since,))
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            rows = [conn.execute(q.format("?"), p).fetchone() for q, p in zip(queries, params)]
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                rows = []
+                for q, p in zip(queries, params):
+                    cur.execute(q.format("%s"), p)
+                    rows.append(cur.fetchone())
+    avg = rows[2][1]
+    return {
+        "ahead": int(rows[0][0]),
+        "running": int(rows[1][0]),
+        "workers": int(rows[1][1]),
+        "finished": int(rows[2][0]),
+        "avg_seconds": round(float(avg), 2) if avg is not None else None,
+    }
+
+
+def fail_abandoned_jobs(settings: Settings, now: float, max_attempts: int, error: str) -> int:
+    """Fail running jobs whose lease expired after their last allowed attempt; returns how many."""
+    query = (
+        "UPDATE jobs SET state = 'failed', phase = 'failed', error = {0}, finished_at = {0}, updated_at = {0}"
+        " WHERE state = 'running' AND lease_expires_at < {0} AND attempts >= {0}"
+    )
+    params = (error, now, now, now, max_attempts)
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            return conn.execute(query.format("?"), params).rowcount
+    with psycopg.connect(settings.database_url) as conn:
+        with conn.cursor() as cur:
+            cur.execute(query.format("%s"), params)
+            changed = cur.rowcount
+            conn.commit()
+    return changed
+
+
+def list_token_user_ids(settings: Settings) -> list[str]:
+    query = "SELECT spotify_user_id FROM spotify_user_tokens ORDER BY spotify_user_id"
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            rows = conn.execute(query).fetchall()
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query)
+                rows = cur.fetchall()
+    return [r[0] for r in rows]
+
+
+def get_last_job_params(settings: Settings, spotify_user_id: str, kinds: list[str]) -> dict[str, dict]:
+    """Params of the user's most recent successful job of each kind in ``kinds``."""
+    if not kinds:
+        return {}
+    query = (
+        "SELECT kind, params FROM jobs WHERE spotify_user_id = {0} AND state = 'done'"
+        " AND kind IN (" + ", ".join(["{0}"] * len(kinds)) + ") ORDER BY finished_at"
+    )
+    params = (spotify_user_id, *kinds)
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            rows = conn.execute(query.format("?"), params).fetchall()
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query.format("%s"), params)
+                rows = cur.fetchall()
+    # Ordered oldest first, so later rows overwrite earlier ones.
+    return {r[0]: json.loads(r[1]) for r in rows}
+
+
+def record_scheduler_run(settings: Settings, run_id: str, started_at: float, finished_at: float, report: dict) -> None:
+    params = (run_id, started_at, finished_at, json.dumps(report, default=str))
+    query = "INSERT INTO scheduler_runs (run_id, started_at, finished_at, report) VALUES ({0}, {0}, {0}, {0})"
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            conn.execute(query.format("?"), params)
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query.format("%s"), params)
+                conn.commit()
+
+
+def get_scheduler_runs(settings: Settings, limit: int = 10) -> list[dict]:
+    """Most recent scheduler run reports, newest first."""
+    query = "SELECT report FROM scheduler_runs ORDER BY started_at DESC LIMIT {}"
+    if _use_sqlite(settings):
+        with sqlite3.connect(_sqlite_path(settings)) as conn:
+            rows = conn.execute(query.format("?"), (limit,)).fetchall()
+    else:
+        with psycopg.connect(settings.database_url) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query.format("%s"), (limit,))
+                rows = cur.fetchall()
+    return [json.loads(r[0]) for r in rows]
+
+
 def is_expired(expires_at: datetime) -> bool:
     return expires_at <= datetime.now(timezone.utc)
@@ -0,0 +1,34 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .governor import INTERACTIVE
+
+# Priority class the current context's Spotify calls are governed under.
+_WORKLOAD: contextvars.ContextVar[str] = contextvars.ContextVar("workload", default=INTERACTIVE)
+
+
+@contextmanager
+def workload(priority: str):
+    """Run the enclosed work (and any fan-out from it) under ``priority``."""
+    token = _WORKLOAD.set(priority)
+    try:
+        yield
+    finally:
+        _WORKLOAD.reset(token)
+
+
+def current_workload() -> str:
+    return _WORKLOAD.get()
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool whose tasks run in a copy of the submitting thread's context.
+
+    Fan-out helpers (page and batch fetches) use this so context variables set by
+    the caller, such as the workload class or the fair-queue flow a scheduled sync
+    runs under, still apply to the Spotify calls made on the pool's threads.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -0,0 +1,83 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+
+class FairQueue:
+    """Weighted fair queuing of Spotify calls across flows (one flow per user).
+
+    At most ``slots`` calls hold a slot at once. Waiting calls are admitted in
+    order of their virtual finish tag (start-time fair queuing): a flow's next
+    call starts where its previous one finished, or at the current virtual time
+    if the flow was idle, and costs ``1 / weight``. A flow with thousands of
+    pages queued therefore gets its weighted share of the slots, never all of
+    them, and a small flow that shows up later is served right away.
+    """
+
+    def __init__(self, slots: int) -> None:
+        self.slots = max(int(slots), 1)
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._waiting: list[tuple[float, int, float]] = []
+        self._in_use = 0
+        self._virtual_time = 0.0
+        self._last_finish: dict[str, float] = {}
+        self._calls: dict[str, int] = defaultdict(int)
+        self._wait_seconds: dict[str, float] = defaultdict(float)
+
+    @contextmanager
+    def slot(self, flow: str, weight: float = 1.0):
+        """Hold one of the slots on behalf of ``flow`` for the duration of a call."""
+        queued_at = time.monotonic()
+        with self._cond:
+            start = max(self._virtual_time, self._last_finish.get(flow, 0.0))
+            finish = start + 1.0 / max(weight, 1e-6)
+            self._last_finish[flow] = finish
+            entry = (finish, next(self._seq), start)
+            heapq.heappush(self._waiting, entry)
+            while self._in_use >= self.slots or self._waiting[0] is not entry:
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self._in_use += 1
+            self._virtual_time = max(self._virtual_time, start)
+            self._calls[flow] += 1
+            self._wait_seconds[flow] += time.monotonic() - queued_at
+            # The next waiter may be admissible too if more than one slot is free.
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify_all()
+
+    def flow_stats(self, flow: str) -> dict:
+        with self._cond:
+            return {"calls": self._calls.get(flow, 0), "wait_seconds": round(self._wait_seconds.get(flow, 0.0), 2)}
+
+
+# The queue and flow the current context's Spotify calls are charged to, if any.
+_CURRENT: ContextVar[tuple[FairQueue, str, float] | None] = ContextVar("fair_queue_flow", default=None)
+
+
+@contextmanager
+def flow(queue: FairQueue, name: str, weight: float = 1.0):
+    """Charge every governed Spotify call made in this context to ``name`` on ``queue``."""
+    token = _CURRENT.set((queue, name, weight))
+    try:
+        yield
+    finally:
+        _CURRENT.reset(token)
+
+
+def current_slot():
+    """A slot on the current flow's queue, or a no-op outside any flow."""
+    current = _CURRENT.get()
+    if current is None:
+        return nullcontext()
+    queue, name, weight = current
+    return queue.slot(name, weight)
@@ -0,0 +1,283 @@
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from .config import Settings
+
+
+# Additive increase applied per successful call; multiplicative decrease per throttle window.
+RATE_INCREASE_STEP = 0.05
+RATE_DECREASE_FACTOR = 0.5
+MIN_RATE = 0.5
+MIN_CONCURRENCY = 1.0
+# A crashed worker's in-flight slot is reclaimed after this many seconds.
+LEASE_TTL_SECONDS = 60.0
+MAX_WAIT_SLICE = 1.0
+INTERACTIVE = "interactive"
+BULK = "bulk"
+# After an interactive caller had to wait, bulk callers hold off for this long (it is
+# renewed on every retry) so the next free token or slot goes to the interactive one.
+INTERACTIVE_WAIT_HOLD_SECONDS = 0.25
+
+
+class RateGovernor:
+    """App-wide token bucket plus AIMD concurrency limit for Spotify calls.
+
+    State lives in a small SQLite file so every uvicorn worker on the host draws
+    from the same budget. A 429 halves the rate and concurrency limit once per
+    Retry-After window and blocks all callers until the window has passed;
+    successes grow both back additively.
+
+    Callers are ``INTERACTIVE`` (request handlers, warm-ups, cache refreshes) or
+    ``BULK`` (queued jobs and scheduled syncs). Bulk callers may hold at most
+    ``bulk_share`` of the concurrency limit, may not draw the bucket below
+    ``1 - bulk_share`` of the burst, and stand aside entirely while an
+    interactive caller is waiting, so dashboard reads stay fast under a sync.
+    """
+
+    def __init__(
+        self, path: str, max_rate: float, burst: float, max_concurrency: int, bulk_share: float = 0.5
+    ) -> None:
+        self.path = path
+        self.max_rate = max(max_rate, MIN_RATE)
+        self.burst = max(burst, 1.0)
+        self.max_concurrency = max(float(max_concurrency), MIN_CONCURRENCY)
+        self.bulk_share = min(max(bulk_share, 0.0), 1.0)
+        self._init_store()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_store(self) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS governor_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    tokens REAL NOT NULL,
+                    refilled_at REAL NOT NULL,
+                    rate REAL NOT NULL,
+                    concurrency REAL NOT NULL,
+                    blocked_until REAL NOT NULL DEFAULT 0,
+                    throttled_total INTEGER NOT NULL DEFAULT 0,
+                    granted_total INTEGER NOT NULL DEFAULT 0,
+                    interactive_waiting_until REAL NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS governor_leases (
+                    lease_id TEXT PRIMARY KEY,
+                    expires_at REAL NOT NULL,
+                    priority TEXT NOT NULL DEFAULT 'interactive'
+                )
+                """
+            )
+            # Governor files created before priorities existed get the new columns in place.
+            for table, column, ddl in (
+                ("governor_state", "interactive_waiting_until", "REAL NOT NULL DEFAULT 0"),
+                ("governor_leases", "priority", "TEXT NOT NULL DEFAULT 'interactive'"),
+            ):
+                columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+            conn.execute(
+                "INSERT OR IGNORE INTO governor_state (id, tokens, refilled_at, rate, concurrency)"
+                " VALUES (1, ?, ?, ?, ?)",
+                (self.burst, time.time(), self.max_rate, self.max_concurrency),
+            )
+        finally:
+            conn.close()
+
+    def _try_acquire(self, lease_id: str, priority: str = INTERACTIVE) -> float:
+        """Take a token and an in-flight slot. Returns 0 on success, else seconds to wait."""
+        now = time.time()
+        bulk = priority == BULK
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            tokens, refilled_at, rate, concurrency, blocked_until, interactive_waiting_until = conn.execute(
+                "SELECT tokens, refilled_at, rate, concurrency, blocked_until, interactive_waiting_until"
+                " FROM governor_state WHERE id = 1"
+            ).fetchone()
+            if now < blocked_until:
+                conn.execute("COMMIT")
+                return blocked_until - now
+            if bulk and now < interactive_waiting_until:
+                conn.execute("COMMIT")
+                return interactive_waiting_until - now
+
+            tokens = min(self.burst, tokens + (now - refilled_at) * rate)
+            # Bulk callers leave the bottom of the bucket to interactive ones.
+            floor = min(1.0 + self.burst * (1.0 - self.bulk_share), self.burst) if bulk else 1.0
+            if tokens < floor:
+                conn.execute(
+                    "UPDATE governor_state SET tokens = ?, refilled_at = ? WHERE id = 1",
+                    (tokens, now),
+                )
+                wait = (floor - tokens) / rate
+                if not bulk:
+                    self._hold_bulk(conn, now, wait)
+                conn.execute("COMMIT")
+                return wait
+
+            conn.execute("DELETE FROM governor_leases WHERE expires_at < ?", (now,))
+            in_flight, in_flight_bulk = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(priority = ?), 0) FROM governor_leases", (BULK,)
+            ).fetchone()
+            bulk_limit = max(1, int(int(concurrency) * self.bulk_share))
+            if in_flight >= int(concurrency) or (bulk and in_flight_bulk >= bulk_limit):
+                if not bulk:
+                    self._hold_bulk(conn, now, 0.05)
+                conn.execute("COMMIT")
+                return 0.05
+
+            conn.execute(
+                "UPDATE governor_state SET tokens = ?, refilled_at = ?, granted_total = granted_total + 1"
+                " WHERE id = 1",
+                (tokens - 1.0, now),
+            )
+            conn.execute(
+                "INSERT INTO governor_leases (lease_id, expires_at, priority) VALUES (?, ?, ?)",
+                (lease_id, now + LEASE_TTL_SECONDS, priority),
+            )
+            conn.execute("COMMIT")
+            return 0.0
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _hold_bulk(conn: sqlite3.Connection, now: float, wait: float) -> None:
+        hold = now + min(wait, MAX_WAIT_SLICE) + INTERACTIVE_WAIT_HOLD_SECONDS
+        conn.execute(
+            "UPDATE governor_state SET interactive_waiting_until = MAX(interactive_waiting_until, ?) WHERE id = 1",
+            (hold,),
+        )
+
+    def acquire(self, priority: str = INTERACTIVE, deadline: float | None = None) -> str:
+        """Wait for a token and slot; raises ``TimeoutError`` rather than wait past ``deadline``."""
+        lease_id = uuid.uuid4().hex
+        while True:
+            wait = self._try_acquire(lease_id, priority)
+            if wait <= 0:
+                return lease_id
+            if deadline is not None and time.time() + wait > deadline:
+                raise TimeoutError(f"Spotify calls are paused for another {wait:.1f}s.")
+            time.sleep(min(wait, MAX_WAIT_SLICE))
+
+    def release(self, lease_id: str, throttled: bool = False, retry_after: float | None = None) -> None:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM governor_leases WHERE lease_id = ?", (lease_id,))
+            rate, concurrency, blocked_until = conn.execute(
+                "SELECT rate, concurrency, blocked_until FROM governor_state WHERE id = 1"
+            ).fetchone()
+            if throttled:
+                pause = max(retry_after or 0.0, 1.0)
+                # Concurrent 429s from the same burst only count as one decrease.
+                if now >= blocked_until:
+                    rate = max(MIN_RATE, rate * RATE_DECREASE_FACTOR)
+                    concurrency = max(MIN_CONCURRENCY, concurrency * RATE_DECREASE_FACTOR)
+                conn.execute(
+                    "UPDATE governor_state SET rate = ?, concurrency = ?, tokens = 0, refilled_at = ?,"
+                    " blocked_until = MAX(blocked_until, ?), throttled_total = throttled_total + 1 WHERE id = 1",
+                    (rate, concurrency, now + pause, now + pause),
+                )
+            else:
+                rate = min(self.max_rate, rate + RATE_INCREASE_STEP)
+                concurrency = min(self.max_concurrency, concurrency + 1.0 / concurrency)
+                conn.execute(
+                    "UPDATE governor_state SET rate = ?, concurrency = ? WHERE id = 1",
+                    (rate, concurrency),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    @contextmanager
+    def permit(self, priority: str = INTERACTIVE, deadline: float | None = None):
+        """Hold one governed call slot. Call ``permit.throttled(retry_after)`` on a 429."""
+        permit = _Permit()
+        lease_id = self.acquire(priority, deadline)
+        try:
+            yield permit
+        finally:
+            self.release(lease_id, throttled=permit.was_throttled, retry_after=permit.retry_after)
+
+    def stats(self) -> dict:
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT tokens, rate, concurrency, blocked_until, throttled_total, granted_total,"
+                " interactive_waiting_until FROM governor_state WHERE id = 1"
+            ).fetchone()
+            in_flight, in_flight_bulk = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(priority = ?), 0) FROM governor_leases WHERE expires_at >= ?",
+                (BULK, now),
+            ).fetchone()
+        finally:
+            conn.close()
+        tokens, rate, concurrency, blocked_until, throttled_total, granted_total, interactive_waiting_until = row
+        return {
+            "rate_per_second": round(rate, 3),
+            "max_rate_per_second": self.max_rate,
+            "tokens": round(tokens, 3),
+            "burst": self.burst,
+            "concurrency_limit": int(concurrency),
+            "max_concurrency": int(self.max_concurrency),
+            "in_flight": in_flight,
+            "in_flight_bulk": in_flight_bulk,
+            "bulk_share": self.bulk_share,
+            "bulk_held_for_seconds": round(max(0.0, interactive_waiting_until - now), 3),
+            "blocked_for_seconds": round(max(0.0, blocked_until - now), 3),
+            "granted_total": granted_total,
+            "throttled_total": throttled_total,
+        }
+
+
+class _Permit:
+    def __init__(self) -> None:
+        self.was_throttled = False
+        self.retry_after: float | None = None
+
+    def throttled(self, retry_after: float | None) -> None:
+        self.was_throttled = True
+        self.retry_after = retry_after
+
+
+_governor: RateGovernor | None = None
+_governor_lock = threading.Lock()
+
+
+def configure_governor(settings: Settings) -> RateGovernor:
+    global _governor
+    with _governor_lock:
+        _governor = RateGovernor(
+            path=settings.governor_path,
+            max_rate=settings.spotify_rate_per_second,
+            burst=settings.spotify_rate_burst,
+            max_concurrency=settings.spotify_max_concurrency,
+            bulk_share=settings.spotify_bulk_share,
+        )
+    return _governor
+
+
+def get_governor() -> RateGovernor:
+    if _governor is None:
+        return configure_governor(Settings())
+    return _governor
@@ -0,0 +1,139 @@
+import threading
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .config import Settings
+
+
+API_POOL_MAXSIZE = 32
+ACCOUNTS_POOL_MAXSIZE = 8
+
+_lock = threading.Lock()
+_api_session: "_SharedSession | None" = None
+_accounts_client: httpx.Client | None = None
+_accounts_http2 = False
+_accounts_stats = {"requests": 0, "connections_opened": 0}
+
+
+class _SharedSession(requests.Session):
+    # spotipy closes its session in Spotify.__del__, which would drop every pooled
+    # connection each time a per-request client is garbage-collected.
+    def close(self) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        super().close()
+
+
+def _http2_enabled(settings: Settings) -> bool:
+    if not settings.spotify_http2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_api_session() -> _SharedSession:
+    session = _SharedSession()
+    # Mirrors spotipy's default retry policy, except 429s are surfaced to the rate governor
+    # instead of being retried blindly inside urllib3.
+    retry = Retry(
+        total=3,
+        connect=None,
+        read=False,
+        allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
+        status=3,
+        backoff_factor=0.3,
+        status_forcelist=(500, 502, 503, 504),
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=API_POOL_MAXSIZE, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _trace_accounts(event_name: str, info: dict) -> None:
+    if event_name == "connection.connect_tcp.complete":
+        with _lock:
+            _accounts_stats["connections_opened"] += 1
+
+
+def _on_accounts_request(request: httpx.Request) -> None:
+    request.extensions["trace"] = _trace_accounts
+    with _lock:
+        _accounts_stats["requests"] += 1
+
+
+def api_session() -> requests.Session:
+    """Process-wide keep-alive session for api.spotify.com, shared across requests and users."""
+    global _api_session
+    if _api_session is None:
+        with _lock:
+            if _api_session is None:
+                _api_session = _build_api_session()
+    return _api_session
+
+
+def accounts_client(settings: Settings) -> httpx.Client:
+    """Process-wide keep-alive client for accounts.spotify.com (HTTP/2 when enabled and available)."""
+    global _accounts_client, _accounts_http2
+    if _accounts_client is None:
+        with _lock:
+            if _accounts_client is None:
+                _accounts_http2 = _http2_enabled(settings)
+                _accounts_client = httpx.Client(
+                    http2=_accounts_http2,
+                    timeout=30.0,
+                    limits=httpx.Limits(
+                        max_connections=ACCOUNTS_POOL_MAXSIZE,
+                        max_keepalive_connections=ACCOUNTS_POOL_MAXSIZE,
+                    ),
+                    event_hooks={"request": [_on_accounts_request]},
+                )
+    return _accounts_client
+
+
+def _reuse_ratio(requests_count: int, connections: int) -> float:
+    if not requests_count:
+        return 0.0
+    return round(max(0, requests_count - connections) / requests_count, 3)
+
+
+def pool_stats() -> dict:
+    api = {"requests": 0, "connections_opened": 0, "hosts": {}}
+    if _api_session is not None:
+        adapter = _api_session.get_adapter("https://api.spotify.com")
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            api["hosts"][pool.host] = {
+                "requests": pool.num_requests,
+                "connections_opened": pool.num_connections,
+            }
+            api["requests"] += pool.num_requests
+            api["connections_opened"] += pool.num_connections
+    api["reuse_ratio"] = _reuse_ratio(api["requests"], api["connections_opened"])
+
+    with _lock:
+        accounts = dict(_accounts_stats)
+    accounts["reuse_ratio"] = _reuse_ratio(accounts["requests"], accounts["connections_opened"])
+    accounts["http2"] = _accounts_http2
+    return {"api": api, "accounts": accounts}
+
+
+def close_pools() -> None:
+    global _api_session, _accounts_client
+    with _lock:
+        if _api_session is not None:
+            _api_session.shutdown()
+            _api_session = None
+        if _accounts_client is not None:
+            _accounts_client.close()
+            _accounts_client = None
@@ -0,0 +1,261 @@
+import os
+import socket
+import threading
+import time
+import uuid
+
+from .config import Settings
+from .db import claim_job, create_job, fail_abandoned_jobs, find_active_job, get_job_queue_stats, update_job
+from .executors import workload
+from .governor import BULK
+from .spotify_auth import get_spotify_client_for_user
+from .tasks import run_archive_stale_playlists, run_liked_add, run_vaulted_add
+
+# Each kind maps to the script name reported to clients and the task that runs it.
+JOB_KINDS = {
+    "vaulted": ("vaulted_add", run_vaulted_add),
+    "liked": ("liked_add", run_liked_add),
+    "archive_stale": ("archive_stale_playlists", run_archive_stale_playlists),
+}
+TERMINAL_STATES = {"done", "failed"}
+# Progress is written at most this often per job; phase changes always go through.
+PROGRESS_WRITE_INTERVAL_SECONDS = 0.5
+# Window over which finished jobs count towards the reported throughput.
+THROUGHPUT_WINDOW_SECONDS = 3600
+# How long an idle worker sleeps between claims when nothing was submitted locally.
+POLL_INTERVAL_SECONDS = 2.0
+# A job whose worker keeps dying (lease expiring) is failed after this many claims.
+MAX_ATTEMPTS = 3
+
+
+class LeaseLost(Exception):
+    """Raised inside a running task once another worker has taken its job over."""
+
+
+class _ProgressWriter:
+    """The ``progress(phase, done, total)`` callback handed to a task."""
+
+    def __init__(self, settings: Settings, job_id: str, worker_id: str) -> None:
+        self.settings = settings
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lost = threading.Event()
+        self._lock = threading.Lock()
+        self._phase = ""
+        self._written_at = 0.0
+
+    def __call__(self, phase: str, done: int = 0, total: int = 0) -> None:
+        if self.lost.is_set():
+            raise LeaseLost(self.job_id)
+        now = time.time()
+        with self._lock:
+            finished_phase = bool(total) and done >= total
+            recent = now - self._written_at < PROGRESS_WRITE_INTERVAL_SECONDS
+            if phase == self._phase and not finished_phase and recent:
+                return
+            self._phase = phase
+            self._written_at = now
+        progress = {"done": done, "total": total}
+        if not update_job(self.settings, self.job_id, now, worker_id=self.worker_id, phase=phase, progress=progress):
+            self.lost.set()
+            raise LeaseLost(self.job_id)
+
+
+class JobWorker:
+    """Claims jobs from the shared ``jobs`` table and runs them on local threads.
+
+    Every instance runs one of these; the table is the queue, so adding instances
+    (or ``JOB_WORKERS`` threads) adds throughput, and a claim can only succeed for
+    one worker at a time. While a job runs its lease is renewed every third of
+    ``JOB_LEASE_SECONDS``; if the process dies, the lease lapses and another worker
+    claims the job again, up to ``MAX_ATTEMPTS`` times. Runs are safe to repeat:
+    each one diffs against the playlist's current state.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = settings.job_lease_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._running: dict[str, _ProgressWriter] = {}
+        self._running_lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        for i in range(self.settings.job_workers):
+            thread = threading.Thread(target=self._loop, name=f"jobs-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="jobs-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+
+    def stop(self) -> None:
+        # Jobs still running keep their lease until it lapses, then get claimed elsewhere.
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job = claim_job(self.settings, self.worker_id, time.time(), self.lease_seconds, MAX_ATTEMPTS)
+            except Exception:
+                job = None
+            if job is None:
+                self._wake.wait(POLL_INTERVAL_SECONDS)
+                self._wake.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job: dict) -> None:
+        job_id = job["job_id"]
+        writer = _ProgressWriter(self.settings, job_id, self.worker_id)
+        with self._running_lock:
+            self._running[job_id] = writer
+        try:
+            ctx = get_spotify_client_for_user(self.settings, job["spotify_user_id"])
+            _, task = JOB_KINDS[job["kind"]]
+            with workload(BULK):
+                result = task(ctx, **job["params"], progress=writer)
+        except LeaseLost:
+            return
+        except Exception as exc:
+            now = time.time()
+            update_job(
+                self.settings, job_id, now, worker_id=self.worker_id,
+                state="failed", phase="failed", error=str(exc), finished_at=now,
+            )
+            return
+        finally:
+            with self._running_lock:
+                self._running.pop(job_id, None)
+        now = time.time()
+        update_job(
+            self.settings, job_id, now, worker_id=self.worker_id,
+            state="done", phase="done", result=result, finished_at=now,
+        )
+
+    def _heartbeat_loop(self) -> None:
+        interval = max(self.lease_seconds / 3, 1.0)
+        while not self._stop.wait(interval):
+            now = time.time()
+            with self._running_lock:
+                running = list(self._running.items())
+            for job_id, writer in running:
+                _renew_lease(self.settings, job_id, writer, now, self.lease_seconds)
+            try:
+                fail_abandoned_jobs(self.settings, now, MAX_ATTEMPTS, "Worker stopped responding.")
+            except Exception:
+                pass
+
+
+def _renew_lease(settings: Settings, job_id: str, writer: _ProgressWriter, now: float, lease_seconds: float) -> None:
+    try:
+        renewed = update_job(settings, job_id, now, worker_id=writer.worker_id, lease_expires_at=now + lease_seconds)
+    except Exception:
+        return
+    if not renewed:
+        writer.lost.set()
+
+
+def run_held_job(settings: Settings, user_id: str, kind: str, params: dict, worker_id: str, run) -> dict | None:
+    """Run ``run(progress)`` on the calling thread as a job of ``kind`` and return the finished job.
+
+    The job row is inserted already running under ``worker_id``, so the user's
+    one-active-job-per-kind rule holds between this run and their own submits,
+    whichever comes first; returns ``None`` without running anything if the user
+    already has one queued or running. The lease is renewed while ``run`` works;
+    if this process dies it lapses and a ``JobWorker`` finishes the job instead.
+    An exception from ``run`` fails the job and is re-raised.
+    """
+    lease_seconds = settings.job_lease_seconds
+    job = create_job(settings, uuid.uuid4().hex, user_id, kind, params, time.time(), worker_id, lease_seconds)
+    if job is None:
+        return None
+    job_id = job["job_id"]
+    writer = _ProgressWriter(settings, job_id, worker_id)
+    stop = threading.Event()
+
+    def heartbeat() -> None:
+        interval = max(lease_seconds / 3, 1.0)
+        while not stop.wait(interval):
+            _renew_lease(settings, job_id, writer, time.time(), lease_seconds)
+
+    threading.Thread(target=heartbeat, name=f"jobs-held-{job_id[:8]}", daemon=True).start()
+    try:
+        result = run(writer)
+    except Exception as exc:
+        now = time.time()
+        update_job(
+            settings, job_id, now, worker_id=worker_id,
+            state="failed", phase="failed", error=str(exc), finished_at=now,
+        )
+        raise
+    finally:
+        stop.set()
+    now = time.time()
+    update_job(settings, job_id, now, worker_id=worker_id, state="done", phase="done", result=result, finished_at=now)
+    return {**job, "state": "done", "phase": "done", "result": result, "finished_at": now}
+
+
+_worker: JobWorker | None = None
+_worker_lock = threading.Lock()
+
+
+def start_job_worker(settings: Settings) -> JobWorker:
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = JobWorker(settings)
+            _worker.start()
+    return _worker
+
+
+def stop_job_worker() -> None:
+    global _worker
+    with _worker_lock:
+        if _worker is not None:
+            _worker.stop()
+            _worker = None
+
+
+def submit_job(settings: Settings, user_id: str, kind: str, params: dict) -> dict:
+    """Queue a run of ``kind`` for ``user_id`` and return the stored job.
+
+    A user has at most one queued or running job per kind: submitting again while
+    one is pending returns that job instead of starting a second run.
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = create_job(settings, uuid.uuid4().hex, user_id, kind, params, time.time())
+    if job is None:
+        active = find_active_job(settings, user_id, kind)
+        if active:
+            return active
+        raise RuntimeError("Could not queue job.")
+    if _worker is not None:
+        _worker.wake()
+    return job
+
+
+def describe_job(settings: Settings, job: dict) -> dict:
+    """Client view of a job: no owner or lease details, plus queue position and throughput."""
+    now = time.time()
+    stats = get_job_queue_stats(settings, job["created_at"], now - THROUGHPUT_WINDOW_SECONDS)
+    script, _ = JOB_KINDS.get(job["kind"], (job["kind"], None))
+    view = {k: v for k, v in job.items() if k not in {"spotify_user_id", "worker_id", "lease_expires_at"}}
+    return {
+        **view,
+        "script": script,
+        "queue_position": stats["ahead"] + 1 if job["state"] == "queued" else 0,
+        "throughput": {
+            "running": stats["running"],
+            "workers": stats["workers"],
+            "finished_last_hour": stats["finished"],
+            "avg_seconds": stats["avg_seconds"],
+        },
+    }
@@ -0,0 +1,162 @@
+import time
+
+from .config import Settings
+from .budget import budget_exhausted
+from .db import (
+    count_saved_tracks,
+    finish_saved_tracks_load,
+    get_saved_tracks_load,
+    get_saved_tracks_state,
+    put_saved_tracks_state,
+    stage_saved_tracks,
+    upsert_saved_tracks,
+)
+from .executors import ContextThreadPoolExecutor
+
+
+# Projection for library reads: enough to derive genres, albums and recency without
+# any follow-up track lookups.
+ENTRY_FIELDS = "items(added_at,track(id,artists(id),album(id))),total"
+SAVED_TRACKS_PAGE_SIZE = 50
+MAX_PAGE_WORKERS = 8
+# Unlike-plus-like pairs between syncs keep ``total`` unchanged, so a full
+# reconcile still runs at least this often.
+FULL_RECONCILE_SECONDS = 24 * 3600
+
+
+def entry_from_item(item: dict) -> list | None:
+    """Compact per-track record: ``[track_id, added_at, artist_ids, album_id]``."""
+    track = (item or {}).get("track") or {}
+    tid = track.get("id")
+    if not tid:
+        return None
+    artist_ids = [a["id"] for a in (track.get("artists") or []) if a and a.get("id")]
+    album_id = (track.get("album") or {}).get("id") or ""
+    return [tid, (item or {}).get("added_at") or "", artist_ids, album_id]
+
+
+def _track_id(item: dict | None) -> str:
+    return ((item or {}).get("track") or {}).get("id") or ""
+
+
+def _stage(
+    settings: Settings, user_id: str, load: dict, items: list[dict], next_offset: int, restart: bool = False
+) -> None:
+    entries = [entry for entry in map(entry_from_item, items) if entry]
+    load["unindexed"] += len(items) - len(entries)
+    load["next_offset"] = next_offset
+    if items:
+        load["boundary"] = _track_id(items[-1])
+    stage_saved_tracks(settings, user_id, entries, load, restart=restart)
+
+
+def _full_sync(settings: Settings, user_id: str, fetch_page, first: dict, page_size: int, load: dict | None) -> dict:
+    """Load every page into the staging table, resuming ``load`` where it stopped, then swap it in.
+
+    Pages are fetched ``MAX_PAGE_WORKERS`` at a time and each chunk is staged with
+    the offset after it, so a load that ``budget_exhausted()`` stops (or a crash
+    interrupts) carries on from there on the next sync; it then returns with
+    ``complete: false``. ``saved_tracks`` keeps its previous rows until the load ends.
+
+    Likes and unlikes between two slices shift every later offset. A resumed load
+    first re-reads the track just before its offset and starts over if that is no
+    longer the ``boundary`` track it stopped after, so nothing is skipped or read
+    twice. Any remaining ``gap`` (stored plus unindexed short of ``total``) is
+    reported, and since the unindexed count is kept as read, the next sync's count
+    check reconciles it rather than hiding it.
+    """
+    total = int(first.get("total") or 0)
+    items = list(first.get("items") or [])
+    pages = 1
+    progressed = False
+    if load is not None and time.time() - load["started_at"] >= FULL_RECONCILE_SECONDS:
+        load = None
+    if load is not None and load["next_offset"] < total:
+        check = (fetch_page(load["next_offset"] - 1, 1) or {}).get("items") or []
+        pages += 1
+        if not check or _track_id(check[0]) != load["boundary"]:
+            load = None
+    if load is None:
+        # Newest first, so the first page holds the watermark for the incremental syncs after this.
+        watermark = max(((item or {}).get("added_at") or "" for item in items), default="")
+        load = {"watermark": watermark, "unindexed": 0, "boundary": "", "started_at": time.time()}
+        _stage(settings, user_id, load, items, page_size, restart=True)
+        progressed = True
+
+    offset = load["next_offset"]
+    while offset < total:
+        if progressed and budget_exhausted():
+            return {"mode": "full", "pages": pages, "total": total, "loaded": offset, "complete": False}
+        offsets = list(range(offset, total, page_size))[:MAX_PAGE_WORKERS]
+        with ContextThreadPoolExecutor(max_workers=len(offsets)) as pool:
+            chunk = [
+                item
+                for page in pool.map(lambda page_offset: fetch_page(page_offset, page_size), offsets)
+                for item in (page or {}).get("items") or []
+            ]
+        offset = offsets[-1] + page_size
+        _stage(settings, user_id, load, chunk, offset)
+        pages += len(offsets)
+        progressed = True
+
+    finish_saved_tracks_load(settings, user_id)
+    stored = count_saved_tracks(settings, user_id)
+    # Local files and unavailable tracks count towards ``total`` but have no ID to store.
+    gap = total - stored - load["unindexed"]
+    put_saved_tracks_state(settings, user_id, load["watermark"], total, load["unindexed"], time.time())
+    return {"mode": "full", "pages": pages, "total": total, "loaded": total, "gap": gap, "complete": True}
+
+
+def sync_saved_tracks(settings: Settings, user_id: str, fetch_page, page_size: int = SAVED_TRACKS_PAGE_SIZE) -> dict:
+    """Bring the ``saved_tracks`` mirror for ``user_id`` up to date with Liked Songs.
+
+    ``fetch_page(offset, limit)`` returns one raw page of the saved-tracks endpoint.
+    Liked Songs are listed newest first, so an incremental sync reads pages only
+    until it passes the stored ``added_at`` watermark. Unlikes cannot be seen from
+    the head of the list; they show up as a stored count above ``total``, which
+    (like any other mismatch) triggers a full reconcile. Full loads are chunked
+    and resumable (see ``_full_sync``); check ``complete`` on the result.
+    """
+    state = get_saved_tracks_state(settings, user_id)
+    load = get_saved_tracks_load(settings, user_id)
+    first = fetch_page(0, page_size) or {}
+    total = int(first.get("total") or 0)
+    if load is not None or state is None or time.time() - state["full_synced_at"] >= FULL_RECONCILE_SECONDS:
+        return _full_sync(settings, user_id, fetch_page, first, page_size, load)
+
+    watermark = state["watermark"]
+    unindexed = state["unindexed"]
+    new_entries: list[list] = []
+    added = 0
+    newest = watermark
+    page, offset, pages = first, 0, 1
+    while True:
+        items = page.get("items") or []
+        reached_watermark = False
+        for item in items:
+            added_at = (item or {}).get("added_at") or ""
+            # Equal timestamps are re-read: several tracks can be liked within one second.
+            if added_at < watermark:
+                reached_watermark = True
+                break
+            entry = entry_from_item(item)
+            if entry:
+                new_entries.append(entry)
+            elif added_at > watermark:
+                unindexed += 1
+            added += added_at > watermark
+            newest = max(newest, added_at)
+        offset += page_size
+        if reached_watermark or not items or offset >= total:
+            break
+        page = fetch_page(offset, page_size) or {}
+        pages += 1
+
+    upsert_saved_tracks(settings, user_id, new_entries)
+    if count_saved_tracks(settings, user_id) + unindexed != total:
+        result = _full_sync(settings, user_id, fetch_page, first, page_size, None)
+        # The reconcile reuses the first page already fetched above.
+        return {**result, "mode": "reconcile", "pages": result["pages"] + pages - 1}
+
+    put_saved_tracks_state(settings, user_id, newest, total, unindexed, state["full_synced_at"])
+    return {"mode": "incremental", "pages": pages, "total": total, "new": added, "complete": True}
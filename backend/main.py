@@ -1,20 +1,36 @@
+import asyncio
+import json
+import math
+import time
+from hmac import compare_digest
 from urllib.parse import quote_plus, urlparse
 
 from dotenv import load_dotenv
 import httpx
+import requests
 
 load_dotenv("backend/.env")
 
 from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from pydantic import BaseModel
 
+from .budget import Budget
+from .cache import configure_response_cache, get_response_cache
+from .catalog import catalog_stats
 from .config import Settings
-from .db import delete_tokens, get_tokens, init_db
+from .db import delete_tokens, get_job, get_scheduler_runs, get_tokens, init_db, list_jobs
+from .governor import configure_governor, get_governor
+from .http_pool import close_pools, pool_stats
+from .jobs import TERMINAL_STATES, describe_job, start_job_worker, stop_job_worker, submit_job
+from .retry import RetryBudgetExceeded, deadline
+from .scheduler import scheduler_running, start_nightly
 from .security import make_session_token, make_state, read_session_token, read_state
 from .spotify_auth import build_authorize_url, exchange_code_for_tokens, get_spotify_client_for_user, store_login_tokens
 from .tasks import (
+    ContinuationExpired,
     get_artist_catalog_depth,
     get_automation_targets,
     get_dashboard_overview,
@@ -26,13 +42,13 @@ from .tasks import (
     get_recently_played,
     get_track_longevity,
     get_top_lists,
-    run_archive_stale_playlists,
-    run_liked_add,
-    run_vaulted_add,
     search_artists,
 )
+from .warmup import get_warmup_status, start_warmup
 
 settings = Settings()
+JOB_EVENTS_POLL_SECONDS = 0.5
+JOB_EVENTS_KEEPALIVE_SECONDS = 15
 app = FastAPI(title="Spotipy Scripts API", version="0.2.0")
 
 def _frontend_origins(frontend_url: str) -> list[str]:
@@ -83,10 +99,33 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def request_deadline(request: Request, call_next):
+    # Spotify retries made while handling the request stop once the deadline passes
+    # (see retry.RetryPolicy); queued jobs run on worker threads outside it.
+    with deadline(settings.request_deadline_seconds):
+        return await call_next(request)
+
+
+@app.exception_handler(RetryBudgetExceeded)
+def spotify_unavailable(request: Request, exc: RetryBudgetExceeded) -> JSONResponse:
+    headers = {"Retry-After": str(math.ceil(exc.retry_after))} if exc.retry_after else None
+    return JSONResponse(status_code=503, content={"detail": f"Spotify is unavailable: {exc}"}, headers=headers)
+
+
 @app.on_event("startup")
 def startup() -> None:
     settings.validate()
     init_db(settings)
+    configure_governor(settings)
+    configure_response_cache(settings).purge_durable()
+    start_job_worker(settings)
+
+
+@app.on_event("shutdown")
+def shutdown() -> None:
+    stop_job_worker()
+    close_pools()
 
 
 def _extract_bearer_token(authorization: str | None) -> str:
@@ -109,6 +148,14 @@ def _current_user_id(authorization: str | None) -> str:
     return user_id
 
 
+def _require_admin(admin_token: str | None) -> None:
+    # Admin endpoints are disabled entirely unless ADMIN_TOKEN is configured.
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not found.")
+    if not admin_token or not compare_digest(admin_token, settings.admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
 @app.get("/")
 def root() -> dict:
     return {"ok": True, "service": "spotipy_scripts_backend"}
@@ -151,7 +198,7 @@ def auth_callback(code: str | None = None, state: str | None = None, error: str
     try:
         token_data = exchange_code_for_tokens(settings, code)
         user = store_login_tokens(settings, token_data)
-    except httpx.HTTPStatusError as exc:
+    except (httpx.HTTPStatusError, requests.HTTPError) as exc:
         status = exc.response.status_code
         # Common case: app is still in development mode and this Spotify user is not allowlisted.
         if status == 403:
@@ -165,6 +212,8 @@ def auth_callback(code: str | None = None, state: str | None = None, error: str
         return RedirectResponse(target, status_code=302)
 
     session_token = make_session_token(settings, user["spotify_user_id"])
+    # Fill the dashboard caches while the browser is still following the redirect.
+    start_warmup(settings, user["spotify_user_id"])
 
     target = (
         f"{return_to}"
@@ -174,6 +223,47 @@ def auth_callback(code: str | None = None, state: str | None = None, error: str
     return RedirectResponse(target, status_code=302)
 
 
+@app.get("/admin/http-pools")
+def admin_http_pools(admin_token: str | None = Header(default=None, alias="X-Admin-Token")) -> dict:
+    _require_admin(admin_token)
+    return {"ok": True, "pools": pool_stats()}
+
+
+@app.get("/admin/governor")
+def admin_governor(admin_token: str | None = Header(default=None, alias="X-Admin-Token")) -> dict:
+    _require_admin(admin_token)
+    return {"ok": True, "governor": get_governor().stats()}
+
+
+@app.get("/admin/catalog")
+def admin_catalog(admin_token: str | None = Header(default=None, alias="X-Admin-Token")) -> dict:
+    _require_admin(admin_token)
+    return {"ok": True, "catalog": catalog_stats(settings)}
+
+
+@app.get("/admin/cache")
+def admin_cache(admin_token: str | None = Header(default=None, alias="X-Admin-Token")) -> dict:
+    _require_admin(admin_token)
+    return {"ok": True, "cache": get_response_cache().stats()}
+
+
+@app.get("/admin/scheduler")
+def admin_scheduler(
+    limit: int = 5,
+    admin_token: str | None = Header(default=None, alias="X-Admin-Token"),
+) -> dict:
+    _require_admin(admin_token)
+    return {"ok": True, "running": scheduler_running(), "runs": get_scheduler_runs(settings, limit=limit)}
+
+
+@app.post("/admin/scheduler/run")
+def admin_scheduler_run(admin_token: str | None = Header(default=None, alias="X-Admin-Token")) -> dict:
+    _require_admin(admin_token)
+    if not start_nightly(settings):
+        raise HTTPException(status_code=409, detail="A scheduler run is already in progress.")
+    return {"ok": True, "started": True}
+
+
 @app.get("/me")
 def me(authorization: str | None = Header(default=None, alias="Authorization")) -> dict:
     spotify_user_id = _current_user_id(authorization)
@@ -183,14 +273,20 @@ def me(authorization: str | None = Header(default=None, alias="Authorization"))
     return {"spotify_user_id": row["spotify_user_id"], "display_name": row["display_name"]}
 
 
+@app.get("/me/warmup")
+def me_warmup(authorization: str | None = Header(default=None, alias="Authorization")) -> dict:
+    spotify_user_id = _current_user_id(authorization)
+    return {"ok": True, "warmup": get_warmup_status(spotify_user_id)}
+
+
 @app.get("/stats/overview")
 def stats_overview(
     time_range: str = "short_term",
     authorization: str | None = Header(default=None, alias="Authorization"),
 ) -> dict:
     spotify_user_id = _current_user_id(authorization)
-    sp, _ = get_spotify_client_for_user(settings, spotify_user_id)
-    overview = get_dashboard_overview(sp, time_range=time_range)
+    ctx = get_spotify_client_for_user(settings, spotify_user_id)
+    overview = get_dashboard_overview(ctx, time_range=time_range)
     return {"ok": True, "overview": overview}
 
 
@@ -200,8 +296,8 @@ def stats_top(
     authorization: str | None = Header(default=None, alias="Authorization"),
 ) -> dict:
     spotify_user_id = _current_user_id(authorization)
-    sp, _ = get_spotify_client_for_user(settings, spotify_user_id)
-    data = get_top_lists(sp, time_range=time_range)
+    ctx = get_spotify_client_for_user(settings, spotify_user_id)
+    data = get_top_lists(ctx, time_range=time_range)
     return {"ok": True, "data": data}
 
 
@@ -210,8 +306,8 @@ def stats_track_longevity(
     authorization: str | None = Header(default=None, alias="Authorization"),
 ) -> dict:
     spotify_user_id = _current_user_id(authorization)
-    sp, _ = get_spotify_client_for_user(settings, spotify_user_id)
-    data = get_track_longevity(sp)
+    ctx = get_spotify_client_for_user(settings, spotify_user_id)
+    data = get_track_longevity(ctx)
     return {"ok": True, "data": data}
 
 
@@ -221,16 +317,16 @@ def recommendations_genre_playlists(
     authorization: str | None = Header(default=None, alias="Authorization"),
 ) -> dict:
     spotify_user_id = _current_user_id(authorization)
-    sp, _ = get_spotify_client_for_user(settings, spotify_user_id)
-    data = get_genre_playlist_recommendations(sp, time_range=time_range)
+    ctx = get_spotify_client_for_user(settings, spotify_user_id)
+    data = get_genre_playlist_recommendations(ctx, time_range=time_range)
     return {"ok": True, "data": data}
 
 
 @app.get("/automation/targets")
 def automation_targets(authorization: str | None = Header(default=None, alias="Authorization")) -> dict:
     spotify_user_id = _current_user_id(authorization)
-    sp, _ = get_spotify_client_for_user(settings, spotify_user_id)
-    targets = get_automation_targets(sp)
+    ctx = get_spotify_client_for_user(settings, spotify_user_id)
+    targets = get_automation_targets(ctx)
     return {"ok": True, "targets": targets}
 
 
@@ -244,17 +340,20 @@ class ArchiveStaleRequest(BaseModel):
     prefix: str = "[Archive]"
 
 
+def _job_accepted(job: dict) -> dict:
+    return {"ok": True, "job": describe_job(settings, job), "job_id": job["job_id"], "state": job["state"]}
+
+
 @app.post("/run/vaulted")
 def run_vaulted(
     body: RunRequest | None = None,
     authorization: str | None = Header(default=None, alias="Authorization"),
 ) -> dict:
     spotify_user_id = _current_user_id(authorization)
-    sp, _ = get_spotify_client_for_user(settings, spotify_user_id)
     playlist_name = body.target_playlist_name if body and body.target_playlist_name else "_vaulted"
     playlist_id = body.target_playlist_id if body and body.target_playlist_id else None
-    result = run_vaulted_add(sp, playlist_name=playlist_name, playlist_id=playlist_id)
-    return {"ok": True, "script": "vaulted_add", "result": result}
+    job = submit_job(settings, spotify_user_id, "vaulted", {"playlist_name": playlist_name, "playlist_id": playlist_id})
+    return _job_accepted(job)
 
 
 @app.post("/run/liked")
@@ -263,11 +362,10 @@ def run_liked(
     authorization: str | None = Header(default=None, alias="Authorization"),
 ) -> dict:
     spotify_user_id = _current_user_id(authorization)
-    sp, _ = get_spotify_client_for_user(settings, spotify_user_id)
     playlist_name = body.target_playlist_name if body and body.target_playlist_name else "Liked Songs Mirror"
     playlist_id = body.target_playlist_id if body and body.target_playlist_id else None
-    result = run_liked_add(sp, playlist_name=playlist_name, playlist_id=playlist_id)
-    return {"ok": True, "script": "liked_add", "result": result}
+    job = submit_job(settings, spotify_user_id, "liked", {"playlist_name": playlist_name, "playlist_id": playlist_id})
+    return _job_accepted(job)
 
 
 @app.post("/logout")
@@ -282,8 +380,8 @@ def stats_recently_played(
     authorization: str | None = Header(default=None, alias="Authorization"),
 ) -> dict:
     spotify_user_id = _current_user_id(authorization)
-    sp, _ = get_spotify_client_for_user(settings, spotify_user_id)
-    data = get_recently_played(sp)
+    ctx = get_spotify_client_for_user(settings, spotify_user_id)
+    data = get_recently_played(ctx)
     return {"ok": True, "data": data}
 
 
@@ -292,8 +390,8 @@ def stats_listening_pattern(
     authorization: str | None = Header(default=None, alias="Authorization"),
 ) -> dict:
     spotify_user_id = _current_user_id(authorization)
-    sp, _ = get_spotify_client_for_user(settings, spotify_user_id)
-    data = get_listening_pattern(sp)
+    ctx = get_spotify_client_for_user(settings, spotify_user_id)
+    data = get_listening_pattern(ctx)
     return {"ok": True, "data": data}
 
 
@@ -303,29 +401,51 @@ def search_artists_endpoint(
     authorization: str | None = Header(default=None, alias="Authorization"),
 ) -> dict:
     spotify_user_id = _current_user_id(authorization)
-    sp, _ = get_spotify_client_for_user(settings, spotify_user_id)
-    data = search_artists(sp, q)
+    ctx = get_spotify_client_for_user(settings, spotify_user_id)
+    data = search_artists(ctx, q)
     return {"ok": True, "data": data}
 
 
+def _scan_budget(budget_seconds: float | None, budget_calls: int | None) -> Budget:
+    seconds = settings.stats_budget_seconds if budget_seconds is None else budget_seconds
+    # A slice never runs past the request deadline, whatever the client asks for.
+    return Budget(seconds=max(0.0, min(seconds, settings.request_deadline_seconds)), calls=budget_calls)
+
+
+def _resume(fetch, *args, **kwargs) -> dict:
+    try:
+        return fetch(*args, **kwargs)
+    except ContinuationExpired as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
 @app.get("/stats/artist-catalog")
 def stats_artist_catalog(
     artist_id: str,
+    cursor: str | None = None,
+    budget_seconds: float | None = None,
+    budget_calls: int | None = None,
     authorization: str | None = Header(default=None, alias="Authorization"),
 ) -> dict:
     spotify_user_id = _current_user_id(authorization)
-    sp, _ = get_spotify_client_for_user(settings, spotify_user_id)
-    data = get_artist_catalog_depth(sp, artist_id)
+    ctx = get_spotify_client_for_user(settings, spotify_user_id)
+    allowance = _scan_budget(budget_seconds, budget_calls)
+    data = _resume(get_artist_catalog_depth, ctx, artist_id, allowance=allowance, cursor=cursor)
     return {"ok": True, "data": data}
 
 
 @app.get("/stats/genre-breakdown")
 def stats_genre_breakdown(
+    approximate: bool = False,
+    cursor: str | None = None,
+    budget_seconds: float | None = None,
+    budget_calls: int | None = None,
     authorization: str | None = Header(default=None, alias="Authorization"),
 ) -> dict:
     spotify_user_id = _current_user_id(authorization)
-    sp, _ = get_spotify_client_for_user(settings, spotify_user_id)
-    data = get_genre_breakdown(sp)
+    ctx = get_spotify_client_for_user(settings, spotify_user_id)
+    allowance = _scan_budget(budget_seconds, budget_calls)
+    data = _resume(get_genre_breakdown, ctx, allowance=allowance, cursor=cursor, approximate=approximate)
     return {"ok": True, "data": data}
 
 
@@ -334,18 +454,22 @@ def stats_mood_timeline(
     authorization: str | None = Header(default=None, alias="Authorization"),
 ) -> dict:
     spotify_user_id = _current_user_id(authorization)
-    sp, _ = get_spotify_client_for_user(settings, spotify_user_id)
-    data = get_mood_timeline(sp)
+    ctx = get_spotify_client_for_user(settings, spotify_user_id)
+    data = get_mood_timeline(ctx)
     return {"ok": True, "data": data}
 
 
 @app.get("/stats/playlist-freshness")
 def stats_playlist_freshness(
+    cursor: str | None = None,
+    budget_seconds: float | None = None,
+    budget_calls: int | None = None,
     authorization: str | None = Header(default=None, alias="Authorization"),
 ) -> dict:
     spotify_user_id = _current_user_id(authorization)
-    sp, _ = get_spotify_client_for_user(settings, spotify_user_id)
-    data = get_playlist_freshness(sp)
+    ctx = get_spotify_client_for_user(settings, spotify_user_id)
+    allowance = _scan_budget(budget_seconds, budget_calls)
+    data = _resume(get_playlist_freshness, ctx, allowance=allowance, cursor=cursor)
     return {"ok": True, "data": data}
 
 
@@ -355,8 +479,58 @@ def run_archive_stale(
     authorization: str | None = Header(default=None, alias="Authorization"),
 ) -> dict:
     spotify_user_id = _current_user_id(authorization)
-    sp, _ = get_spotify_client_for_user(settings, spotify_user_id)
     threshold = body.max_freshness_score if body else 30
     prefix = body.prefix if body else "[Archive]"
-    result = run_archive_stale_playlists(sp, max_freshness_score=threshold, prefix=prefix)
-    return {"ok": True, "script": "archive_stale_playlists", "result": result}
+    job = submit_job(
+        settings, spotify_user_id, "archive_stale", {"max_freshness_score": threshold, "prefix": prefix}
+    )
+    return _job_accepted(job)
+
+
+def _user_job(job_id: str, spotify_user_id: str) -> dict:
+    job = get_job(settings, job_id)
+    if not job or job["spotify_user_id"] != spotify_user_id:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+
+@app.get("/jobs")
+def jobs_list(authorization: str | None = Header(default=None, alias="Authorization")) -> dict:
+    spotify_user_id = _current_user_id(authorization)
+    return {"ok": True, "jobs": [describe_job(settings, job) for job in list_jobs(settings, spotify_user_id)]}
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str, authorization: str | None = Header(default=None, alias="Authorization")) -> dict:
+    spotify_user_id = _current_user_id(authorization)
+    return {"ok": True, "job": describe_job(settings, _user_job(job_id, spotify_user_id))}
+
+
+@app.get("/jobs/{job_id}/events")
+def job_events(job_id: str, authorization: str | None = Header(default=None, alias="Authorization")):
+    """Server-sent events: one ``job`` event per change until the job finishes."""
+    spotify_user_id = _current_user_id(authorization)
+    _user_job(job_id, spotify_user_id)
+
+    async def stream():
+        # Runs on the event loop: DB reads go to the threadpool and waits don't block a worker thread.
+        last_update = None
+        last_sent = time.time()
+        while True:
+            job = await run_in_threadpool(get_job, settings, job_id)
+            if job is None:
+                return
+            if job["updated_at"] != last_update:
+                last_update = job["updated_at"]
+                last_sent = time.time()
+                view = await run_in_threadpool(describe_job, settings, job)
+                yield f"event: job\ndata: {json.dumps(view, default=str)}\n\n"
+                if job["state"] in TERMINAL_STATES:
+                    return
+            elif time.time() - last_sent >= JOB_EVENTS_KEEPALIVE_SECONDS:
+                # Comment line so proxies don't close an idle stream.
+                last_sent = time.time()
+                yield ": keepalive\n\n"
+            await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,145 @@
+from bisect import bisect_left, insort
+
+# Spotify accepts at most this many items per add/remove/replace request.
+MAX_ITEMS_PER_CALL = 100
+
+
+def replace_cost(desired_count: int) -> int:
+    """Write calls a full rewrite takes: one replace plus one add per further 100 tracks."""
+    return max(1, -(-desired_count // MAX_ITEMS_PER_CALL))
+
+
+def _longest_increasing_subsequence(values: list[int]) -> set[int]:
+    """Indices of one longest strictly increasing subsequence of ``values``."""
+    tails: list[int] = []
+    tail_indices: list[int] = []
+    previous = [-1] * len(values)
+    for i, value in enumerate(values):
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_indices.append(i)
+        else:
+            tails[k] = value
+            tail_indices[k] = i
+        previous[i] = tail_indices[k - 1] if k else -1
+
+    keep: set[int] = set()
+    i = tail_indices[-1] if tail_indices else -1
+    while i != -1:
+        keep.add(i)
+        i = previous[i]
+    return keep
+
+
+def plan_playlist_edits(current: list[str], desired: list[str]) -> list[dict] | None:
+    """Plan the fewest write calls that turn ``current`` into ``desired`` (track IDs, in order).
+
+    Returns ``None`` when a full replace would take fewer calls. Otherwise the
+    returned operations are, in order of execution:
+
+    * ``{"op": "remove", "items": [{"uri": id, "positions": [...]}, ...]}``: tracks
+      not wanted (and extra copies), removed from the bottom up so earlier positions
+      stay valid;
+    * ``{"op": "move", "range_start": i, "insert_before": j}``: tracks outside the
+      longest run already in the desired relative order, each moved once;
+    * ``{"op": "insert", "position": i, "items": [...]}``: new tracks, with
+      neighbouring ones batched into a single call.
+
+    Positions refer to the playlist as left by the preceding operations.
+    """
+    rank = {tid: i for i, tid in enumerate(desired)}
+    if len(rank) != len(desired):
+        return None
+
+    ops: list[dict] = []
+    working = list(current)
+    seen: set[str] = set()
+    drop: list[int] = []
+    for pos, tid in enumerate(working):
+        if tid not in rank or tid in seen:
+            drop.append(pos)
+        else:
+            seen.add(tid)
+    drop.reverse()
+    for i in range(0, len(drop), MAX_ITEMS_PER_CALL):
+        positions_by_id: dict[str, list[int]] = {}
+        for pos in drop[i : i + MAX_ITEMS_PER_CALL]:
+            positions_by_id.setdefault(working[pos], []).append(pos)
+        ops.append({"op": "remove", "items": [{"uri": t, "positions": p} for t, p in positions_by_id.items()]})
+        for pos in drop[i : i + MAX_ITEMS_PER_CALL]:
+            del working[pos]
+
+    stable = _longest_increasing_subsequence([rank[tid] for tid in working])
+    placed = sorted(rank[working[i]] for i in stable)
+    moves = [tid for i, tid in enumerate(working) if i not in stable]
+    missing = [tid for tid in desired if tid not in seen]
+    # Every move is one call and inserts need at least one call per 100 tracks.
+    if len(ops) + len(moves) + -(-len(missing) // MAX_ITEMS_PER_CALL) > replace_cost(len(desired)):
+        return None
+
+    last_successor: int | None = None
+    for tid in sorted(moves + missing, key=rank.__getitem__):
+        k = bisect_left(placed, rank[tid])
+        successor = placed[k] if k < len(placed) else None
+        last = ops[-1] if ops else None
+        if tid in seen:
+            before = working.index(desired[successor]) if successor is not None else len(working)
+            start = working.index(tid)
+            ops.append({"op": "move", "range_start": start, "insert_before": before})
+            del working[start]
+            working.insert(before - 1 if start < before else before, tid)
+        elif (
+            last
+            and last["op"] == "insert"
+            and last_successor == successor
+            and len(last["items"]) < MAX_ITEMS_PER_CALL
+        ):
+            # Nothing was placed between the previous new track and this one: same call.
+            working.insert(last["position"] + len(last["items"]), tid)
+            last["items"].append(tid)
+        else:
+            before = working.index(desired[successor]) if successor is not None else len(working)
+            ops.append({"op": "insert", "position": before, "items": [tid]})
+            working.insert(before, tid)
+        last_successor = successor
+        insort(placed, rank[tid])
+
+    if working != desired:
+        return None
+    if len(ops) > replace_cost(len(desired)):
+        return None
+    return ops
+
+
+def apply_playlist_edits(sp, playlist_id: str, ops: list[dict], call, snapshot_id: str | None = None) -> str | None:
+    """Run planned operations in order, each against the snapshot the previous one produced.
+
+    ``call(fn, *args, **kwargs)`` wraps every Spotify request (retry/rate limiting).
+    Returns the final snapshot ID.
+    """
+    for op in ops:
+        if op["op"] == "remove":
+            resp = call(
+                sp.playlist_remove_specific_occurrences_of_items, playlist_id, op["items"], snapshot_id=snapshot_id
+            )
+        elif op["op"] == "move":
+            resp = call(
+                sp.playlist_reorder_items,
+                playlist_id,
+                range_start=op["range_start"],
+                insert_before=op["insert_before"],
+                snapshot_id=snapshot_id,
+            )
+        else:
+            resp = call(sp.playlist_add_items, playlist_id, op["items"], position=op["position"])
+        snapshot_id = (resp or {}).get("snapshot_id") or snapshot_id
+    return snapshot_id
+
+
+def replace_playlist(sp, playlist_id: str, desired: list[str], call) -> str | None:
+    """Rewrite the whole playlist: replace with the first 100 tracks, then append the rest."""
+    resp = call(sp.playlist_replace_items, playlist_id, desired[:MAX_ITEMS_PER_CALL])
+    for i in range(MAX_ITEMS_PER_CALL, len(desired), MAX_ITEMS_PER_CALL):
+        resp = call(sp.playlist_add_items, playlist_id, desired[i : i + MAX_ITEMS_PER_CALL])
+    return (resp or {}).get("snapshot_id")
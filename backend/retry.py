@@ -0,0 +1,121 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import requests
+from spotipy.exceptions import SpotifyException
+
+# Statuses worth another attempt. spotipy also reports urllib3's exhausted retries
+# (of 5xx as well as 429 responses) as a 429 without any headers.
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+TRANSIENT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+DEFAULT_RETRY_AFTER_SECONDS = 2.0
+
+
+class RetryBudgetExceeded(Exception):
+    """Raised when a call still fails after its attempts, or its deadline, ran out."""
+
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Absolute time (time.time()) by which the current request must be answered, if any.
+_DEADLINE: ContextVar[float | None] = ContextVar("retry_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: float):
+    """Bound every retried call in this context to finish within ``seconds`` (nested deadlines only tighten)."""
+    current = _DEADLINE.get()
+    until = time.time() + seconds
+    token = _DEADLINE.set(until if current is None else min(current, until))
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def current_deadline() -> float | None:
+    return _DEADLINE.get()
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, SpotifyException):
+        return exc.http_status in RETRYABLE_STATUSES
+    return isinstance(exc, TRANSIENT_ERRORS)
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """Whether ``exc`` is Spotify asking us to slow down, rather than failing.
+
+    A 429 built from a real response carries its headers. The headerless 429
+    spotipy raises for urllib3's exhausted retries only counts when the responses
+    urllib3 gave up on were 429s too ("too many 429 error responses"); after a
+    run of 5xx it is an outage, not a rate limit.
+    """
+    if not isinstance(exc, SpotifyException) or exc.http_status != 429:
+        return False
+    return bool(exc.headers) or "429" in str(exc.reason or "")
+
+
+def retry_after_seconds(exc: BaseException) -> float | None:
+    """The server-requested wait for a rate limit, or ``None`` for any other error."""
+    if not is_rate_limited(exc):
+        return None
+    try:
+        return float((getattr(exc, "headers", None) or {}).get("Retry-After", DEFAULT_RETRY_AFTER_SECONDS))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER_SECONDS
+
+
+class RetryPolicy:
+    """Bounded retries with full-jitter exponential backoff.
+
+    Retryable errors (``is_retryable``) are tried again up to ``max_attempts``
+    calls in total; anything else is raised at once. A rate limit waits its
+    Retry-After instead of the backoff delay. No wait is started that would end past the
+    context's ``deadline``: the policy raises ``RetryBudgetExceeded`` right away,
+    so callers can fail fast or fall back to cached data.
+    """
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 8.0) -> None:
+        self.max_attempts = max(int(max_attempts), 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay_for(self, attempt: int, exc: BaseException) -> float:
+        retry_after = retry_after_seconds(exc)
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def run(self, fn, *args, on_retry=None, **kwargs):
+        """Call ``fn`` under this policy; ``on_retry(exc, attempt, wait)`` is told about each retry."""
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return fn(*args, **kwargs)
+            except Exception as exc:
+                if not is_retryable(exc):
+                    raise
+                wait = self.delay_for(attempt, exc)
+                if attempt >= self.max_attempts:
+                    raise RetryBudgetExceeded(
+                        f"Spotify call failed after {attempt} attempts: {exc}", retry_after_seconds(exc)
+                    ) from exc
+                until = current_deadline()
+                if until is not None and time.time() + wait > until:
+                    raise RetryBudgetExceeded(
+                        f"Spotify call could not be retried before the request deadline: {exc}",
+                        retry_after_seconds(exc),
+                    ) from exc
+                if on_retry:
+                    on_retry(exc, attempt, wait)
+                time.sleep(wait)
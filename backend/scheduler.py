@@ -0,0 +1,168 @@
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from .config import Settings
+from .db import get_last_job_params, init_db, list_token_user_ids, record_scheduler_run
+from .executors import workload
+from .fair_queue import FairQueue, flow
+from .governor import BULK, configure_governor
+from .jobs import JOB_KINDS, run_held_job
+from .spotify_auth import get_spotify_client_for_user
+
+# Automations the nightly pass repeats; archive-stale renames playlists, so it only
+# ever runs when a user asks for it.
+NIGHTLY_KINDS = ["vaulted", "liked"]
+# Access tokens are refreshed before each automation unless valid for at least this long.
+TOKEN_MARGIN_SECONDS = 15 * 60
+
+_RUN_LOCK = threading.Lock()
+# Worker ID the scheduler's job rows are held under.
+_WORKER_ID = f"scheduler:{socket.gethostname()}:{os.getpid()}"
+
+
+def _sync_user(settings: Settings, queue: FairQueue, user_id: str, weight: float) -> dict:
+    started = time.time()
+    automations = get_last_job_params(settings, user_id, NIGHTLY_KINDS)
+    outcome: dict = {"user_id": user_id, "ok": True, "weight": weight, "automations": []}
+    with workload(BULK), flow(queue, user_id, weight):
+        for kind in NIGHTLY_KINDS:
+            if kind not in automations:
+                continue
+            entry: dict = {"kind": kind}
+            outcome["automations"].append(entry)
+            run_started = time.time()
+
+            def run(progress, kind=kind):
+                ctx = get_spotify_client_for_user(settings, user_id, min_valid_seconds=TOKEN_MARGIN_SECONDS)
+                _, task = JOB_KINDS[kind]
+                return task(ctx, **automations[kind], progress=progress)
+
+            try:
+                # Runs as a job row so it and the user's own submits exclude each other.
+                job = run_held_job(settings, user_id, kind, automations[kind], _WORKER_ID, run)
+            except Exception as exc:
+                entry["ok"] = False
+                entry["error"] = str(exc)
+                outcome["ok"] = False
+            else:
+                if job is None:
+                    entry["skipped"] = "A run requested by the user is already queued or running."
+                    continue
+                entry["job_id"] = job["job_id"]
+                entry["result"] = job["result"]
+                entry["ok"] = True
+            entry["seconds"] = round(time.time() - run_started, 2)
+    outcome.update(queue.flow_stats(user_id))
+    outcome["seconds"] = round(time.time() - started, 2)
+    return outcome
+
+
+def run_nightly(settings: Settings, weights: dict[str, float] | None = None) -> dict:
+    """Run every stored user's automations once and return (and record) a throughput report.
+
+    A user's automations are the settings of their last successful vaulted and
+    liked runs; users who never ran one are visited but cost no calls. Up to
+    ``SCHEDULER_PARALLEL_USERS`` users sync at once and their Spotify calls share
+    ``SCHEDULER_CONCURRENCY`` slots through a weighted fair queue (equal weights
+    unless ``weights`` says otherwise), so a huge library takes longer without
+    holding up anyone else. Raises ``RuntimeError`` if a run is already in progress.
+    """
+    if not _RUN_LOCK.acquire(blocking=False):
+        raise RuntimeError("A scheduler run is already in progress.")
+    try:
+        return _run_locked(settings, weights)
+    finally:
+        _RUN_LOCK.release()
+
+
+def _run_locked(settings: Settings, weights: dict[str, float] | None) -> dict:
+    # The caller holds _RUN_LOCK.
+    run_id = uuid.uuid4().hex
+    started = time.time()
+    queue = FairQueue(settings.scheduler_concurrency)
+    user_ids = list_token_user_ids(settings)
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(settings.scheduler_parallel_users, len(user_ids) or 1)),
+        thread_name_prefix="scheduler",
+    ) as pool:
+        outcomes = list(
+            pool.map(
+                lambda user_id: _sync_user(settings, queue, user_id, (weights or {}).get(user_id, 1.0)),
+                user_ids,
+            )
+        )
+    finished = time.time()
+    report = _report(run_id, started, finished, queue.slots, outcomes)
+    record_scheduler_run(settings, run_id, started, finished, report)
+    return report
+
+
+def start_nightly(settings: Settings) -> bool:
+    """Run a nightly pass on a background thread; returns False if one is already running."""
+    # Taken here and handed to the thread, so two triggers can never both report a start.
+    if not _RUN_LOCK.acquire(blocking=False):
+        return False
+
+    def run() -> None:
+        try:
+            _run_locked(settings, None)
+        finally:
+            _RUN_LOCK.release()
+
+    try:
+        threading.Thread(target=run, name="scheduler-run", daemon=True).start()
+    except BaseException:
+        _RUN_LOCK.release()
+        raise
+    return True
+
+
+def scheduler_running() -> bool:
+    return _RUN_LOCK.locked()
+
+
+def _report(run_id: str, started: float, finished: float, slots: int, outcomes: list[dict]) -> dict:
+    seconds = max(finished - started, 1e-6)
+    calls = [o["calls"] for o in outcomes]
+    synced = [o for o in outcomes if o["automations"]]
+    return {
+        "run_id": run_id,
+        "started_at": started,
+        "finished_at": finished,
+        "seconds": round(seconds, 2),
+        "slots": slots,
+        "users": len(outcomes),
+        "users_synced": len(synced),
+        "users_failed": sum(1 for o in outcomes if not o["ok"]),
+        "users_per_hour": round(len(synced) * 3600 / seconds, 1),
+        "calls": sum(calls),
+        "calls_per_user": {
+            "mean": round(statistics.fmean(calls), 1) if calls else 0,
+            "median": statistics.median(calls) if calls else 0,
+            "max": max(calls, default=0),
+        },
+        "per_user": outcomes,
+    }
+
+
+def main() -> None:
+    load_dotenv("backend/.env")
+    settings = Settings()
+    settings.validate()
+    init_db(settings)
+    configure_governor(settings)
+    report = run_nightly(settings)
+    summary = {k: v for k, v in report.items() if k != "per_user"}
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
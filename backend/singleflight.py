@@ -0,0 +1,63 @@
+import threading
+import time
+
+from .retry import RetryBudgetExceeded, current_deadline
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight block until it finishes and receive the same result (or error).
+    Nothing is remembered once the call completes; pair with a cache for that.
+
+    Followers wait no longer than their own request ``deadline`` and then raise
+    ``RetryBudgetExceeded``. A leader's ``RetryBudgetExceeded`` is its own: it
+    ran out of its time, not theirs, so followers run the call again instead.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+
+    def do(self, key: str, fn, *args, **kwargs):
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = _Call()
+                    self._calls[key] = call
+            if leader:
+                break
+
+            until = current_deadline()
+            if not call.done.wait(None if until is None else max(0.0, until - time.time())):
+                raise RetryBudgetExceeded(f"Gave up waiting for an in-flight call ({key}) at the request deadline.")
+            if isinstance(call.error, RetryBudgetExceeded):
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
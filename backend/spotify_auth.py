@@ -1,11 +1,12 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from urllib.parse import urlencode
 
-import httpx
 import spotipy
 
 from .config import Settings
 from .db import get_tokens, is_expired, upsert_tokens
+from .http_pool import accounts_client, api_session
 
 
 AUTHORIZE_URL = "https://accounts.spotify.com/authorize"
@@ -22,6 +23,19 @@ SCOPES = (
 )
 
 
+@dataclass
+class SpotifyContext:
+    """A Spotify client bound to the user verified by the session token.
+
+    Carries the user ID and stored profile so tasks never need a ``/me`` round trip.
+    """
+
+    sp: spotipy.Spotify
+    user_id: str
+    profile: dict
+    settings: Settings
+
+
 def build_authorize_url(settings: Settings, state: str) -> str:
     params = {
         "client_id": settings.spotify_client_id,
@@ -35,7 +49,7 @@ def build_authorize_url(settings: Settings, state: str) -> str:
 
 
 def exchange_code_for_tokens(settings: Settings, code: str) -> dict:
-    resp = httpx.post(
+    resp = accounts_client(settings).post(
         TOKEN_URL,
         data={
             "grant_type": "authorization_code",
@@ -51,7 +65,7 @@ def exchange_code_for_tokens(settings: Settings, code: str) -> dict:
 
 
 def refresh_access_token(settings: Settings, refresh_token: str) -> dict:
-    resp = httpx.post(
+    resp = accounts_client(settings).post(
         TOKEN_URL,
         data={
             "grant_type": "refresh_token",
@@ -66,7 +80,7 @@ def refresh_access_token(settings: Settings, refresh_token: str) -> dict:
 
 
 def get_me(access_token: str) -> dict:
-    resp = httpx.get(ME_URL, headers={"Authorization": f"Bearer {access_token}"}, timeout=30.0)
+    resp = api_session().get(ME_URL, headers={"Authorization": f"Bearer {access_token}"}, timeout=30.0)
     resp.raise_for_status()
     return resp.json()
 
@@ -90,7 +104,10 @@ def store_login_tokens(settings: Settings, token_data: dict) -> dict:
     return {"spotify_user_id": spotify_user_id, "display_name": display_name}
 
 
-def get_spotify_client_for_user(settings: Settings, spotify_user_id: str) -> tuple[spotipy.Spotify, dict]:
+def get_spotify_client_for_user(
+    settings: Settings, spotify_user_id: str, min_valid_seconds: float = 0
+) -> SpotifyContext:
+    """Client for a stored user, refreshing the access token if it expires within ``min_valid_seconds``."""
     row = get_tokens(settings, spotify_user_id)
     if not row:
         raise ValueError("No stored Spotify tokens for user.")
@@ -99,7 +116,7 @@ def get_spotify_client_for_user(settings: Settings, spotify_user_id: str) -> tup
     refresh_token = row["refresh_token"]
     expires_at = row["expires_at"]
 
-    if is_expired(expires_at):
+    if is_expired(expires_at - timedelta(seconds=min_valid_seconds)):
         refreshed = refresh_access_token(settings, refresh_token)
         access_token = refreshed["access_token"]
         refresh_token = refreshed.get("refresh_token", refresh_token)
@@ -114,4 +131,9 @@ def get_spotify_client_for_user(settings: Settings, spotify_user_id: str) -> tup
             expires_at=new_expires_at,
         )
 
-    return spotipy.Spotify(auth=access_token), row
+    return SpotifyContext(
+        sp=spotipy.Spotify(auth=access_token, requests_session=api_session()),
+        user_id=row["spotify_user_id"],
+        profile={"id": row["spotify_user_id"], "display_name": row["display_name"] or row["spotify_user_id"]},
+        settings=settings,
+    )
@@ -1,62 +1,292 @@
+import math
+import random
+import threading
 import time
+import uuid
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
 import spotipy
 from spotipy.exceptions import SpotifyException
 
+from .budget import Budget, budget, budget_exhausted, charge_call
+from .cache import get_response_cache
+from .catalog import get_entities
+from .db import (
+    count_saved_tracks,
+    get_playlist_contents,
+    get_playlist_last_changes,
+    get_saved_tracks,
+    get_saved_tracks_state,
+    get_vaulted_state,
+    put_playlist_contents,
+    record_playlist_snapshots,
+    save_vaulted_state,
+)
+from .executors import ContextThreadPoolExecutor, current_workload
+from .fair_queue import current_slot
+from .governor import BULK, INTERACTIVE, get_governor
+from .library import ENTRY_FIELDS, entry_from_item, sync_saved_tracks
+from .playlist_edits import apply_playlist_edits, plan_playlist_edits, replace_cost, replace_playlist
+from .retry import RetryBudgetExceeded, RetryPolicy, current_deadline, is_rate_limited, retry_after_seconds
+from .singleflight import SingleFlight
+from .spotify_auth import SpotifyContext
+
 EXCLUDE_DESCRIPTION_FLAG = "-*"
 VAULTED_TAG = "[spotipy:vaulted_add]"
 LIKED_TAG = "[spotipy:liked_mirror]"
+# Source ID under which Liked Songs contribute to the vaulted membership counts.
+_VAULTED_LIKED_SOURCE = "liked"
 VALID_TIME_RANGES = {"short_term", "medium_term", "long_term"}
-_CACHE_TTL_SECONDS = 120
-_CACHE: dict[str, tuple[float, dict]] = {}
+# Upper bound on concurrent page requests issued by a single paginated fetch.
+_PAGE_WORKERS = 8
+# Entities a resumable scan looks up between budget checks (see _resumable_flight).
+_SCAN_CHUNK = 250
+# Albums per chunk of an artist catalog scan: one multi-album request.
+_ALBUM_SCAN_CHUNK = 20
+# Approximate genre breakdown: artists sampled across this many added_at strata, and
+# the library size (in artists) up to which the exact breakdown is run instead.
+_GENRE_SAMPLE_SIZE = 400
+_GENRE_SAMPLE_STRATA = 10
+_GENRE_EXACT_MAX_ARTISTS = 2 * _GENRE_SAMPLE_SIZE
+# Normal quantile for the 95% confidence intervals reported with estimates.
+_Z_95 = 1.96
+_FLIGHTS = SingleFlight()
+# Request handlers give up quickly (their deadline caps the waits too); jobs and nightly
+# syncs can afford to sit out a longer outage before the run fails.
+_RETRY_POLICIES = {
+    INTERACTIVE: RetryPolicy(max_attempts=4, base_delay=0.5, max_delay=4.0),
+    BULK: RetryPolicy(max_attempts=8, base_delay=1.0, max_delay=30.0),
+}
+# Background rebuilds of stale cache entries; one at a time per key (see _cached_flight).
+_REFRESH_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+_REFRESHING: set[str] = set()
+_REFRESHING_LOCK = threading.Lock()
+
+
+def _no_progress(phase: str, done: int = 0, total: int = 0) -> None:
+    pass
 
 
 def _backoff(call, *args, **kwargs):
-    delay = 1.0
-    while True:
+    # Every Spotify call takes a slot from the app-wide governor; a 429 is reported back so
+    # the governor pauses all callers for Retry-After instead of just this thread. Scheduled
+    # syncs first wait their turn on the fair queue (see fair_queue.flow), and bulk work
+    # yields to interactive requests at the governor (see executors.workload). Failures are
+    # retried under the workload's RetryPolicy, never past the request's deadline.
+    governor = get_governor()
+    priority = current_workload()
+
+    def attempt():
+        charge_call()
         try:
-            return call(*args, **kwargs)
-        except SpotifyException as exc:
-            if exc.http_status == 429:
-                retry_after = 2
+            with current_slot(), governor.permit(priority, current_deadline()) as permit:
                 try:
-                    retry_after = int(getattr(exc, "headers", {}).get("Retry-After", 2))
-                except Exception:
-                    pass
-                time.sleep(max(retry_after, 2))
-                continue
-            raise
+                    return call(*args, **kwargs)
+                except SpotifyException as exc:
+                    # Only a real rate limit slows the governor; 5xx outages just retry.
+                    if is_rate_limited(exc):
+                        permit.throttled(retry_after_seconds(exc))
+                    raise
+        except TimeoutError as exc:
+            # The governor would only admit this call after the request's deadline.
+            raise RetryBudgetExceeded(str(exc)) from exc
+
+    return _RETRY_POLICIES[priority].run(attempt)
+
+
+def _cached_flight(cache_key: str, build, *args, ttl=None, flight_key: str | None = None, **kwargs) -> dict:
+    """Serve ``cache_key`` from cache, or build it once for all concurrent callers.
+
+    ``ttl`` defaults to the key's namespace TTL; it may also be seconds, or a callable
+    taking the built payload and returning seconds. Callers whose builds differ for
+    the same ``cache_key`` pass a ``flight_key`` so they only share with their own kind. In namespaces with a stale window,
+    an expired entry is returned at once with ``stale``/``age_seconds`` set while a
+    single background rebuild refreshes it. If the build runs out of Spotify retries,
+    any expired copy still held is served the same way instead of the error.
+    """
+    cache = get_response_cache()
+    found = cache.lookup(cache_key)
+    if found:
+        cached, age, fresh = found
+        if fresh:
+            return cached
+        _schedule_refresh(cache_key, ttl, build, args, kwargs)
+        return _mark_stale(cached, age)
+
+    def lead() -> dict:
+        # A previous leader may have filled the cache between our miss and taking the flight.
+        cached = cache.get(cache_key)
+        if cached:
+            return cached
+        try:
+            payload = build(*args, **kwargs)
+        except RetryBudgetExceeded:
+            # Spotify is unreachable for now: an expired copy beats an error, if one is left.
+            fallback = cache.last_known(cache_key)
+            if fallback is None:
+                raise
+            return _mark_stale(*fallback)
+        return cache.set(cache_key, payload, ttl=ttl(payload) if callable(ttl) else ttl)
+
+    return _FLIGHTS.do(flight_key or cache_key, lead)
+
+
+def _mark_stale(value, age: float):
+    # Only dict payloads have room for the markers; lists (e.g. ``playlists:``) go out as they are.
+    if isinstance(value, dict):
+        return {**value, "stale": True, "age_seconds": int(age)}
+    return value
+
+
+def _schedule_refresh(cache_key: str, ttl, build, args: tuple, kwargs: dict) -> None:
+    with _REFRESHING_LOCK:
+        if cache_key in _REFRESHING:
+            return
+        _REFRESHING.add(cache_key)
+
+    def rebuild() -> dict:
+        payload = build(*args, **kwargs)
+        return get_response_cache().set(cache_key, payload, ttl=ttl(payload) if callable(ttl) else ttl)
+
+    def refresh() -> None:
+        try:
+            _FLIGHTS.do(cache_key, rebuild)
         except Exception:
-            time.sleep(delay)
-            delay = min(delay * 2, 16)
+            # The stale copy keeps being served; the next request past the TTL retries.
+            pass
+        finally:
+            with _REFRESHING_LOCK:
+                _REFRESHING.discard(cache_key)
 
+    _REFRESH_POOL.submit(refresh)
 
-def _cache_get(key: str) -> dict | None:
-    record = _CACHE.get(key)
-    if not record:
-        return None
-    expires_at, value = record
-    if time.time() > expires_at:
-        _CACHE.pop(key, None)
-        return None
-    return value
 
+class ContinuationExpired(ValueError):
+    """Raised for a continuation token that is unknown, expired or belongs to another scan."""
 
-def _cache_set(key: str, value: dict, ttl: int = _CACHE_TTL_SECONDS) -> dict:
-    _CACHE[key] = (time.time() + ttl, value)
-    return value
+
+class _Unfinished(Exception):
+    """Carries a partial payload out of its flight, so it reaches callers but is never cached."""
+
+    def __init__(self, payload: dict) -> None:
+        super().__init__("scan stopped early")
+        self.payload = payload
+
+
+def _resume_key(user_id: str, token: str) -> str:
+    return f"resume:{user_id}:{token}"
+
+
+def _resumable_flight(cache_key: str, step, ctx: SpotifyContext, *args, allowance: Budget | None = None,
+                      cursor: str | None = None) -> dict:
+    """Serve ``cache_key`` like ``_cached_flight``, but let the build stop once ``allowance`` is spent.
+
+    ``step(ctx, *args, state)`` starts the scan when ``state`` is None, checks
+    ``budget_exhausted()`` between chunks and returns ``(payload, state)``, with
+    ``state`` None once the scan is done. A scan that stops early is returned with
+    ``complete: false`` and a ``continuation`` token under which its state is kept;
+    passing the token back as ``cursor`` resumes the scan instead of restarting it.
+    Only complete payloads are cached, and background refreshes always run to the end.
+
+    Callers only share a build with others passing the same ``cursor`` and
+    allowance; an unbudgeted call from the start shares with background refreshes.
+    """
+    cache = get_response_cache()
+    state = None
+    if cursor:
+        saved = cache.get(_resume_key(ctx.user_id, cursor))
+        if not saved or saved.get("cache_key") != cache_key:
+            raise ContinuationExpired("Unknown or expired continuation token.")
+        state = saved["state"]
+
+    def build() -> dict:
+        try:
+            payload, rest = step(ctx, *args, state)
+        except _LibraryLoading:
+            # Liked Songs are still loading (resumably); the scan picks up from the same state after.
+            payload, rest = {"loading": "liked_songs"}, state
+        else:
+            if rest is None:
+                return {**payload, "complete": True, "continuation": None}
+        token = uuid.uuid4().hex
+        cache.set(_resume_key(ctx.user_id, token), {"cache_key": cache_key, "state": rest})
+        raise _Unfinished({**payload, "complete": False, "continuation": token})
+
+    flight_key = cache_key
+    if cursor or allowance is not None:
+        limits = "none" if allowance is None else f"{allowance.seconds}s/{allowance.calls}calls"
+        flight_key = f"{cache_key}:{cursor or 'start'}:{limits}"
+    with budget(allowance):
+        try:
+            return _cached_flight(cache_key, build, flight_key=flight_key)
+        except _Unfinished as unfinished:
+            return unfinished.payload
+
+
+def _paginate(call, *args, page_size: int, **kwargs) -> list[dict]:
+    """Fetch every item of an offset-paginated endpoint.
+
+    The first page reveals ``total``; the remaining offsets are then fetched
+    concurrently (bounded by ``_PAGE_WORKERS``) and reassembled in order.
+    """
+    first = _backoff(call, *args, limit=page_size, offset=0, **kwargs) or {}
+    items = list(first.get("items") or [])
+    total = int(first.get("total") or 0)
+    offsets = list(range(page_size, total, page_size))
+    if not offsets:
+        return items
+
+    def fetch(offset: int) -> list[dict]:
+        page = _backoff(call, *args, limit=page_size, offset=offset, **kwargs) or {}
+        return page.get("items") or []
+
+    with ContextThreadPoolExecutor(max_workers=min(_PAGE_WORKERS, len(offsets))) as pool:
+        for page_items in pool.map(fetch, offsets):
+            items.extend(page_items)
+    return items
+
+
+def _all_user_playlists(ctx: SpotifyContext, fresh: bool = False) -> list[dict]:
+    """The user's playlists, cached briefly for read-only views.
+
+    Runs that modify playlists pass ``fresh=True`` and call ``_forget_playlists``
+    afterwards, so they never act on, or leave behind, an outdated listing. Every
+    listing also appends the owned playlists' snapshots to ``playlist_snapshots``,
+    the history freshness reads last-change times from.
+    """
+    def fetch() -> list[dict]:
+        playlists = [p for p in _paginate(ctx.sp.current_user_playlists, page_size=50) if p]
+        record_playlist_snapshots(
+            ctx.settings,
+            [
+                (p["id"], p["snapshot_id"], int((p.get("tracks") or {}).get("total") or 0))
+                for p in playlists
+                if p.get("id") and p.get("snapshot_id") and (p.get("owner") or {}).get("id") == ctx.user_id
+            ],
+            time.time(),
+        )
+        return playlists
+
+    if fresh:
+        return fetch()
+    return _cached_flight(f"playlists:{ctx.user_id}", fetch)
 
 
-def _all_user_playlists(sp: spotipy.Spotify) -> list[dict]:
-    playlists = []
-    response = _backoff(sp.current_user_playlists, limit=50)
-    while response:
-        playlists.extend(response.get("items", []))
-        response = _backoff(sp.next, response) if response.get("next") else None
-    return playlists
+def _forget_playlists(user_id: str) -> None:
+    get_response_cache().invalidate(f"playlists:{user_id}")
+
+
+def _top_tracks(sp: spotipy.Spotify, user_id: str, time_range: str, limit: int) -> dict:
+    return _FLIGHTS.do(
+        f"top_tracks:{user_id}:{time_range}:{limit}",
+        _backoff,
+        sp.current_user_top_tracks,
+        time_range=time_range,
+        limit=limit,
+    )
 
 
 def _find_playlist_by_tag(playlists: list[dict], user_id: str, tag: str) -> dict | None:
@@ -125,77 +355,172 @@ def _ensure_playlist_tag(sp: spotipy.Spotify, playlist: dict, tag: str) -> None:
     _backoff(sp.playlist_change_details, playlist["id"], description=new_description)
 
 
-def _playlist_track_ids(sp: spotipy.Spotify, playlist_id: str) -> list[str]:
-    tracks: list[str] = []
-    results = _backoff(sp.playlist_tracks, playlist_id, fields="items(track.id),next", limit=100)
-    while results:
-        for item in results.get("items", []):
-            track = item.get("track") or {}
-            tid = track.get("id")
-            if tid:
-                tracks.append(tid)
-        results = _backoff(sp.next, results) if results.get("next") else None
-    return tracks
-
-
-def _liked_track_ids(sp: spotipy.Spotify) -> list[str]:
-    liked: list[str] = []
-    results = _backoff(sp.current_user_saved_tracks, limit=50)
-    while results:
-        for item in results.get("items", []):
-            track = item.get("track") or {}
-            tid = track.get("id")
-            if tid:
-                liked.append(tid)
-        results = _backoff(sp.next, results) if results.get("next") else None
-    return liked
+def _fetch_playlist_entries(sp: spotipy.Spotify, playlist_id: str) -> list[list]:
+    items = _paginate(sp.playlist_tracks, playlist_id, fields=ENTRY_FIELDS, page_size=100)
+    return [entry for entry in map(entry_from_item, items) if entry]
+
+
+def _playlist_entries(ctx: SpotifyContext, playlists: list[dict], on_read=None) -> dict[str, list[list]]:
+    """Map playlist ID to its track records (see ``library.entry_from_item``).
+
+    Contents are persisted per ``snapshot_id``, so only playlists that changed since
+    the last read cost any track-page calls. ``on_read(done, total)`` is called as
+    each playlist is resolved.
+    """
+    snapshots = {p["id"]: p.get("snapshot_id") or "" for p in playlists if p.get("id")}
+    entries = get_playlist_contents(ctx.settings, snapshots)
+    done = len(entries)
+    for playlist_id, snapshot_id in snapshots.items():
+        if playlist_id in entries:
+            continue
+        entries[playlist_id] = _fetch_playlist_entries(ctx.sp, playlist_id)
+        if snapshot_id:
+            put_playlist_contents(ctx.settings, playlist_id, snapshot_id, entries[playlist_id])
+        done += 1
+        if on_read:
+            on_read(done, len(snapshots))
+    return entries
+
+
+def _sync_liked(ctx: SpotifyContext) -> dict:
+    """Bring the user's ``saved_tracks`` mirror up to date (usually a single page call).
+
+    A full load stops early only once the current scan budget is spent; a caller
+    that joined someone else's budgeted load just carries it on.
+    """
+    def fetch_page(offset: int, limit: int) -> dict:
+        return _backoff(ctx.sp.current_user_saved_tracks, limit=limit, offset=offset)
+
+    while True:
+        result = _FLIGHTS.do(f"saved_tracks:{ctx.user_id}", sync_saved_tracks, ctx.settings, ctx.user_id, fetch_page)
+        if result["complete"] or budget_exhausted():
+            return result
+
+
+class _LibraryLoading(Exception):
+    """Raised when the scan budget runs out before a full Liked Songs load is in."""
+
+
+def _liked_entries(ctx: SpotifyContext) -> list[list]:
+    if not _sync_liked(ctx)["complete"]:
+        raise _LibraryLoading(ctx.user_id)
+    return get_saved_tracks(ctx.settings, ctx.user_id)
 
 
-def _library_track_source(sp: spotipy.Spotify, user_id: str) -> dict:
-    cache_key = f"library_source:{user_id}"
-    cached = _cache_get(cache_key)
-    if cached:
-        return cached
+def _liked_track_ids(ctx: SpotifyContext) -> list[str]:
+    return [entry[0] for entry in _liked_entries(ctx)]
 
-    playlists = _all_user_playlists(sp)
+
+def _fetch_albums(sp: spotipy.Spotify, album_ids: list[str]) -> list[dict]:
+    """Multi-album fetch with each album's embedded track page completed.
+
+    ``sp.albums`` embeds only the first 50 tracks; longer albums get their
+    remaining pages fetched concurrently and spliced in, so stored album
+    entities always carry the full tracklist.
+    """
+    albums = [a for a in ((_backoff(sp.albums, album_ids) or {}).get("albums") or []) if a]
+    tail_pages = []
+    for album in albums:
+        tracks = album.get("tracks") or {}
+        fetched = len(tracks.get("items") or [])
+        tail_pages.extend((album, offset) for offset in range(fetched, int(tracks.get("total") or 0), 50))
+    if not tail_pages:
+        return albums
+
+    def fetch(job: tuple[dict, int]) -> list[dict]:
+        album, offset = job
+        page = _backoff(sp.album_tracks, album["id"], limit=50, offset=offset) or {}
+        return page.get("items") or []
+
+    with ContextThreadPoolExecutor(max_workers=min(_PAGE_WORKERS, len(tail_pages))) as pool:
+        for (album, _), items in zip(tail_pages, pool.map(fetch, tail_pages)):
+            album["tracks"]["items"].extend(items)
+    return albums
+
+
+def _catalog_entities(ctx: SpotifyContext, kind: str, entity_ids) -> dict[str, dict]:
+    sp = ctx.sp
+    fetchers = {
+        "artist": lambda batch: (_backoff(sp.artists, batch) or {}).get("artists") or [],
+        "album": lambda batch: _fetch_albums(sp, batch),
+        "track": lambda batch: (_backoff(sp.tracks, batch) or {}).get("tracks") or [],
+    }
+    return get_entities(ctx.settings, kind, entity_ids, fetchers[kind])
+
+
+def _library_track_source(ctx: SpotifyContext) -> dict:
+    while True:
+        try:
+            return _cached_flight(f"library_source:{ctx.user_id}", _build_library_track_source, ctx)
+        except _LibraryLoading:
+            # Only give up on our own budget, not on that of a leader we followed.
+            if budget_exhausted():
+                raise
+
+
+def _build_library_track_source(ctx: SpotifyContext) -> dict:
+    user_id = ctx.user_id
+    playlists = _all_user_playlists(ctx)
     vaulted = _find_vaulted_playlist(playlists, user_id)
 
     if vaulted:
-        track_ids = _playlist_track_ids(sp, vaulted["id"])
-        payload = {
+        entries = _playlist_entries(ctx, [vaulted]).get(vaulted["id"], [])
+        return {
             "source": "vaulted_playlist",
             "source_playlist_id": vaulted.get("id"),
             "source_playlist_name": vaulted.get("name") or "_vaulted",
-            "track_ids": track_ids,
+            "track_ids": [entry[0] for entry in entries],
+            "tracks": entries,
         }
-        return _cache_set(cache_key, payload, ttl=180)
 
-    payload = {
+    entries = _liked_entries(ctx)
+    return {
         "source": "liked_songs",
         "source_playlist_id": None,
         "source_playlist_name": None,
-        "track_ids": _liked_track_ids(sp),
+        "track_ids": [entry[0] for entry in entries],
+        "tracks": entries,
     }
-    return _cache_set(cache_key, payload, ttl=180)
 
 
-def _playlist_last_added_at(sp: spotipy.Spotify, playlist_id: str, max_scan: int = 300) -> datetime | None:
+def _playlist_last_added_at(sp: spotipy.Spotify, playlist: dict) -> datetime | None:
+    """Newest ``added_at`` on the playlist's last page, memoized per snapshot.
+
+    Tracks are nearly always appended, so the newest addition sits on the tail
+    page: one read at ``total - 100`` (``total`` from the playlist listing) stands
+    in for a scan from the top. A snapshot never changes, so a memoized answer
+    makes repeat visits to an unchanged playlist free.
+    """
+    playlist_id = playlist["id"]
+    snapshot_id = playlist.get("snapshot_id") or ""
+    cache = get_response_cache()
+    memo_key = f"playlist_added:{playlist_id}:{snapshot_id}"
+    if snapshot_id:
+        memo = cache.get(memo_key)
+        if memo is not None:
+            return _parse_spotify_date(memo["last_added_at"] or "")
+
     latest: datetime | None = None
-    scanned = 0
-    results = _backoff(sp.playlist_tracks, playlist_id, fields="items(added_at),next", limit=100)
-    while results and scanned < max_scan:
-        for item in (results.get("items") or []):
+    total = int(((playlist.get("tracks") or {}).get("total") or 0))
+    if total:
+        page = _backoff(
+            sp.playlist_tracks, playlist_id, fields="items(added_at)", limit=100, offset=max(0, total - 100)
+        ) or {}
+        for item in (page.get("items") or []):
             dt = _parse_spotify_date((item or {}).get("added_at") or "")
-            if not dt:
-                continue
-            scanned += 1
-            if not latest or dt > latest:
+            if dt and (not latest or dt > latest):
                 latest = dt
-            if scanned >= max_scan:
-                break
-        if scanned >= max_scan or not results.get("next"):
-            break
-        results = _backoff(sp.next, results)
+    if snapshot_id:
+        cache.set(memo_key, {"last_added_at": latest.isoformat() if latest else None})
+    return latest
+
+
+def _latest_added_at(entries: list[list]) -> datetime | None:
+    latest: datetime | None = None
+    for entry in entries:
+        dt = _parse_spotify_date(entry[1])
+        if dt and (not latest or dt > latest):
+            latest = dt
     return latest
 
 
@@ -214,9 +539,9 @@ def _parse_spotify_date(s: str) -> datetime | None:
         return None
 
 
-def _fetch_top_lists(sp: spotipy.Spotify, time_range: str, limit: int = 25) -> dict:
+def _fetch_top_lists(sp: spotipy.Spotify, user_id: str, time_range: str, limit: int = 25) -> dict:
     top_artists_resp = _backoff(sp.current_user_top_artists, time_range=time_range, limit=limit)
-    top_tracks_resp = _backoff(sp.current_user_top_tracks, time_range=time_range, limit=limit)
+    top_tracks_resp = _top_tracks(sp, user_id, time_range, limit)
 
     top_artists = []
     for artist in top_artists_resp.get("items", []):
@@ -251,58 +576,28 @@ def _fetch_top_lists(sp: spotipy.Spotify, time_range: str, limit: int = 25) -> d
     return {"top_artists": top_artists, "top_tracks": top_tracks}
 
 
-def get_dashboard_overview(sp: spotipy.Spotify, time_range: str = "short_term") -> dict:
+def get_dashboard_overview(ctx: SpotifyContext, time_range: str = "short_term") -> dict:
     if time_range not in VALID_TIME_RANGES:
         time_range = "short_term"
 
-    me = _backoff(sp.me)
-    user_id = me["id"]
-    cache_key = f"overview:{user_id}:{time_range}"
-    cached = _cache_get(cache_key)
-    if cached:
-        return cached
+    user_id = ctx.user_id
+    return _cached_flight(f"overview:{user_id}:{time_range}", _build_dashboard_overview, ctx, time_range)
+
 
+def _build_dashboard_overview(ctx: SpotifyContext, time_range: str) -> dict:
+    user_id = ctx.user_id
     # Playlist totals and owned count.
-    playlists_total = 0
-    playlists_owned = 0
-    playlist_resp = _backoff(sp.current_user_playlists, limit=50, offset=0)
-    playlists_total = int(playlist_resp.get("total", 0))
-    while playlist_resp:
-        for pl in playlist_resp.get("items", []):
-            if (pl.get("owner") or {}).get("id") == user_id:
-                playlists_owned += 1
-        if playlist_resp.get("next"):
-            playlist_resp = _backoff(sp.next, playlist_resp)
-        else:
-            break
+    playlists = _all_user_playlists(ctx)
+    playlists_total = len(playlists)
+    playlists_owned = sum(1 for pl in playlists if (pl.get("owner") or {}).get("id") == user_id)
 
-    # Saved tracks total and recent adds (7d/30d), scanning newest-first until older than 30d.
-    saved_resp = _backoff(sp.current_user_saved_tracks, limit=50, offset=0)
-    saved_total = int(saved_resp.get("total", 0))
+    # Saved tracks total and recent adds (7d/30d), counted from the synced mirror.
+    saved_total = _sync_liked(ctx)["total"]
     now = datetime.now(timezone.utc)
-    cut_7 = now - timedelta(days=7)
-    cut_30 = now - timedelta(days=30)
-    added_7d = 0
-    added_30d = 0
-    while saved_resp:
-        items = saved_resp.get("items", [])
-        stop = False
-        for item in items:
-            dt = _parse_spotify_date(item.get("added_at") or "")
-            if not dt:
-                continue
-            if dt >= cut_30:
-                added_30d += 1
-                if dt >= cut_7:
-                    added_7d += 1
-            else:
-                stop = True
-                break
-        if stop or not saved_resp.get("next"):
-            break
-        saved_resp = _backoff(sp.next, saved_resp)
+    added_7d = count_saved_tracks(ctx.settings, user_id, (now - timedelta(days=7)).strftime("%Y-%m-%dT%H:%M:%SZ"))
+    added_30d = count_saved_tracks(ctx.settings, user_id, (now - timedelta(days=30)).strftime("%Y-%m-%dT%H:%M:%SZ"))
 
-    payload = {
+    return {
         "time_range": time_range,
         "counts": {
             "playlists_total": playlists_total,
@@ -315,36 +610,33 @@ def get_dashboard_overview(sp: spotipy.Spotify, time_range: str = "short_term")
         "top_artists": [],
         "top_tracks": [],
     }
-    return _cache_set(cache_key, payload)
 
 
-def get_top_lists(sp: spotipy.Spotify, time_range: str = "short_term") -> dict:
+def get_top_lists(ctx: SpotifyContext, time_range: str = "short_term") -> dict:
     if time_range not in VALID_TIME_RANGES:
         time_range = "short_term"
-    me = _backoff(sp.me)
-    user_id = me["id"]
-    cache_key = f"top_lists:{user_id}:{time_range}"
-    cached = _cache_get(cache_key)
-    if cached:
-        return cached
-    payload = {"time_range": time_range, **_fetch_top_lists(sp, time_range=time_range, limit=25)}
-    return _cache_set(cache_key, payload)
-
-
-def get_track_longevity(sp: spotipy.Spotify) -> dict:
-    me = _backoff(sp.me)
-    user_id = me["id"]
-    cache_key = f"track_longevity:{user_id}"
-    cached = _cache_get(cache_key)
-    if cached:
-        return cached
+    sp = ctx.sp
+    user_id = ctx.user_id
+    return _cached_flight(f"top_lists:{user_id}:{time_range}", _build_top_lists, sp, user_id, time_range)
+
 
+def _build_top_lists(sp: spotipy.Spotify, user_id: str, time_range: str) -> dict:
+    return {"time_range": time_range, **_fetch_top_lists(sp, user_id, time_range=time_range, limit=25)}
+
+
+def get_track_longevity(ctx: SpotifyContext) -> dict:
+    sp = ctx.sp
+    user_id = ctx.user_id
+    return _cached_flight(f"track_longevity:{user_id}", _build_track_longevity, sp, user_id)
+
+
+def _build_track_longevity(sp: spotipy.Spotify, user_id: str) -> dict:
     ranges = ("short_term", "medium_term", "long_term")
     weights = {"short_term": 1.0, "medium_term": 1.2, "long_term": 1.4}
     tracks_by_id: dict[str, dict] = {}
 
     for time_range in ranges:
-        resp = _backoff(sp.current_user_top_tracks, time_range=time_range, limit=50)
+        resp = _top_tracks(sp, user_id, time_range, 50)
         for idx, track in enumerate(resp.get("items", []) or [], start=1):
             tid = track.get("id")
             if not tid:
@@ -390,7 +682,7 @@ def get_track_longevity(sp: spotipy.Spotify) -> dict:
     # Prefer tracks appearing in multiple windows, then highest score.
     items.sort(key=lambda x: (x["overlap_count"], x["longevity_score"]), reverse=True)
 
-    payload = {
+    return {
         "tracks": items[:25],
         "scoring": {
             "base_per_range": 100,
@@ -398,19 +690,17 @@ def get_track_longevity(sp: spotipy.Spotify) -> dict:
             "weights": weights,
         },
     }
-    return _cache_set(cache_key, payload, ttl=300)
 
 
-def get_genre_playlist_recommendations(sp: spotipy.Spotify, time_range: str = "medium_term") -> dict:
+def get_genre_playlist_recommendations(ctx: SpotifyContext, time_range: str = "medium_term") -> dict:
     if time_range not in VALID_TIME_RANGES:
         time_range = "medium_term"
-    me = _backoff(sp.me)
-    user_id = me["id"]
-    cache_key = f"genre_recs:{user_id}:{time_range}"
-    cached = _cache_get(cache_key)
-    if cached:
-        return cached
+    sp = ctx.sp
+    user_id = ctx.user_id
+    return _cached_flight(f"genre_recs:{user_id}:{time_range}", _build_genre_playlist_recommendations, sp, time_range)
 
+
+def _build_genre_playlist_recommendations(sp: spotipy.Spotify, time_range: str) -> dict:
     top_artists_resp = _backoff(sp.current_user_top_artists, time_range=time_range, limit=30)
     artists = top_artists_resp.get("items", [])
 
@@ -456,18 +746,16 @@ def get_genre_playlist_recommendations(sp: spotipy.Spotify, time_range: str = "m
 
         recommendations.append({"genre": genre, "playlists": picks})
 
-    payload = {"time_range": time_range, "genres": top_genres, "recommendations": recommendations}
-    return _cache_set(cache_key, payload)
+    return {"time_range": time_range, "genres": top_genres, "recommendations": recommendations}
+
 
+def get_recently_played(ctx: SpotifyContext) -> dict:
+    sp = ctx.sp
+    user_id = ctx.user_id
+    return _cached_flight(f"recently_played:{user_id}", _build_recently_played, sp)
 
-def get_recently_played(sp: spotipy.Spotify) -> dict:
-    me = _backoff(sp.me)
-    user_id = me["id"]
-    cache_key = f"recently_played:{user_id}"
-    cached = _cache_get(cache_key)
-    if cached:
-        return cached
 
+def _build_recently_played(sp: spotipy.Spotify) -> dict:
     results = _backoff(sp.current_user_recently_played, limit=50)
     items = (results or {}).get("items") or []
     tracks = []
@@ -492,18 +780,16 @@ def get_recently_played(sp: spotipy.Spotify) -> dict:
             "played_at": item.get("played_at") or "",
         })
 
-    payload = {"tracks": tracks}
-    return _cache_set(cache_key, payload, ttl=60)
+    return {"tracks": tracks}
+
 
+def get_listening_pattern(ctx: SpotifyContext) -> dict:
+    sp = ctx.sp
+    user_id = ctx.user_id
+    return _cached_flight(f"listening_pattern:{user_id}", _build_listening_pattern, sp)
 
-def get_listening_pattern(sp: spotipy.Spotify) -> dict:
-    me = _backoff(sp.me)
-    user_id = me["id"]
-    cache_key = f"listening_pattern:{user_id}"
-    cached = _cache_get(cache_key)
-    if cached:
-        return cached
 
+def _build_listening_pattern(sp: spotipy.Spotify) -> dict:
     # Primary source: recently played (requires user-read-recently-played scope).
     items = []
     source = "recently_played"
@@ -558,7 +844,7 @@ def get_listening_pattern(sp: spotipy.Spotify) -> dict:
     max_cell = max((value for row in grid for value in row), default=0)
     has_enough_data = total_events >= 20
 
-    payload = {
+    return {
         "source": source,
         "note": note,
         "timezone": "America/New_York",
@@ -569,13 +855,12 @@ def get_listening_pattern(sp: spotipy.Spotify) -> dict:
         "hours": list(range(24)),
         "grid": grid,
     }
-    return _cache_set(cache_key, payload, ttl=120)
 
 
-def search_artists(sp: spotipy.Spotify, query: str, limit: int = 6) -> dict:
+def search_artists(ctx: SpotifyContext, query: str, limit: int = 6) -> dict:
     if not (query or "").strip():
         return {"artists": []}
-    result = _backoff(sp.search, q=query.strip(), type="artist", limit=limit)
+    result = _backoff(ctx.sp.search, q=query.strip(), type="artist", limit=limit)
     artists = []
     for artist in (((result or {}).get("artists") or {}).get("items") or []):
         if not artist:
@@ -592,148 +877,301 @@ def search_artists(sp: spotipy.Spotify, query: str, limit: int = 6) -> dict:
     return {"artists": artists}
 
 
-def get_artist_catalog_depth(sp: spotipy.Spotify, artist_id: str) -> dict:
-    me = _backoff(sp.me)
-    user_id = me["id"]
-    cache_key = f"catalog:{user_id}:{artist_id}"
-    cached = _cache_get(cache_key)
-    if cached:
-        return cached
+def get_artist_catalog_depth(
+    ctx: SpotifyContext, artist_id: str, allowance: Budget | None = None, cursor: str | None = None
+) -> dict:
+    user_id = ctx.user_id
+    return _resumable_flight(
+        f"catalog:{user_id}:{artist_id}", _build_artist_catalog_depth, ctx, artist_id,
+        allowance=allowance, cursor=cursor,
+    )
 
-    artist_info = _backoff(sp.artist, artist_id) or {}
-    artist_name = artist_info.get("name") or ""
 
-    library = _library_track_source(sp, user_id)
+def _build_artist_catalog_depth(ctx: SpotifyContext, artist_id: str, state: dict | None) -> tuple[dict, dict | None]:
+    sp = ctx.sp
+    library = _library_track_source(ctx)
     library_track_ids = set(library.get("track_ids") or [])
-
-    albums_resp = _backoff(sp.artist_albums, artist_id, album_type="album", limit=50, country="US")
-    all_albums = []
-    while albums_resp:
-        all_albums.extend((albums_resp or {}).get("items") or [])
-        albums_resp = _backoff(sp.next, albums_resp) if (albums_resp or {}).get("next") else None
-
-    seen_names: set[str] = set()
-    unique_albums = []
-    for album in all_albums:
-        if not album:
-            continue
-        name = (album.get("name") or "").strip().lower()
-        if name in seen_names:
-            continue
-        seen_names.add(name)
-        images = album.get("images") or []
-        image_url = images[0]["url"] if images else None
-        unique_albums.append({
-            "id": album["id"],
-            "name": album.get("name") or "",
-            "year": (album.get("release_date") or "")[:4],
-            "total_tracks": 0,
-            "image_url": image_url,
-            "saved_tracks": 0,
-            "saved": False,
-        })
-
-    unique_albums.sort(key=lambda a: a["year"], reverse=True)
-
-    total_albums = len(unique_albums)
-    saved_albums_count = 0
-    total_tracks = 0
-    saved_tracks_est = 0
-
-    for album in unique_albums:
-        tracks_resp = _backoff(sp.album_tracks, album["id"], limit=50)
-        album_track_ids: list[str] = []
-        while tracks_resp:
-            for track in (tracks_resp.get("items") or []):
-                tid = (track or {}).get("id")
-                if tid:
-                    album_track_ids.append(tid)
-            tracks_resp = _backoff(sp.next, tracks_resp) if tracks_resp.get("next") else None
-
-        album_total = len(album_track_ids)
-        album_saved = sum(1 for tid in album_track_ids if tid in library_track_ids)
-        album["total_tracks"] = album_total
-        album["saved_tracks"] = album_saved
-        album["saved"] = album_saved > 0
-
-        total_tracks += album_total
-        saved_tracks_est += album_saved
-        if album["saved"]:
-            saved_albums_count += 1
-
+    # Saved counts come straight from the library records' album IDs; only records
+    # persisted before album IDs were kept force the per-album track walk.
+    entries = library.get("tracks") or []
+    count_by_album_id = all(len(entry) > 3 and entry[3] for entry in entries)
+    saved_ids_by_album: dict[str, set[str]] = defaultdict(set)
+    if count_by_album_id:
+        for entry in entries:
+            saved_ids_by_album[entry[3]].add(entry[0])
+
+    if state is None:
+        artist_info = _catalog_entities(ctx, "artist", [artist_id]).get(artist_id) or {}
+        all_albums = _paginate(sp.artist_albums, artist_id, include_groups="album", country="US", page_size=50)
+
+        seen_names: set[str] = set()
+        unique_albums = []
+        for album in all_albums:
+            if not album:
+                continue
+            name = (album.get("name") or "").strip().lower()
+            if name in seen_names:
+                continue
+            seen_names.add(name)
+            images = album.get("images") or []
+            image_url = images[0]["url"] if images else None
+            unique_albums.append({
+                "id": album["id"],
+                "name": album.get("name") or "",
+                "year": (album.get("release_date") or "")[:4],
+                "total_tracks": int(album.get("total_tracks") or 0),
+                "image_url": image_url,
+                "saved_tracks": 0,
+                "saved": False,
+            })
+
+        unique_albums.sort(key=lambda a: a["year"], reverse=True)
+        state = {"artist_name": artist_info.get("name") or "", "albums": unique_albums, "albums_done": 0}
+
+    albums = state["albums"]
+    progressed = False
+    while state["albums_done"] < len(albums):
+        if progressed and budget_exhausted():
+            return _artist_catalog_payload(artist_id, library, state), state
+        batch = albums[state["albums_done"]:state["albums_done"] + _ALBUM_SCAN_CHUNK]
+        album_entities: dict[str, dict] = {}
+        if not count_by_album_id:
+            album_entities = _catalog_entities(ctx, "album", [album["id"] for album in batch])
+
+        for album in batch:
+            if count_by_album_id:
+                album_total = album["total_tracks"]
+                album_saved = len(saved_ids_by_album.get(album["id"], ()))
+            else:
+                album_tracks = ((album_entities.get(album["id"]) or {}).get("tracks") or {}).get("items") or []
+                album_track_ids = [t["id"] for t in album_tracks if t and t.get("id")]
+                album_total = len(album_track_ids)
+                album_saved = sum(1 for tid in album_track_ids if tid in library_track_ids)
+
+            album["total_tracks"] = album_total
+            album["saved_tracks"] = album_saved
+            album["saved"] = album_saved > 0
+        state["albums_done"] += len(batch)
+        progressed = True
+    return _artist_catalog_payload(artist_id, library, state), None
+
+
+def _artist_catalog_payload(artist_id: str, library: dict, state: dict) -> dict:
+    # Until the scan completes, totals cover the albums counted so far.
+    scanned = state["albums"][:state["albums_done"]]
+    total_tracks = sum(album["total_tracks"] for album in scanned)
+    saved_tracks_est = sum(album["saved_tracks"] for album in scanned)
     pct = round(saved_tracks_est / total_tracks * 100, 1) if total_tracks else 0.0
 
-    payload = {
+    return {
         "artist_id": artist_id,
-        "artist_name": artist_name,
+        "artist_name": state["artist_name"],
         "source": library["source"],
         "source_playlist_id": library.get("source_playlist_id"),
         "source_playlist_name": library.get("source_playlist_name"),
-        "total_albums": total_albums,
-        "saved_albums": saved_albums_count,
+        "total_albums": len(state["albums"]),
+        "albums_scanned": len(scanned),
+        "saved_albums": sum(1 for album in scanned if album["saved"]),
         "total_tracks": total_tracks,
         "saved_tracks_est": saved_tracks_est,
         "pct": pct,
-        "albums": unique_albums,
+        "albums": scanned,
     }
-    return _cache_set(cache_key, payload, ttl=300)
-
-
-def get_genre_breakdown(sp: spotipy.Spotify) -> dict:
-    me = _backoff(sp.me)
-    user_id = me["id"]
-    cache_key = f"genre_breakdown:{user_id}"
-    cached = _cache_get(cache_key)
-    if cached:
-        return cached
-
-    library = _library_track_source(sp, user_id)
-    source_track_ids = [tid for tid in (library.get("track_ids") or []) if tid]
-    scanned = len(source_track_ids)
-
-    artist_ids: set[str] = set()
-    for i in range(0, len(source_track_ids), 50):
-        batch = source_track_ids[i:i + 50]
-        tracks_resp = _backoff(sp.tracks, batch)
-        for track in ((tracks_resp or {}).get("tracks") or []):
-            for artist in ((track or {}).get("artists") or []):
+
+
+def get_genre_breakdown(
+    ctx: SpotifyContext, allowance: Budget | None = None, cursor: str | None = None, approximate: bool = False
+) -> dict:
+    """Top genres across the library source's artists.
+
+    With ``approximate`` a large library is estimated from a stratified sample of
+    its artists (see ``_build_approximate_genre_breakdown``); small libraries, and
+    those with records that predate stored artist IDs, still get the exact count.
+    """
+    user_id = ctx.user_id
+    if approximate and not cursor:
+        try:
+            with budget(allowance):
+                artists = _artists_by_first_added(_library_track_source(ctx))
+        except _LibraryLoading:
+            # The exact scan below answers with a continuation until the load is done.
+            artists = None
+        if artists is not None and len(artists) > _GENRE_EXACT_MAX_ARTISTS:
+            return _cached_flight(f"genre_breakdown:{user_id}:approx", _build_approximate_genre_breakdown, ctx)
+    return _resumable_flight(
+        f"genre_breakdown:{user_id}", _build_genre_breakdown, ctx, allowance=allowance, cursor=cursor
+    )
+
+
+def _build_genre_breakdown(ctx: SpotifyContext, state: dict | None) -> tuple[dict, dict | None]:
+    if state is None:
+        library = _library_track_source(ctx)
+        artist_ids: set[str] = set()
+        unresolved: list[str] = []
+        for entry in library.get("tracks") or []:
+            if len(entry) > 2 and entry[2]:
+                artist_ids.update(entry[2])
+            else:
+                unresolved.append(entry[0])
+        state = {
+            "songs_scanned": len([tid for tid in (library.get("track_ids") or []) if tid]),
+            "source": library["source"],
+            "source_playlist_id": library.get("source_playlist_id"),
+            "source_playlist_name": library.get("source_playlist_name"),
+            "unresolved": unresolved,
+            "artist_ids": sorted(artist_ids),
+            "artists_done": 0,
+            "genre_counts": {},
+        }
+
+    # Only records persisted before artist IDs were kept need a track lookup; those all
+    # resolve before any artist is counted, so the artist cursor never shifts.
+    progressed = False
+    while state["unresolved"]:
+        if progressed and budget_exhausted():
+            return _genre_breakdown_payload(state), state
+        batch, state["unresolved"] = state["unresolved"][:_SCAN_CHUNK], state["unresolved"][_SCAN_CHUNK:]
+        artist_ids = set(state["artist_ids"])
+        for track in _catalog_entities(ctx, "track", batch).values():
+            for artist in (track.get("artists") or []):
                 aid = (artist or {}).get("id")
                 if aid:
                     artist_ids.add(aid)
-
-    genre_counts: dict[str, int] = defaultdict(int)
-    artist_id_list = list(artist_ids)
-    for i in range(0, len(artist_id_list), 50):
-        batch = artist_id_list[i:i + 50]
-        artists_resp = _backoff(sp.artists, batch)
-        for artist in ((artists_resp or {}).get("artists") or []):
-            for genre in ((artist or {}).get("genres") or []):
+        state["artist_ids"] = sorted(artist_ids)
+        progressed = True
+
+    genre_counts = state["genre_counts"]
+    while state["artists_done"] < len(state["artist_ids"]):
+        if progressed and budget_exhausted():
+            return _genre_breakdown_payload(state), state
+        batch = state["artist_ids"][state["artists_done"]:state["artists_done"] + _SCAN_CHUNK]
+        for artist in _catalog_entities(ctx, "artist", batch).values():
+            for genre in (artist.get("genres") or []):
                 if genre:
-                    genre_counts[genre] += 1
+                    genre_counts[genre] = genre_counts.get(genre, 0) + 1
+        state["artists_done"] += len(batch)
+        progressed = True
+    return _genre_breakdown_payload(state), None
 
-    top = sorted(genre_counts.items(), key=lambda kv: kv[1], reverse=True)[:10]
+
+def _genre_breakdown_payload(state: dict) -> dict:
+    top = sorted(state["genre_counts"].items(), key=lambda kv: kv[1], reverse=True)[:10]
     total = sum(c for _, c in top)
     genres = [{"genre": g, "count": c, "pct": round(c / total * 100, 1) if total else 0} for g, c in top]
 
-    payload = {
+    return {
         "genres": genres,
-        "total_artists": len(artist_ids),
-        "songs_scanned": scanned,
+        "approximate": False,
+        "total_artists": len(state["artist_ids"]),
+        "artists_scanned": state["artists_done"],
+        "songs_scanned": state["songs_scanned"],
+        "source": state["source"],
+        "source_playlist_id": state["source_playlist_id"],
+        "source_playlist_name": state["source_playlist_name"],
+    }
+
+
+def _artists_by_first_added(library: dict) -> list[str] | None:
+    """Library artists ordered by when their first track was saved, or None if any record lacks artist IDs."""
+    first_added: dict[str, str] = {}
+    for entry in library.get("tracks") or []:
+        if not (len(entry) > 2 and entry[2]):
+            return None
+        added_at = entry[1] or ""
+        for aid in entry[2]:
+            if aid and (aid not in first_added or added_at < first_added[aid]):
+                first_added[aid] = added_at
+    return sorted(first_added, key=lambda aid: (first_added[aid], aid))
+
+
+def _build_approximate_genre_breakdown(ctx: SpotifyContext) -> dict:
+    """Estimate the genre breakdown from a sample of about ``_GENRE_SAMPLE_SIZE`` artists.
+
+    Artists are split into equal strata by when they entered the library and each
+    stratum is sampled in proportion, so old and recent taste are both covered.
+    For every genre the share of artists carrying it is estimated per stratum and
+    combined, with a stratified variance (finite-population corrected) giving the
+    95% interval. The sample is seeded by user and library size, so refreshes of
+    an unchanged library report the same figures.
+    """
+    library = _library_track_source(ctx)
+    artists = _artists_by_first_added(library) or []
+    population = len(artists)
+    rng = random.Random(f"{ctx.user_id}:{population}")
+    strata = []
+    for h in range(_GENRE_SAMPLE_STRATA):
+        members = artists[h * population // _GENRE_SAMPLE_STRATA:(h + 1) * population // _GENRE_SAMPLE_STRATA]
+        if members:
+            size = min(len(members), max(2, round(len(members) * _GENRE_SAMPLE_SIZE / population)))
+            strata.append((len(members), rng.sample(members, size)))
+
+    entities = _catalog_entities(ctx, "artist", [aid for _, sample in strata for aid in sample])
+    estimate: dict[str, float] = defaultdict(float)
+    variance: dict[str, float] = defaultdict(float)
+    stratum_hits = []
+    for members, sample in strata:
+        hits: dict[str, int] = defaultdict(int)
+        for aid in sample:
+            for genre in set((entities.get(aid) or {}).get("genres") or []):
+                if genre:
+                    hits[genre] += 1
+        stratum_hits.append(hits)
+        weight = members / population
+        for genre, hit in hits.items():
+            estimate[genre] += weight * hit / len(sample)
+    for (members, sample), hits in zip(strata, stratum_hits):
+        weight = members / population
+        n = len(sample)
+        if n < 2:
+            continue
+        for genre in estimate:
+            p = hits.get(genre, 0) / n
+            variance[genre] += weight ** 2 * (1 - n / members) * p * (1 - p) / (n - 1)
+
+    top = sorted(estimate.items(), key=lambda kv: kv[1], reverse=True)[:10]
+    # Shares are normalised over the top ten, as in the exact breakdown's pie.
+    total = sum(share for _, share in top)
+    genres = []
+    for genre, share in top:
+        margin = _Z_95 * math.sqrt(variance[genre])
+        low, high = max(0.0, share - margin), min(1.0, share + margin)
+        genres.append({
+            "genre": genre,
+            "count": round(share * population),
+            "count_ci": [math.floor(low * population), math.ceil(high * population)],
+            "pct": round(share / total * 100, 1) if total else 0,
+            "pct_ci": [round(low / total * 100, 1), round(high / total * 100, 1)] if total else [0, 0],
+        })
+
+    return {
+        "genres": genres,
+        "approximate": True,
+        "confidence": 0.95,
+        "sample_size": sum(len(sample) for _, sample in strata),
+        "total_artists": population,
+        "songs_scanned": len([tid for tid in (library.get("track_ids") or []) if tid]),
         "source": library["source"],
         "source_playlist_id": library.get("source_playlist_id"),
         "source_playlist_name": library.get("source_playlist_name"),
+        "complete": True,
+        "continuation": None,
     }
-    return _cache_set(cache_key, payload, ttl=600)
 
 
-def get_mood_timeline(sp: spotipy.Spotify) -> dict:
-    me = _backoff(sp.me)
-    user_id = me["id"]
-    cache_key = f"mood_timeline:{user_id}"
-    cached = _cache_get(cache_key)
-    if cached:
-        return cached
+def get_mood_timeline(ctx: SpotifyContext) -> dict:
+    sp = ctx.sp
+    user_id = ctx.user_id
+    # The audio_features fallback is cached longer so a deprecated endpoint is not retried constantly.
+    return _cached_flight(
+        f"mood_timeline:{user_id}",
+        _build_mood_timeline,
+        sp,
+        user_id,
+        ttl=lambda payload: 3600 if payload["mode"] == "proxy" else 300,
+    )
 
+
+def _build_mood_timeline(sp: spotipy.Spotify, user_id: str) -> dict:
     timeline = []
 
     def _release_year(track: dict) -> int | None:
@@ -782,13 +1220,13 @@ def get_mood_timeline(sp: spotipy.Spotify) -> dict:
     def _build_proxy_timeline() -> list[dict]:
         proxy = []
         for tr in ("short_term", "medium_term", "long_term"):
-            resp = _backoff(sp.current_user_top_tracks, time_range=tr, limit=25)
+            resp = _top_tracks(sp, user_id, tr, 25)
             items = (resp.get("items") or [])
             proxy.append(_proxy_point(tr, items))
         return proxy
 
     for time_range in ("short_term", "medium_term", "long_term"):
-        top_tracks_resp = _backoff(sp.current_user_top_tracks, time_range=time_range, limit=25)
+        top_tracks_resp = _top_tracks(sp, user_id, time_range, 25)
         track_ids = [t["id"] for t in (top_tracks_resp.get("items") or []) if t and t.get("id")]
         if not track_ids:
             timeline.append({"time_range": time_range, "energy": None, "valence": None, "danceability": None, "acousticness": None})
@@ -797,13 +1235,12 @@ def get_mood_timeline(sp: spotipy.Spotify) -> dict:
             features_resp = _backoff(sp.audio_features, track_ids)
         except SpotifyException as exc:
             if exc.http_status in (400, 403):
-                payload = {
+                return {
                     "mode": "proxy",
                     "timeline": [],
                     "proxy_timeline": _build_proxy_timeline(),
                     "error": "audio_features_unavailable",
                 }
-                return _cache_set(cache_key, payload, ttl=3600)
             raise
         valid = [f for f in (features_resp or []) if f]
         if not valid:
@@ -821,97 +1258,137 @@ def get_mood_timeline(sp: spotipy.Spotify) -> dict:
             "acousticness": avg("acousticness"),
         })
 
-    payload = {
+    return {
         "mode": "audio_features",
         "timeline": timeline,
         "proxy_timeline": [],
         "error": None,
     }
-    return _cache_set(cache_key, payload, ttl=300)
 
 
-def get_playlist_freshness(sp: spotipy.Spotify) -> dict:
-    me = _backoff(sp.me)
-    user_id = me["id"]
-    cache_key = f"playlist_freshness:{user_id}"
-    cached = _cache_get(cache_key)
-    if cached:
-        return cached
+def get_playlist_freshness(ctx: SpotifyContext, allowance: Budget | None = None, cursor: str | None = None) -> dict:
+    user_id = ctx.user_id
+    return _resumable_flight(
+        f"playlist_freshness:{user_id}", _build_playlist_freshness, ctx, allowance=allowance, cursor=cursor
+    )
+
 
+def _build_playlist_freshness(ctx: SpotifyContext, state: dict | None) -> tuple[dict, dict | None]:
+    sp = ctx.sp
+    user_id = ctx.user_id
     now = datetime.now(timezone.utc)
-    playlists = _all_user_playlists(sp)
+    playlists = _all_user_playlists(ctx)
     owned = [p for p in playlists if (p.get("owner") or {}).get("id") == user_id]
-    rows = []
-    for p in owned:
-        pid = p.get("id")
-        if not pid:
-            continue
-        if _is_excluded_playlist(p):
-            continue
-        name = p.get("name") or ""
-        description = p.get("description") or ""
-        track_total = int(((p.get("tracks") or {}).get("total") or 0))
-        images = p.get("images") or []
-        image_url = ((images[0] or {}).get("url")) if images else None
-        last_added = _playlist_last_added_at(sp, pid, max_scan=300)
-        if last_added:
-            days_since = max(0, (now - last_added).days)
-            freshness_score = _freshness_score_from_days(days_since)
-            last_added_iso = last_added.isoformat()
-        else:
-            days_since = 999
-            freshness_score = 0
-            last_added_iso = None
-
-        rows.append(
-            {
-                "id": pid,
-                "name": name,
-                "description": description,
-                "track_count": track_total,
-                "last_added_at": last_added_iso,
-                "days_since_activity": days_since,
-                "freshness_score": freshness_score,
-                "image_url": image_url,
-                "spotify_url": f"https://open.spotify.com/playlist/{pid}",
-                "is_vaulted_tagged": _has_vaulted_marker(description),
-                "is_liked_tagged": LIKED_TAG.lower() in description.lower(),
-            }
-        )
+    if state is None:
+        state = {"pending": [p["id"] for p in owned if p.get("id") and not _is_excluded_playlist(p)], "rows": []}
+    # A playlist deleted since the scan started is simply skipped.
+    by_id = {p["id"]: p for p in owned if p.get("id")}
+    pending = [pid for pid in state["pending"] if pid in by_id]
+    # Track reads are the last resort: playlists whose current snapshot is stored have
+    # their items, and tail reads are memoized per snapshot.
+    changes = get_playlist_last_changes(ctx.settings, pending)
+    stored = get_playlist_contents(ctx.settings, {pid: by_id[pid].get("snapshot_id") or "" for pid in pending})
+    rows = state["rows"]
+    progressed = False
+    while pending:
+        if progressed and budget_exhausted():
+            break
+        progressed = True
+        batch, pending = pending[:_PAGE_WORKERS], pending[_PAGE_WORKERS:]
+        last_added = {pid: _latest_added_at(stored[pid]) for pid in batch if pid in stored}
+        to_read = [by_id[pid] for pid in batch if pid not in last_added]
+        if to_read:
+            with ContextThreadPoolExecutor(max_workers=len(to_read)) as pool:
+                for p, latest in zip(to_read, pool.map(lambda p: _playlist_last_added_at(sp, p), to_read)):
+                    last_added[p["id"]] = latest
+        rows.extend(_freshness_row(by_id[pid], _last_activity(last_added[pid], changes.get(pid)), now) for pid in batch)
 
     rows.sort(key=lambda r: (r["freshness_score"], r["days_since_activity"], r["name"]))
     payload = {
         "playlists": rows,
+        "playlists_pending": len(pending),
         "scoring": {
             "method": "linear_decay_365d",
             "description": "Score 100 for very recent activity, decays to 0 by 365 days.",
         },
     }
-    return _cache_set(cache_key, payload, ttl=180)
+    return payload, ({"pending": pending, "rows": rows} if pending else None)
+
+
+def _last_activity(last_added: datetime | None, change: tuple[float, float] | None) -> datetime | None:
+    """Reconcile the newest ``added_at`` with the snapshot history's last track-count change.
+
+    ``added_at`` is exact but cannot see removals, and the history sees removals but
+    misses swaps that keep the count, dating a change only to the observation that
+    caught it. An addition after the observation before the change explains it, so
+    its exact time wins; otherwise the change was a removal, dated when first seen.
+    """
+    if change is None:
+        return last_added
+    changed_at, previous_seen_at = (datetime.fromtimestamp(t, timezone.utc) for t in change)
+    if last_added is not None and last_added > previous_seen_at:
+        return last_added
+    return changed_at
+
+
+def _freshness_row(playlist: dict, last_added: datetime | None, now: datetime) -> dict:
+    pid = playlist["id"]
+    name = playlist.get("name") or ""
+    description = playlist.get("description") or ""
+    track_total = int(((playlist.get("tracks") or {}).get("total") or 0))
+    images = playlist.get("images") or []
+    image_url = ((images[0] or {}).get("url")) if images else None
+    if last_added:
+        days_since = max(0, (now - last_added).days)
+        freshness_score = _freshness_score_from_days(days_since)
+        last_added_iso = last_added.isoformat()
+    else:
+        days_since = 999
+        freshness_score = 0
+        last_added_iso = None
+
+    return {
+        "id": pid,
+        "name": name,
+        "description": description,
+        "track_count": track_total,
+        "last_added_at": last_added_iso,
+        "days_since_activity": days_since,
+        "freshness_score": freshness_score,
+        "image_url": image_url,
+        "spotify_url": f"https://open.spotify.com/playlist/{pid}",
+        "is_vaulted_tagged": _has_vaulted_marker(description),
+        "is_liked_tagged": LIKED_TAG.lower() in description.lower(),
+    }
 
 
 def run_archive_stale_playlists(
-    sp: spotipy.Spotify,
+    ctx: SpotifyContext,
     max_freshness_score: int = 30,
     prefix: str = "[Archive]",
+    progress=_no_progress,
 ) -> dict:
-    me = _backoff(sp.me)
-    user_id = me["id"]
-    freshness = get_playlist_freshness(sp)
+    sp = ctx.sp
+    user_id = ctx.user_id
+    progress("freshness")
+    # Unbudgeted, so this never joins a budgeted request's partial scan: every playlist is scored.
+    freshness = get_playlist_freshness(ctx, allowance=None)
     candidates = freshness.get("playlists") or []
     threshold = max(0, min(int(max_freshness_score), 100))
     archive_prefix = (prefix or "[Archive]").strip()
     archived: list[dict] = []
 
-    for pl in candidates:
-        if pl.get("freshness_score", 101) > threshold:
-            continue
-        name = (pl.get("name") or "").strip()
-        if not name or name.startswith(archive_prefix):
-            continue
-        pid = pl.get("id")
-        if not pid:
-            continue
+    to_archive = [
+        pl for pl in candidates
+        if pl.get("freshness_score", 101) <= threshold
+        and (pl.get("name") or "").strip()
+        and not (pl.get("name") or "").strip().startswith(archive_prefix)
+        and pl.get("id")
+    ]
+    progress("renaming", 0, len(to_archive))
+    for pl in to_archive:
+        name = pl["name"].strip()
+        pid = pl["id"]
         new_name = f"{archive_prefix} {name}".strip()
         _backoff(sp.playlist_change_details, playlist_id=pid, name=new_name)
         archived.append(
@@ -922,9 +1399,11 @@ def run_archive_stale_playlists(
                 "freshness_score": pl.get("freshness_score"),
             }
         )
+        progress("renaming", len(archived), len(to_archive))
 
     # Clear freshness cache so UI reflects archive names quickly.
-    _CACHE.pop(f"playlist_freshness:{user_id}", None)
+    get_response_cache().invalidate(f"playlist_freshness:{user_id}")
+    _forget_playlists(user_id)
     return {
         "threshold": threshold,
         "prefix": archive_prefix,
@@ -934,13 +1413,15 @@ def run_archive_stale_playlists(
 
 
 def run_vaulted_add(
-    sp: spotipy.Spotify,
+    ctx: SpotifyContext,
     playlist_name: str = "_vaulted",
     playlist_id: str | None = None,
+    progress=_no_progress,
 ) -> dict:
-    me = _backoff(sp.me)
-    user_id = me["id"]
-    playlists = _all_user_playlists(sp)
+    sp = ctx.sp
+    user_id = ctx.user_id
+    progress("playlists")
+    playlists = _all_user_playlists(ctx, fresh=True)
 
     existing_playlist = _find_owned_playlist_by_id(playlists, user_id, playlist_id)
     if not existing_playlist:
@@ -964,46 +1445,113 @@ def run_vaulted_add(
     existing_playlist_id = existing_playlist["id"]
     existing_playlist_name = existing_playlist.get("name") or playlist_name
 
-    all_tracks: set[str] = set()
+    sources: list[dict] = []
     excluded = 0
     for playlist in playlists:
         owner_id = (playlist.get("owner") or {}).get("id")
         if owner_id == user_id and _is_excluded_playlist(playlist):
             excluded += 1
         if owner_id == user_id and playlist.get("id") != existing_playlist_id and not _is_excluded_playlist(playlist):
-            all_tracks.update(_playlist_track_ids(sp, playlist["id"]))
-
-    all_tracks.update(_liked_track_ids(sp))
-    existing = set(_playlist_track_ids(sp, existing_playlist_id))
-
-    to_add = [tid for tid in (all_tracks - existing) if tid]
-    to_remove = [tid for tid in (existing - all_tracks) if tid]
-
-    for i in range(0, len(to_add), 100):
-        _backoff(sp.playlist_add_items, existing_playlist_id, to_add[i : i + 100])
-
-    for i in range(0, len(to_remove), 100):
-        _backoff(sp.playlist_remove_all_occurrences_of_items, existing_playlist_id, to_remove[i : i + 100])
-
+            sources.append(playlist)
+
+    # The vault is a multiset: each track counts the sources that contribute it, and
+    # only sources whose version moved since the last run are re-read.
+    state = get_vaulted_state(ctx.settings, user_id)
+    progress("liked")
+    _sync_liked(ctx)
+    liked_state = get_saved_tracks_state(ctx.settings, user_id) or {}
+    versions = {p["id"]: p.get("snapshot_id") or "" for p in sources}
+    versions[_VAULTED_LIKED_SOURCE] = "|".join(
+        str(liked_state.get(k, "")) for k in ("watermark", "total", "full_synced_at")
+    )
+    changed = [
+        sid for sid, version in versions.items()
+        if not version or (state["sources"].get(sid) or {}).get("version") != version
+    ]
+    removed_sources = [sid for sid in state["sources"] if sid not in versions]
+
+    changed_playlists = [p for p in sources if p["id"] in changed]
+    progress("sources", 0, len(changed_playlists))
+    entries = _playlist_entries(
+        ctx, changed_playlists, on_read=lambda done, total: progress("sources", done, total)
+    )
+    current: dict[str, list[str]] = {
+        p["id"]: list(dict.fromkeys(entry[0] for entry in entries.get(p["id"], []))) for p in changed_playlists
+    }
+    if _VAULTED_LIKED_SOURCE in changed:
+        current[_VAULTED_LIKED_SOURCE] = _liked_track_ids(ctx)
+
+    counts = dict(state["counts"])
+    touched: set[str] = set()
+    for sid in [*changed, *removed_sources]:
+        old = set((state["sources"].get(sid) or {}).get("track_ids") or [])
+        new = set(current.get(sid) or [])
+        for tid in new - old:
+            counts[tid] = counts.get(tid, 0) + 1
+        for tid in old - new:
+            counts[tid] = counts.get(tid, 0) - 1
+        touched |= new ^ old
+
+    recorded = state["target"] or {}
+    in_sync = (
+        recorded.get("playlist_id") == existing_playlist_id
+        and bool(existing_playlist.get("snapshot_id"))
+        and recorded.get("snapshot_id") == existing_playlist.get("snapshot_id")
+    )
+    if in_sync:
+        # Only 0 -> 1 and 1 -> 0 transitions change what the vault should hold.
+        to_add = [tid for tid in touched if counts.get(tid, 0) > 0 and state["counts"].get(tid, 0) <= 0]
+        to_remove = [tid for tid in touched if counts.get(tid, 0) <= 0 and state["counts"].get(tid, 0) > 0]
+    else:
+        # First run, a new target, or the vault was edited outside this app: diff in full.
+        existing_entries = _playlist_entries(ctx, [existing_playlist]).get(existing_playlist_id, [])
+        existing = {entry[0] for entry in existing_entries}
+        desired = {tid for tid, n in counts.items() if n > 0}
+        to_add = [tid for tid in (desired - existing) if tid]
+        to_remove = [tid for tid in (existing - desired) if tid]
+
+    snapshot_id = existing_playlist.get("snapshot_id") or ""
+    batches = [(sp.playlist_add_items, to_add[i : i + 100]) for i in range(0, len(to_add), 100)]
+    batches += [
+        (sp.playlist_remove_all_occurrences_of_items, to_remove[i : i + 100]) for i in range(0, len(to_remove), 100)
+    ]
+    progress("writing", 0, len(batches))
+    for done, (write, batch) in enumerate(batches, start=1):
+        resp = _backoff(write, existing_playlist_id, batch)
+        snapshot_id = (resp or {}).get("snapshot_id") or snapshot_id
+        progress("writing", done, len(batches))
+
+    save_vaulted_state(
+        ctx.settings,
+        user_id,
+        changed_sources={sid: (versions[sid], current.get(sid) or []) for sid in changed},
+        removed_sources=removed_sources,
+        count_updates={tid: counts.get(tid, 0) for tid in touched},
+        target_playlist_id=existing_playlist_id,
+        target_snapshot_id=snapshot_id,
+    )
+    _forget_playlists(user_id)
     return {
         "playlist_id": existing_playlist_id,
         "playlist_name": existing_playlist_name,
         "added": len(to_add),
         "removed": len(to_remove),
         "excluded_playlists": excluded,
+        "sources_changed": len(changed) + len(removed_sources),
         "tag": VAULTED_TAG,
     }
 
 
 def _get_or_create_playlist(
-    sp: spotipy.Spotify,
-    user_id: str,
+    ctx: SpotifyContext,
     playlist_name: str,
     public: bool = False,
     tag: str | None = None,
     playlist_id: str | None = None,
 ) -> dict:
-    playlists = _all_user_playlists(sp)
+    sp = ctx.sp
+    user_id = ctx.user_id
+    playlists = _all_user_playlists(ctx, fresh=True)
     explicit = _find_owned_playlist_by_id(playlists, user_id, playlist_id)
     if explicit:
         if tag:
@@ -1025,12 +1573,17 @@ def _get_or_create_playlist(
     return created
 
 
-def run_liked_add(sp: spotipy.Spotify, playlist_name: str = "Liked Songs Mirror", playlist_id: str | None = None) -> dict:
-    me = _backoff(sp.me)
-    user_id = me["id"]
+def run_liked_add(
+    ctx: SpotifyContext,
+    playlist_name: str = "Liked Songs Mirror",
+    playlist_id: str | None = None,
+    progress=_no_progress,
+) -> dict:
+    sp = ctx.sp
+    user_id = ctx.user_id
+    progress("playlists")
     playlist = _get_or_create_playlist(
-        sp,
-        user_id,
+        ctx,
         playlist_name,
         public=False,
         tag=LIKED_TAG,
@@ -1039,20 +1592,54 @@ def run_liked_add(sp: spotipy.Spotify, playlist_name: str = "Liked Songs Mirror"
     playlist_id = playlist["id"]
     resolved_playlist_name = playlist.get("name") or playlist_name
 
-    desired = _liked_track_ids(sp)  # API returns newest -> oldest
+    progress("liked")
+    desired = _liked_track_ids(ctx)  # newest -> oldest, as Spotify lists them
+    progress("mirror")
+    current = [entry[0] for entry in _playlist_entries(ctx, [playlist]).get(playlist_id, [])]
+
+    # Local files have no ID, so their positions are unknown; rewrite the mirror instead.
+    listed_total = (playlist.get("tracks") or {}).get("total")
+    ops = plan_playlist_edits(current, desired) if listed_total in (None, len(current)) else None
+    write_calls = replace_cost(len(desired)) if ops is None else len(ops)
+    written = 0
+
+    def write(call, *args, **kwargs):
+        nonlocal written
+        resp = _backoff(call, *args, **kwargs)
+        written += 1
+        progress("writing", written, write_calls)
+        return resp
+
+    progress("writing", 0, write_calls)
+    if ops is None:
+        replace_playlist(sp, playlist_id, desired, write)
+    else:
+        apply_playlist_edits(sp, playlist_id, ops, write, snapshot_id=playlist.get("snapshot_id"))
 
-    head = desired[:100]
-    _backoff(sp.playlist_replace_items, playlist_id, head)
-    for i in range(100, len(desired), 100):
-        _backoff(sp.playlist_add_items, playlist_id, desired[i : i + 100])
+    _forget_playlists(user_id)
+    return {
+        "playlist_id": playlist_id,
+        "playlist_name": resolved_playlist_name,
+        "total_tracks": len(desired),
+        "mode": "replace" if ops is None else "edit",
+        "write_calls": write_calls,
+        "tag": LIKED_TAG,
+    }
 
-    return {"playlist_id": playlist_id, "playlist_name": resolved_playlist_name, "total_tracks": len(desired), "tag": LIKED_TAG}
+
+def warmup_steps(ctx: SpotifyContext) -> list[tuple[str, object]]:
+    """Named callables that fill the caches a first dashboard render reads."""
+    steps: list[tuple[str, object]] = [("playlists", lambda: _all_user_playlists(ctx))]
+    for time_range in ("short_term", "medium_term", "long_term"):
+        steps.append((f"top_lists:{time_range}", lambda tr=time_range: get_top_lists(ctx, time_range=tr)))
+    steps.append(("recently_played", lambda: get_recently_played(ctx)))
+    steps.append(("library_source", lambda: _library_track_source(ctx)))
+    return steps
 
 
-def get_automation_targets(sp: spotipy.Spotify) -> dict:
-    me = _backoff(sp.me)
-    user_id = me["id"]
-    playlists = _all_user_playlists(sp)
+def get_automation_targets(ctx: SpotifyContext) -> dict:
+    user_id = ctx.user_id
+    playlists = _all_user_playlists(ctx)
     owned = [p for p in playlists if (p.get("owner") or {}).get("id") == user_id]
 
     def resolve_default(tag: str, fallback_name: str) -> tuple[str, dict | None]:
@@ -0,0 +1,78 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import get_response_cache
+from .config import Settings
+from .spotify_auth import get_spotify_client_for_user
+from .tasks import warmup_steps
+
+# Warm-ups only queue Spotify calls behind the shared governor, so a couple of
+# threads is enough and keeps logins from crowding out interactive requests.
+_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="warmup")
+_RUNNING: set[str] = set()
+_RUNNING_LOCK = threading.Lock()
+
+
+def _progress_key(user_id: str) -> str:
+    return f"warmup:{user_id}"
+
+
+def _publish(user_id: str, progress: dict) -> None:
+    # Kept in the response cache so any worker can answer a status query.
+    get_response_cache().set(_progress_key(user_id), dict(progress, steps=[dict(s) for s in progress["steps"]]))
+
+
+def _run(settings: Settings, user_id: str) -> None:
+    progress = {"state": "running", "started_at": time.time(), "finished_at": None, "steps": []}
+    try:
+        ctx = get_spotify_client_for_user(settings, user_id)
+        steps = warmup_steps(ctx)
+        progress["steps"] = [{"name": name, "state": "pending"} for name, _ in steps]
+        _publish(user_id, progress)
+
+        for step, (_, warm) in zip(progress["steps"], steps):
+            step["state"] = "running"
+            started = time.time()
+            try:
+                warm()
+                step["state"] = "done"
+            except Exception as exc:
+                # A failed step only means that view loads cold; keep warming the rest.
+                step["state"] = "failed"
+                step["error"] = str(exc)
+            step["seconds"] = round(time.time() - started, 2)
+            _publish(user_id, progress)
+
+        progress["state"] = "done"
+    except Exception as exc:
+        progress["state"] = "failed"
+        progress["error"] = str(exc)
+    finally:
+        progress["finished_at"] = time.time()
+        _publish(user_id, progress)
+        with _RUNNING_LOCK:
+            _RUNNING.discard(user_id)
+
+
+def start_warmup(settings: Settings, user_id: str) -> bool:
+    """Queue a cache warm-up for ``user_id``; returns False if one is already running here."""
+    with _RUNNING_LOCK:
+        if user_id in _RUNNING:
+            return False
+        _RUNNING.add(user_id)
+    _publish(user_id, {"state": "queued", "started_at": None, "finished_at": None, "steps": []})
+    _POOL.submit(_run, settings, user_id)
+    return True
+
+
+def get_warmup_status(user_id: str) -> dict:
+    progress = get_response_cache().get(_progress_key(user_id))
+    if not progress:
+        return {"state": "none", "steps": [], "done_steps": 0, "total_steps": 0}
+    steps = progress.get("steps") or []
+    return {
+        **progress,
+        "done_steps": sum(1 for s in steps if s.get("state") in {"done", "failed"}),
+        "total_steps": len(steps),
+    }
@@ -15,7 +15,9 @@ Optional env vars:
   PLAYLIST_PUBLIC=false
 
 Requires:
-  pip install spotipy python-dotenv
+  pip install -r requirements.txt   (repo root: spotipy, python-dotenv, psycopg, cryptography, ...)
+  The Liked Songs mirror is kept through backend.db in the database DATABASE_URL names
+  (default sqlite:///local_dev.db in the working directory; the backend's Postgres works too).
 
 .env must contain:
   SPOTIPY_CLIENT_ID=...
@@ -28,16 +30,15 @@ Scopes:
 
 import os
 import sys
-import time
 import shutil
 import logging
+import threading
 from pathlib import Path
 from typing import List, Tuple
 
 from dotenv import load_dotenv
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
-from spotipy.exceptions import SpotifyException
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Config
@@ -66,6 +67,13 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 ENV_PATH = PROJECT_ROOT / ".env"
 DEFAULT_CACHE_PATH = PROJECT_ROOT / ".cache" / "liked_mirror.cache"
 
+sys.path.insert(0, str(PROJECT_ROOT))
+from backend.config import Settings  # noqa: E402
+from backend.db import get_saved_tracks, init_db  # noqa: E402
+from backend.library import sync_saved_tracks  # noqa: E402
+from backend.playlist_edits import apply_playlist_edits, plan_playlist_edits, replace_playlist  # noqa: E402
+from backend.retry import RetryPolicy, retry_after_seconds  # noqa: E402
+
 def auth_spotify(cache_path: str | None = None) -> spotipy.Spotify:
     load_dotenv(dotenv_path=ENV_PATH)
     resolved_cache_path = cache_path or str(DEFAULT_CACHE_PATH)
@@ -77,27 +85,20 @@ def auth_spotify(cache_path: str | None = None) -> spotipy.Spotify:
         )
     )
 
+# A CLI run can sit out a longer outage than a request handler, but not forever.
+RETRY_POLICY = RetryPolicy(max_attempts=8, base_delay=1.0, max_delay=16.0)
+
+
+def _log_retry(exc: Exception, attempt: int, wait: float) -> None:
+    if retry_after_seconds(exc) is not None:
+        logging.warning("Rate limited. Retrying after %.1fs…", wait)
+    else:
+        logging.warning("Transient error (%s). Retry %d in %.1fs…", exc, attempt, wait)
+
+
 def backoff(call, *args, **kwargs):
-    """Retry/backoff for rate limits & transient errors."""
-    delay = 1.0
-    while True:
-        try:
-            return call(*args, **kwargs)
-        except SpotifyException as e:
-            if e.http_status == 429:
-                retry_after = 2
-                try:
-                    retry_after = int(getattr(e, "headers", {}).get("Retry-After", 2))
-                except Exception:
-                    pass
-                logging.warning("Rate limited. Retrying after %ss…", retry_after)
-                time.sleep(max(retry_after, 2))
-            else:
-                raise
-        except Exception as ex:
-            logging.warning("Transient error (%s). Retrying in %.1fs…", ex, delay)
-            time.sleep(delay)
-            delay = min(delay * 2, 16)
+    """Retry/backoff for rate limits & transient errors; raises RetryBudgetExceeded when retries run out."""
+    return RETRY_POLICY.run(call, *args, on_retry=_log_retry, **kwargs)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Progress bar (single-line, non-wrapping)
@@ -126,41 +127,40 @@ def render_progress(current: int, total: int, label: str = "Collecting Liked Son
 # Data fetch
 # ──────────────────────────────────────────────────────────────────────────────
 
-def fetch_all_saved_tracks(sp: spotipy.Spotify) -> List[Tuple[str, str]]:
+def fetch_all_saved_tracks(sp: spotipy.Spotify, settings: Settings, user_id: str) -> List[Tuple[str, str]]:
     """
     Return list of (track_id, added_at) for all Liked Songs, sorted NEWEST → OLDEST
-    (same as the Liked Songs page). Shows a loading bar. Skips local/missing tracks.
-    """
-    items: List[Tuple[str, str]] = []
-    limit = 50
-    offset = 0
-
-    resp = backoff(sp.current_user_saved_tracks, limit=limit, offset=offset)
-    total = int(resp.get("total", 0))
-    fetched = 0
-    render_progress(0, total)
-
-    while True:
-        batch = resp.get("items", [])
-        fetched += len(batch)
+    (same as the Liked Songs page). Skips local/missing tracks.
 
-        for it in batch:
-            track = it.get("track") or {}
-            tid = track.get("id")
-            added_at = it.get("added_at") or ""
-            if tid:
-                items.append((tid, added_at))
-
-        render_progress(min(fetched, total), total)
+    Reads come from the saved_tracks mirror in the backend database; only pages
+    newer than its watermark are fetched (everything on the first run, with a
+    loading bar).
+    """
+    lock = threading.Lock()
+    progress = {"fetched": 0, "total": 0, "rendered": False}
 
-        if resp.get("next") is None or not batch:
-            break
-        offset += limit
+    def fetch_page(offset: int, limit: int) -> dict:
         resp = backoff(sp.current_user_saved_tracks, limit=limit, offset=offset)
-
+        with lock:
+            progress["fetched"] += len(resp.get("items", []))
+            progress["total"] = int(resp.get("total", 0))
+            # Only reads past the first page are worth a bar; most syncs stop there.
+            if offset:
+                render_progress(min(progress["fetched"], progress["total"]), progress["total"])
+                progress["rendered"] = True
+        return resp
+
+    result = sync_saved_tracks(settings, user_id, fetch_page)
+    if progress["rendered"] and progress["fetched"] < progress["total"]:
+        sys.stdout.write("\n")
+    logging.info("Liked Songs sync: %s (%d page(s) read)", result["mode"], result["pages"])
+    if result.get("gap"):
+        logging.warning(
+            "%d liked track(s) were missed while the list changed during the load; the next run reconciles them.",
+            result["gap"],
+        )
     # NEWEST → OLDEST (top to bottom)
-    items.sort(key=lambda x: x[1], reverse=True)
-    return items
+    return [(tid, added_at) for tid, added_at, _, _ in get_saved_tracks(settings, user_id)]
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Playlist helpers
@@ -202,6 +202,9 @@ def set_playlist_exact(sp: spotipy.Spotify, playlist_id: str, desired_ids: List[
     """
     Set playlist contents to exactly desired_ids (order preserved: top→bottom).
     Removes any tracks not in desired and adds missing ones.
+
+    Applies the smallest set of remove / move / insert-at-position calls, and only
+    rewrites the whole playlist when that would take fewer calls.
     """
     if len(desired_ids) == 0:
         # Clear playlist
@@ -219,20 +222,27 @@ def set_playlist_exact(sp: spotipy.Spotify, playlist_id: str, desired_ids: List[
                     pass
             return
 
-    head = desired_ids[:100]
-    backoff(sp.playlist_replace_items, playlist_id, head)
-    for i in range(100, len(desired_ids), 100):
-        back = desired_ids[i:i+100]
-        backoff(sp.playlist_add_items, playlist_id, back)
+    current, listed_total = read_playlist_track_ids(sp, playlist_id)
+    # Local files and unavailable tracks have no ID, so the positions of the readable
+    # ones are not their real slots; rewrite the mirror instead of editing in place.
+    ops = plan_playlist_edits(current, desired_ids) if listed_total == len(current) else None
+    if ops is None:
+        logging.info("Rewriting playlist (%d tracks).", len(desired_ids))
+        replace_playlist(sp, playlist_id, desired_ids, backoff)
+        return
+    logging.info("Applying %d edit call(s).", len(ops))
+    apply_playlist_edits(sp, playlist_id, ops, backoff)
 
-def fetch_playlist_track_ids(sp: spotipy.Spotify, playlist_id: str) -> List[str]:
-    """Return playlist track IDs in current order (top → bottom)."""
+def read_playlist_track_ids(sp: spotipy.Spotify, playlist_id: str) -> Tuple[List[str], int]:
+    """Return (track IDs in current order, top → bottom, and the playlist's listed item total)."""
     ids: List[str] = []
+    total = 0
     limit = 100
     offset = 0
-    fields = "items(track(id)),next"
+    fields = "items(track(id)),next,total"
     while True:
         resp = backoff(sp.playlist_items, playlist_id, fields=fields, limit=limit, offset=offset)
+        total = int(resp.get("total") or 0)
         batch = resp.get("items", [])
         for it in batch:
             tid = (it.get("track") or {}).get("id")
@@ -241,7 +251,11 @@ def fetch_playlist_track_ids(sp: spotipy.Spotify, playlist_id: str) -> List[str]
         if resp.get("next") is None or not batch:
             break
         offset += limit
-    return ids
+    return ids, total
+
+def fetch_playlist_track_ids(sp: spotipy.Spotify, playlist_id: str) -> List[str]:
+    """Return playlist track IDs in current order (top → bottom)."""
+    return read_playlist_track_ids(sp, playlist_id)[0]
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Main
@@ -254,12 +268,14 @@ def main():
     sp = auth_spotify()
     me = backoff(sp.me)
     user_id = me["id"]
+    settings = Settings()
+    init_db(settings)
 
     logging.info("Using playlist name: %s (public=%s)", playlist_name, playlist_public)
     playlist_id = get_or_create_playlist(sp, user_id, playlist_name, playlist_public)
 
     logging.info("Fetching all Liked Songs…")
-    liked = fetch_all_saved_tracks(sp)  # NEWEST → OLDEST
+    liked = fetch_all_saved_tracks(sp, settings, user_id)  # NEWEST → OLDEST
     liked_ids = [tid for (tid, _) in liked]
     logging.info("Liked Songs loaded: %d (newest → oldest)", len(liked))
 
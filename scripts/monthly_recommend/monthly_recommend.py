@@ -54,6 +54,13 @@ ENV_PATH     = PROJECT_ROOT / ".env"
 CACHE_PATH   = PROJECT_ROOT / ".cache" / "spotipy_general.cache"
 LOG_PATH     = SCRIPT_DIR / "monthly_recommend.log"
 
+# Share the backend's catalog store (DATABASE_URL) so artist top tracks fetched
+# here are reused by later runs and by other users.
+sys.path.insert(0, str(PROJECT_ROOT))
+from backend.catalog import get_entities  # noqa: E402
+from backend.config import Settings  # noqa: E402
+from backend.db import init_db  # noqa: E402
+
 # ── tunables ──────────────────────────────────────────────────────────────────
 
 PLAYLIST_NAME_PREFIX    = "Monthly Recs"
@@ -120,6 +127,24 @@ def sp_call(fn, *args, **kwargs):
     return fn(*args, **kwargs)
 
 
+def fetch_artist_top_tracks(
+    sp: spotipy.Spotify, settings: Settings, artist_ids: List[str]
+) -> Dict[str, List[Dict]]:
+    """Top tracks (MARKET) per artist, served from the shared catalog store when fresh."""
+    def fetch(batch: List[str]) -> List[Dict]:
+        out = []
+        for aid in batch:
+            try:
+                res = sp_call(sp.artist_top_tracks, aid, country=MARKET)
+            except Exception:
+                continue
+            out.append({"id": aid, "tracks": res.get("tracks") or []})
+        return out
+
+    found = get_entities(settings, "artist_top_tracks", artist_ids, fetch)
+    return {aid: entity.get("tracks") or [] for aid, entity in found.items()}
+
+
 def chunked(lst: list, size: int):
     for i in range(0, len(lst), size):
         yield lst[i : i + size]
@@ -442,6 +467,7 @@ def gather_lastfm_tracks(
     seed_artist_ids: Set[str],
     known_ids: Set[str],
     lastfm_key: str,
+    settings: Settings,
 ) -> List[Dict]:
     """
     For each seed artist, fetch similar artists from last.fm's artist.getSimilar
@@ -500,13 +526,9 @@ def gather_lastfm_tracks(
     track_meta:   Dict[str, Dict]  = {}
 
     top_similar = sorted(similar_scores.items(), key=lambda x: -x[1])[:LASTFM_TOP_SIMILAR]
+    top_tracks_by_artist = fetch_artist_top_tracks(sp, settings, [aid for aid, _ in top_similar])
     for aid, score in top_similar:
-        try:
-            res = sp_call(sp.artist_top_tracks, aid, country=MARKET)
-            tracks = res.get("tracks") or []
-        except Exception:
-            continue
-        for track in tracks:
+        for track in top_tracks_by_artist.get(aid, []):
             tid = track.get("id")
             if not tid or tid in known_ids:
                 continue
@@ -714,6 +736,8 @@ def main():
     lastfm_key = os.getenv("LASTFM_API_KEY", "")
 
     sp      = get_client()
+    settings = Settings()
+    init_db(settings)
     user_id = sp_call(sp.me)["id"]
     log.info("Authenticated as: %s", user_id)
 
@@ -766,7 +790,7 @@ def main():
         # ── Approach C: last.fm artist.getSimilar ────────────────────────────
         log.info("Approach [lastfm]: last.fm artist.getSimilar → Spotify top tracks")
         name_c  = f"{PLAYLIST_NAME_PREFIX} {month} [lastfm]"
-        cands_c = gather_lastfm_tracks(sp, seed_artists, seed_artist_ids, known_ids, lastfm_key)
+        cands_c = gather_lastfm_tracks(sp, seed_artists, seed_artist_ids, known_ids, lastfm_key, settings)
         uris_c  = select_tracks(cands_c, combined_exclusions, "[lastfm]")
         if uris_c:
             pid_c = find_or_create_playlist(sp, user_id, name_c)
@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from backend.cache import configure_response_cache
+from backend.config import Settings
+from backend.db import init_db
+from backend.governor import configure_governor
+from backend.spotify_auth import SpotifyContext
+
+
+class FakeSpotify:
+    """In-memory stand-in for ``spotipy.Spotify`` that counts calls per method.
+
+    The library is ``n_tracks`` liked tracks by ``n_artists`` artists; every artist
+    carries one of five genres. The catalog holds ``n_albums`` albums of 12 tracks
+    (``al0`` has 60, so it spills past the 50 tracks ``albums`` embeds), with track
+    ``t{i}`` on album ``al{i % n_albums}``. Every call sleeps ``latency`` seconds;
+    ``album_ids=False`` drops the album from liked tracks, as older records did.
+    """
+
+    def __init__(
+        self, n_tracks: int = 300, n_artists: int = 120, n_albums: int = 30, latency: float = 0.0,
+        album_ids: bool = True,
+    ) -> None:
+        self.n_tracks = n_tracks
+        self.n_artists = n_artists
+        self.n_albums = n_albums
+        self.latency = latency
+        self.album_ids = album_ids
+        self.calls: Counter = Counter()
+        self._saved: list[dict] | None = None
+        self._lock = threading.Lock()
+
+    def _call(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _album_track_ids(self, album_id: str) -> list[str]:
+        index = int(album_id[2:])
+        return [f"t{index + self.n_albums * k}" for k in range(60 if index == 0 else 12)]
+
+    def _page(self, items: list, limit: int, offset: int) -> dict:
+        end = offset + limit
+        return {
+            "items": items[offset:end],
+            "total": len(items),
+            "limit": limit,
+            "offset": offset,
+            "next": None if end >= len(items) else f"offset={end}",
+        }
+
+    def me(self) -> dict:
+        self._call("me")
+        return {"id": "u1", "display_name": "Test User"}
+
+    def current_user_playlists(self, limit: int = 50, offset: int = 0) -> dict:
+        self._call("current_user_playlists")
+        return self._page([], limit, offset)
+
+    def current_user_saved_tracks(self, limit: int = 20, offset: int = 0, market=None) -> dict:
+        self._call("current_user_saved_tracks")
+        if self._saved is None:
+            self._saved = [
+                {
+                    "added_at": "2024-01-01T00:00:00Z",
+                    "track": {
+                        "id": f"t{i}",
+                        "artists": [{"id": f"a{i % self.n_artists}"}],
+                        **({"album": {"id": f"al{i % self.n_albums}"}} if self.album_ids else {}),
+                    },
+                }
+                for i in range(self.n_tracks)
+            ]
+        return self._page(self._saved, limit, offset)
+
+    def artists(self, ids: list[str]) -> dict:
+        self._call("artists")
+        return {"artists": [{"id": aid, "name": aid, "genres": [f"genre-{int(aid[1:]) % 5}"]} for aid in ids]}
+
+    def artist_albums(self, artist_id: str, include_groups=None, country=None, limit: int = 20, offset: int = 0) -> dict:
+        self._call("artist_albums")
+        items = [
+            {"id": f"al{i}", "name": f"Album {i}", "release_date": "2020-01-01", "total_tracks": 60 if i == 0 else 12}
+            for i in range(self.n_albums)
+        ]
+        return self._page(items, limit, offset)
+
+    def albums(self, ids: list[str], market=None) -> dict:
+        self._call("albums")
+        albums = []
+        for album_id in ids:
+            track_ids = self._album_track_ids(album_id)
+            tracks = self._page([{"id": tid} for tid in track_ids], 50, 0)
+            albums.append({"id": album_id, "name": album_id, "total_tracks": len(track_ids), "tracks": tracks})
+        return {"albums": albums}
+
+    def _album_tracks_page(self, album_id: str, limit: int, offset: int) -> dict:
+        page = self._page([{"id": tid} for tid in self._album_track_ids(album_id)], limit, offset)
+        if page["next"]:
+            page["next"] = f"{album_id}:{offset + limit}"
+        return page
+
+    def album_tracks(self, album_id: str, limit: int = 50, offset: int = 0, market=None) -> dict:
+        self._call("album_tracks")
+        return self._album_tracks_page(album_id, limit, offset)
+
+    def next(self, result: dict) -> dict:
+        # Only album track pages are followed by ``next`` links here.
+        self._call("next")
+        album_id, offset = result["next"].split(":")
+        return self._album_tracks_page(album_id, result["limit"], int(offset))
+
+    def current_user_top_artists(self, time_range: str = "medium_term", limit: int = 20, offset: int = 0) -> dict:
+        self._call("current_user_top_artists")
+        return {"items": [{"id": "a1", "name": "Artist 1", "genres": [], "images": [], "popularity": 50}]}
+
+    def current_user_top_tracks(self, time_range: str = "medium_term", limit: int = 20, offset: int = 0) -> dict:
+        self._call("current_user_top_tracks")
+        return {"items": [{"id": "t1", "name": "Track 1", "artists": [{"name": "Artist 1"}], "album": {"images": []}}]}
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch) -> Settings:
+    """Settings on a throwaway SQLite database, with fresh cache and governor singletons."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv("SPOTIFY_GOVERNOR_PATH", str(tmp_path / "governor.db"))
+    monkeypatch.setenv("SPOTIFY_RATE_PER_SECOND", "100000")
+    monkeypatch.setenv("SPOTIFY_RATE_BURST", "100000")
+    settings = Settings()
+    init_db(settings)
+    configure_response_cache(settings)
+    configure_governor(settings)
+    return settings
+
+
+@pytest.fixture
+def make_ctx(settings):
+    """Build a ``SpotifyContext`` for ``user_id`` around a ``FakeSpotify``."""
+
+    def make(sp: FakeSpotify, user_id: str = "u1") -> SpotifyContext:
+        return SpotifyContext(sp=sp, user_id=user_id, profile={"id": user_id, "display_name": user_id}, settings=settings)
+
+    return make
@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.budget import Budget, budget, budget_exhausted, charge_call
+from backend.executors import ContextThreadPoolExecutor
+
+
+def test_fan_out_threads_charge_one_budget_exactly():
+    allowance = Budget(calls=80_000)
+
+    def charge_many(_):
+        for _ in range(10_000):
+            charge_call()
+
+    with budget(allowance):
+        with ContextThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(charge_many, range(8)))
+        assert budget_exhausted()
+
+    assert allowance.calls_used == 80_000
+
+
+def test_threads_outside_the_context_charge_nothing():
+    allowance = Budget(calls=1)
+    with budget(allowance):
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(charge_call).result()
+        assert not budget_exhausted()
+    assert allowance.calls_used == 0
+
+
+def test_time_allowance_runs_out():
+    assert Budget(seconds=0).exhausted()
+    assert not Budget(seconds=60, calls=5).exhausted()
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from backend import cache as cache_module
+from backend import tasks
+from backend.cache import ResponseCache, get_response_cache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen ``time.time`` for the cache; advance it with ``clock[0] += seconds``."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_writes_past_the_byte_budget_evict_the_least_recently_used(clock):
+    # Each "xxxxxxxxxx" value serializes to 12 bytes: three fit, a fourth does not.
+    cache = ResponseCache(max_bytes=40)
+    for key in ("a", "b", "c"):
+        cache.set(key, "x" * 10)
+    cache.get("a")
+
+    cache.set("d", "x" * 10)
+
+    assert [key for key in "abcd" if cache.get(key)] == ["a", "c", "d"]
+    stats = cache.stats()
+    assert stats["bytes"] == 36
+    assert stats["namespaces"]["b"]["evictions"] == 1
+
+
+def test_entries_expire_after_their_namespace_ttl(clock):
+    cache = ResponseCache(max_bytes=1_000, namespace_ttls={"top_lists": 60})
+    cache.set("top_lists:u1", {"items": []})
+    cache.set("other:u1", {"items": []})
+
+    clock[0] += 90
+    assert cache.get("top_lists:u1") is None
+    # Namespaces without their own TTL get the 120 s default.
+    assert cache.get("other:u1") == {"items": []}
+    assert cache.stats()["namespaces"]["top_lists"]["misses"] == 1
+
+
+def test_expired_entries_are_reclaimed_before_live_ones(clock):
+    cache = ResponseCache(max_bytes=40, namespace_ttls={"old": 10})
+    cache.set("old:1", "x" * 10)
+    cache.set("live:1", "x" * 10)
+    cache.set("live:2", "x" * 10)
+    clock[0] += 30
+    # Kept until its space is needed, for outage fallbacks.
+    assert cache.last_known("old:1") == ("x" * 10, 30)
+
+    cache.set("live:3", "x" * 10)
+
+    assert cache.last_known("old:1") is None
+    assert all(cache.get(f"live:{i}") for i in (1, 2, 3))
+    assert cache.stats()["namespaces"]["old"]["expirations"] == 1
+
+
+def test_payloads_larger_than_the_budget_are_not_kept(clock):
+    cache = ResponseCache(max_bytes=40)
+    cache.set("small", "x" * 10)
+
+    assert cache.set("big", "x" * 100) == "x" * 100
+    assert cache.get("big") is None
+    assert cache.get("small") == "x" * 10
+
+
+def test_durable_tier_answers_other_workers_and_restarts(settings, clock):
+    first = ResponseCache(max_bytes=1_000, settings=settings)
+    first.set("overview:u1:short_term", {"tracks": 12})
+
+    # A second worker, or this one after a restart, starts with an empty memory tier.
+    second = ResponseCache(max_bytes=1_000, settings=settings)
+    assert second.get("overview:u1:short_term") == {"tracks": 12}
+    assert second.get("overview:u1:short_term") == {"tracks": 12}
+    counters = second.stats()["namespaces"]["overview"]
+    assert (counters["durable_hits"], counters["hits"], counters["misses"]) == (1, 1, 0)
+
+    second.invalidate("overview:u1:short_term")
+    assert ResponseCache(max_bytes=1_000, settings=settings).get("overview:u1:short_term") is None
+
+
+def test_expired_durable_rows_serve_outages_until_purged(settings, clock):
+    ResponseCache(max_bytes=1_000, settings=settings).set("playlists:u1", [{"id": "p1"}])
+    clock[0] += 3600
+
+    restarted = ResponseCache(max_bytes=1_000, settings=settings)
+    assert restarted.get("playlists:u1") is None
+    assert restarted.last_known("playlists:u1") == ([{"id": "p1"}], 3600)
+
+    assert restarted.purge_durable() == 1
+    assert restarted.last_known("playlists:u1") is None
+
+
+def test_stale_entry_is_served_at_once_while_one_rebuild_runs(settings):
+    cache = get_response_cache()
+    # Past its TTL, but inside the overview namespace's stale window.
+    cache.set("overview:u1:short_term", {"tracks": 1}, ttl=-1)
+    release = threading.Event()
+    builds = []
+
+    def build():
+        builds.append(threading.current_thread().name)
+        release.wait(5)
+        return {"tracks": 2}
+
+    served = [tasks._cached_flight("overview:u1:short_term", build) for _ in range(5)]
+    assert all(payload["stale"] and payload["tracks"] == 1 for payload in served)
+
+    release.set()
+    deadline = time.time() + 5
+    while cache.get("overview:u1:short_term") is None and time.time() < deadline:
+        time.sleep(0.01)
+    assert tasks._cached_flight("overview:u1:short_term", build) == {"tracks": 2}
+    assert len(builds) == 1 and builds[0].startswith("cache-refresh")
+
+
+def test_entries_without_a_stale_window_rebuild_in_the_request(settings):
+    get_response_cache().set("catalog:u1:a1", {"tracks": 1}, ttl=-1)
+
+    assert tasks._cached_flight("catalog:u1:a1", lambda: {"tracks": 2}) == {"tracks": 2}
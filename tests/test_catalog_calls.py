@@ -0,0 +1,60 @@
+import time
+
+from backend import tasks
+from tests.conftest import FakeSpotify
+
+
+def test_top_lists_skip_the_profile_call(make_ctx):
+    sp = FakeSpotify()
+
+    tasks.get_top_lists(make_ctx(sp), "short_term")
+
+    assert sp.calls == {"current_user_top_artists": 1, "current_user_top_tracks": 1}
+
+
+def test_catalog_store_serves_artists_across_users(make_ctx):
+    first, second = FakeSpotify(n_artists=120), FakeSpotify(n_artists=120)
+
+    cold = tasks.get_genre_breakdown(make_ctx(first, "u1"))
+    warm = tasks.get_genre_breakdown(make_ctx(second, "u2"))
+
+    # 120 artists in batches of 50 for the first user; the second finds them all stored.
+    assert first.calls["artists"] == 3
+    assert second.calls["artists"] == 0
+    assert sum(second.calls.values()) < sum(first.calls.values())
+    assert first.calls["me"] == second.calls["me"] == 0
+    assert warm["genres"] == cold["genres"]
+
+
+def serial_album_walk(sp: FakeSpotify, album_ids: list[str], library: set[str]) -> tuple[int, int]:
+    # The per-album album_tracks/next walk that catalog depth used before albums were batched.
+    total = saved = 0
+    for album_id in album_ids:
+        page = sp.album_tracks(album_id, limit=50)
+        while page:
+            track_ids = [track["id"] for track in page["items"]]
+            total += len(track_ids)
+            saved += sum(1 for tid in track_ids if tid in library)
+            page = sp.next(page) if page["next"] else None
+    return total, saved
+
+
+def test_catalog_depth_batches_album_tracklists(make_ctx):
+    # 60 albums, al0 with 60 tracks; liked records without album IDs force the tracklist path.
+    old_sp = FakeSpotify(n_tracks=500, n_albums=60, latency=0.02, album_ids=False)
+    new_sp = FakeSpotify(n_tracks=500, n_albums=60, latency=0.02, album_ids=False)
+    library = set(tasks._library_track_source(make_ctx(new_sp))["track_ids"])
+    new_sp.calls.clear()
+
+    started = time.perf_counter()
+    expected = serial_album_walk(old_sp, [f"al{i}" for i in range(60)], library)
+    serial_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    depth = tasks.get_artist_catalog_depth(make_ctx(new_sp), "a1")
+    batched_seconds = time.perf_counter() - started
+
+    assert (depth["total_tracks"], depth["saved_tracks_est"]) == expected == (768, 500)
+    assert old_sp.calls == {"album_tracks": 60, "next": 1}
+    # The artist, two listing pages, three 20-album batches and al0's tail page.
+    assert new_sp.calls == {"artists": 1, "artist_albums": 2, "albums": 3, "album_tracks": 1}
+    assert batched_seconds < serial_seconds / 2
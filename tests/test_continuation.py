@@ -0,0 +1,46 @@
+import pytest
+
+from backend import tasks
+from backend.budget import Budget
+from backend.cache import get_response_cache
+from tests.conftest import FakeSpotify
+
+
+@pytest.fixture
+def ctx(make_ctx):
+    # Liked records without album IDs make catalog depth scan tracklists, 20 albums per chunk.
+    ctx = make_ctx(FakeSpotify(n_tracks=500, n_albums=60, album_ids=False))
+    tasks._library_track_source(ctx)
+    return ctx
+
+
+def test_budgeted_slices_resume_to_the_unbudgeted_result(ctx):
+    cursor, slices = None, []
+    while True:
+        depth = tasks.get_artist_catalog_depth(ctx, "a1", allowance=Budget(calls=0), cursor=cursor)
+        slices.append(depth["albums_scanned"])
+        if depth["complete"]:
+            break
+        # Partial payloads are handed out, never cached.
+        assert get_response_cache().get("catalog:u1:a1") is None
+        cursor = depth["continuation"]
+
+    assert slices == [20, 40, 60]
+    assert depth["continuation"] is None
+    # The same totals as one unbudgeted scan (see test_catalog_depth_batches_album_tracklists).
+    assert (depth["total_tracks"], depth["saved_tracks_est"]) == (768, 500)
+    # The finished scan is cached, so the next budgeted call is complete at once.
+    assert tasks.get_artist_catalog_depth(ctx, "a1", allowance=Budget(calls=0))["complete"] is True
+
+
+def test_tokens_only_resume_their_own_scan(ctx):
+    partial = tasks.get_artist_catalog_depth(ctx, "a1", allowance=Budget(calls=0))
+    assert partial["complete"] is False
+
+    with pytest.raises(tasks.ContinuationExpired):
+        tasks.get_artist_catalog_depth(ctx, "a2", cursor=partial["continuation"])
+    with pytest.raises(tasks.ContinuationExpired):
+        tasks.get_artist_catalog_depth(ctx, "a1", cursor="unknown")
+    get_response_cache().invalidate(f"resume:u1:{partial['continuation']}")
+    with pytest.raises(tasks.ContinuationExpired):
+        tasks.get_artist_catalog_depth(ctx, "a1", cursor=partial["continuation"])
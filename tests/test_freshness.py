@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+
+from backend import tasks
+from backend.cache import get_response_cache
+from backend.db import get_playlist_last_changes, record_playlist_snapshots
+from tests.conftest import FakeSpotify
+
+
+class PlaylistAccount(FakeSpotify):
+    """A ``FakeSpotify`` owning playlists of ``added_at`` dates (oldest first), recording each track read."""
+
+    def __init__(self, playlists: dict[str, list[str]]) -> None:
+        super().__init__()
+        self.playlists = playlists
+        self.snapshots = {pid: 1 for pid in playlists}
+        self.reads: list[tuple[str, int]] = []
+
+    def current_user_playlists(self, limit: int = 50, offset: int = 0) -> dict:
+        self._call("current_user_playlists")
+        items = [
+            {
+                "id": pid,
+                "name": pid,
+                "owner": {"id": "u1"},
+                "snapshot_id": f"{pid}-{self.snapshots[pid]}",
+                "tracks": {"total": len(dates)},
+            }
+            for pid, dates in self.playlists.items()
+        ]
+        return self._page(items, limit, offset)
+
+    def playlist_tracks(self, playlist_id: str, fields=None, limit: int = 100, offset: int = 0) -> dict:
+        self._call("playlist_tracks")
+        self.reads.append((playlist_id, offset))
+        return self._page([{"added_at": date} for date in self.playlists[playlist_id]], limit, offset)
+
+
+def day(n: int) -> str:
+    return f"2024-01-{n:02d}T00:00:00Z"
+
+
+def test_one_tail_read_per_playlist_then_none_until_it_changes(make_ctx):
+    sp = PlaylistAccount({"long": [day(1)] * 240 + [day(9), day(3)], "short": [day(2), day(5)], "empty": []})
+    ctx = make_ctx(sp)
+
+    rows = {row["id"]: row for row in tasks.get_playlist_freshness(ctx)["playlists"]}
+    # The newest addition sits on the tail page; empty playlists need no read at all.
+    assert sorted(sp.reads) == [("long", 142), ("short", 0)]
+    assert rows["long"]["last_added_at"].startswith("2024-01-09")
+    assert rows["empty"]["last_added_at"] is None
+
+    get_response_cache().invalidate("playlist_freshness:u1")
+    sp.reads.clear()
+    tasks.get_playlist_freshness(ctx)
+    assert sp.reads == []
+
+    # Liked a moment after the first scan observed the playlist.
+    added = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(seconds=2)
+    sp.playlists["short"].append(added.isoformat().replace("+00:00", "Z"))
+    sp.snapshots["short"] += 1
+    tasks._forget_playlists("u1")
+    get_response_cache().invalidate("playlist_freshness:u1")
+    rows = {row["id"]: row for row in tasks.get_playlist_freshness(ctx)["playlists"]}
+    assert sp.reads == [("short", 0)]
+    assert rows["short"]["last_added_at"] == added.isoformat()
+
+
+def test_history_dates_the_last_track_count_change(settings):
+    record_playlist_snapshots(settings, [("p1", "s1", 10), ("p2", "s1", 4)], 100.0)
+    record_playlist_snapshots(settings, [("p1", "s2", 10), ("p2", "s1", 4)], 200.0)  # p1 renamed
+    record_playlist_snapshots(settings, [("p1", "s3", 12)], 300.0)
+    record_playlist_snapshots(settings, [("p1", "s4", 12), ("p1", "s3", 12)], 400.0)
+
+    # p1's count changed between the observations at 200 and 300; p2 never changed.
+    assert get_playlist_last_changes(settings, ["p1", "p2", "p3"]) == {"p1": (300.0, 200.0)}
+
+
+def test_last_activity_prefers_an_addition_that_explains_the_change():
+    changed_at, previous_seen_at = datetime(2024, 3, 10, tzinfo=timezone.utc), datetime(2024, 3, 1, tzinfo=timezone.utc)
+    observed = (changed_at.timestamp(), previous_seen_at.timestamp())
+    added = datetime(2024, 3, 5, tzinfo=timezone.utc)
+    older = datetime(2024, 2, 1, tzinfo=timezone.utc)
+
+    assert tasks._last_activity(added, None) == added
+    assert tasks._last_activity(added, observed) == added
+    # The newest addition predates the change, so the change was a removal, dated when seen.
+    assert tasks._last_activity(older, observed) == changed_at
+    assert tasks._last_activity(None, observed) == changed_at
@@ -0,0 +1,73 @@
+import pytest
+
+from backend import governor
+from backend.governor import BULK, RateGovernor
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen ``time.time`` for the governor; advance it with ``clock[0] += seconds``."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(governor.time, "time", lambda: now[0])
+    return now
+
+
+def make(tmp_path, **kwargs) -> RateGovernor:
+    options = {"max_rate": 10.0, "burst": 3.0, "max_concurrency": 4}
+    return RateGovernor(str(tmp_path / "governor.db"), **{**options, **kwargs})
+
+
+def test_bucket_spends_the_burst_then_waits_for_a_refill(tmp_path, clock):
+    gov = make(tmp_path, max_rate=2.0)
+    for _ in range(3):
+        gov.release(gov.acquire(deadline=clock[0]))
+
+    with pytest.raises(TimeoutError):
+        gov.acquire(deadline=clock[0] + 0.4)
+    clock[0] += 0.5
+    gov.release(gov.acquire(deadline=clock[0]))
+    assert gov.stats()["granted_total"] == 4
+
+
+def test_workers_share_one_bucket_through_the_state_file(tmp_path, clock):
+    first, second = make(tmp_path), make(tmp_path)
+    for gov in (first, second, first):
+        gov.release(gov.acquire(deadline=clock[0]))
+
+    with pytest.raises(TimeoutError):
+        second.acquire(deadline=clock[0])
+
+
+def test_throttle_halves_once_per_window_and_successes_grow_back(tmp_path, clock):
+    gov = make(tmp_path, burst=100.0)
+    permits = [gov.acquire(deadline=clock[0]) for _ in range(2)]
+    # Two 429s from the same burst.
+    for lease_id in permits:
+        gov.release(lease_id, throttled=True, retry_after=2.0)
+
+    stats = gov.stats()
+    assert (stats["rate_per_second"], stats["concurrency_limit"], stats["throttled_total"]) == (5.0, 2, 2)
+    assert stats["blocked_for_seconds"] == 2.0
+    with pytest.raises(TimeoutError):
+        gov.acquire(deadline=clock[0] + 1.0)
+
+    clock[0] += 20.0
+    for _ in range(4):
+        with gov.permit():
+            pass
+    stats = gov.stats()
+    assert stats["rate_per_second"] == 5.2
+    assert stats["concurrency_limit"] == 3
+
+
+def test_bulk_callers_leave_the_bottom_of_the_bucket_to_interactive_ones(tmp_path, clock):
+    gov = make(tmp_path, burst=10.0, max_concurrency=10)
+    # The bulk floor is 1 + 10 * (1 - 0.5) = 6 tokens.
+    for _ in range(5):
+        gov.release(gov.acquire(BULK, deadline=clock[0]))
+    with pytest.raises(TimeoutError):
+        gov.acquire(BULK, deadline=clock[0])
+
+    for _ in range(5):
+        gov.release(gov.acquire(deadline=clock[0]))
+    assert gov.stats()["granted_total"] == 10
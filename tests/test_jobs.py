@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+from backend.db import claim_job, fail_abandoned_jobs, get_job, update_job
+from backend.jobs import MAX_ATTEMPTS, LeaseLost, _ProgressWriter, run_held_job, submit_job
+
+
+def test_a_user_has_one_active_job_per_kind(settings):
+    first = submit_job(settings, "u1", "liked", {})
+
+    assert submit_job(settings, "u1", "liked", {})["job_id"] == first["job_id"]
+    assert submit_job(settings, "u1", "vaulted", {})["job_id"] != first["job_id"]
+    assert submit_job(settings, "u2", "liked", {})["job_id"] != first["job_id"]
+
+
+def test_concurrent_workers_never_claim_the_same_job(settings):
+    submitted = {submit_job(settings, f"u{i}", "liked", {})["job_id"] for i in range(5)}
+    barrier = threading.Barrier(8)
+    claimed = []
+
+    def work(worker: int) -> None:
+        barrier.wait()
+        while job := claim_job(settings, f"w{worker}", time.time(), 60, MAX_ATTEMPTS):
+            claimed.append(job["job_id"])
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(submitted)
+
+
+def test_expired_leases_are_reclaimed_until_attempts_run_out(settings):
+    job_id = submit_job(settings, "u1", "liked", {})["job_id"]
+    now = time.time()
+    assert claim_job(settings, "w1", now, 60, MAX_ATTEMPTS)["attempts"] == 1
+    assert claim_job(settings, "w2", now + 30, 60, MAX_ATTEMPTS) is None
+
+    # w1 died: once its lease lapses another worker takes over, and w1 can no longer write.
+    taken = claim_job(settings, "w2", now + 61, 60, MAX_ATTEMPTS)
+    assert (taken["job_id"], taken["worker_id"], taken["attempts"]) == (job_id, "w2", 2)
+    with pytest.raises(LeaseLost):
+        _ProgressWriter(settings, job_id, "w1")("writing", 1, 2)
+    assert update_job(settings, job_id, now + 62, worker_id="w2", phase="writing")
+
+    assert claim_job(settings, "w3", now + 122, 60, MAX_ATTEMPTS)["attempts"] == MAX_ATTEMPTS
+    assert claim_job(settings, "w4", now + 183, 60, MAX_ATTEMPTS) is None
+    assert fail_abandoned_jobs(settings, now + 183, MAX_ATTEMPTS, "Worker stopped responding.") == 1
+    assert get_job(settings, job_id)["state"] == "failed"
+
+
+def test_held_jobs_exclude_the_users_own_submits(settings):
+    def run(progress):
+        progress("writing", 0, 1)
+        return submit_job(settings, "u1", "liked", {})
+
+    job = run_held_job(settings, "u1", "liked", {}, "scheduler", run)
+
+    # The submit made during the run found the held job instead of queueing a second one.
+    assert job["result"]["job_id"] == job["job_id"]
+    assert get_job(settings, job["job_id"])["state"] == "done"
+    assert claim_job(settings, "w1", time.time(), 60, MAX_ATTEMPTS) is None
@@ -0,0 +1,107 @@
+from backend.budget import Budget, budget
+from backend.db import count_saved_tracks, get_saved_tracks, get_saved_tracks_state
+from backend.library import sync_saved_tracks
+
+
+class LikedSongs:
+    """Liked Songs as the saved-tracks endpoint pages them: newest first."""
+
+    def __init__(self, n: int) -> None:
+        # Newest first: t{n-1} was liked last.
+        self.items = [self.item(i) for i in reversed(range(n))]
+        self.reads = 0
+
+    @staticmethod
+    def item(i: int, track_id: str | None = "") -> dict:
+        tid = f"t{i}" if track_id == "" else track_id
+        return {
+            "added_at": f"2024-01-01T{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}Z",
+            "track": {"id": tid, "artists": [{"id": f"a{i % 7}"}], "album": {"id": f"al{i % 5}"}} if tid else None,
+        }
+
+    def like(self, i: int) -> None:
+        self.items.insert(0, self.item(i))
+
+    def unlike(self, track_id: str) -> None:
+        self.items = [it for it in self.items if (it.get("track") or {}).get("id") != track_id]
+
+    def fetch_page(self, offset: int, limit: int) -> dict:
+        self.reads += 1
+        return {"items": self.items[offset:offset + limit], "total": len(self.items)}
+
+
+def stored_ids(settings, user_id="u1"):
+    return [entry[0] for entry in get_saved_tracks(settings, user_id)]
+
+
+def test_resumed_load_starts_over_when_unlikes_shift_the_list(settings):
+    liked = LikedSongs(400)
+    with budget(Budget(calls=0)):
+        assert sync_saved_tracks(settings, "u1", liked.fetch_page)["complete"] is False
+
+    # Unliking the first page moves every later track up by 50 offsets.
+    for i in range(399, 349, -1):
+        liked.unlike(f"t{i}")
+    result = sync_saved_tracks(settings, "u1", liked.fetch_page)
+
+    assert result["complete"] is True
+    assert result["gap"] == 0
+    assert sorted(stored_ids(settings)) == sorted(f"t{i}" for i in range(350))
+
+
+def test_unshifted_resume_carries_on_and_next_sync_reconciles_a_swap(settings):
+    liked = LikedSongs(400)
+    with budget(Budget(calls=0)):
+        sync_saved_tracks(settings, "u1", liked.fetch_page)
+
+    # One like and one unlike above the boundary cancel out, so the load resumes in place.
+    liked.unlike("t399")
+    liked.like(400)
+    reads = liked.reads
+    assert sync_saved_tracks(settings, "u1", liked.fetch_page)["complete"] is True
+    # The head page, the boundary check and the seven remaining pages.
+    assert liked.reads - reads == 9
+
+    assert sync_saved_tracks(settings, "u1", liked.fetch_page)["mode"] == "reconcile"
+    assert sorted(stored_ids(settings)) == sorted(f"t{i}" for i in range(401) if i != 399)
+
+
+def test_tracks_without_ids_are_counted_not_treated_as_a_gap(settings):
+    liked = LikedSongs(120)
+    liked.items.insert(10, LikedSongs.item(5000, track_id=None))
+
+    result = sync_saved_tracks(settings, "u1", liked.fetch_page)
+
+    assert result["gap"] == 0
+    assert count_saved_tracks(settings, "u1") == 120
+    assert get_saved_tracks_state(settings, "u1")["unindexed"] == 1
+
+
+def test_incremental_sync_reads_only_until_the_watermark(settings):
+    liked = LikedSongs(400)
+    assert sync_saved_tracks(settings, "u1", liked.fetch_page)["mode"] == "full"
+
+    for i in range(400, 470):
+        liked.like(i)
+    reads = liked.reads
+    result = sync_saved_tracks(settings, "u1", liked.fetch_page)
+
+    # 70 new tracks span the first page and part of the second, where the watermark is reached.
+    assert (result["mode"], result["new"], result["pages"]) == ("incremental", 70, 2)
+    assert liked.reads - reads == 2
+    assert count_saved_tracks(settings, "u1") == 470
+    assert get_saved_tracks_state(settings, "u1")["watermark"] == LikedSongs.item(469)["added_at"]
+
+
+def test_unlikes_below_the_head_trigger_a_reconcile(settings):
+    liked = LikedSongs(400)
+    sync_saved_tracks(settings, "u1", liked.fetch_page)
+
+    for track_id in ("t3", "t150", "t151"):
+        liked.unlike(track_id)
+    result = sync_saved_tracks(settings, "u1", liked.fetch_page)
+
+    assert result["mode"] == "reconcile"
+    assert result["gap"] == 0
+    assert sorted(stored_ids(settings)) == sorted(f"t{i}" for i in range(400) if i not in (3, 150, 151))
+    assert sync_saved_tracks(settings, "u1", liked.fetch_page)["mode"] == "incremental"
@@ -0,0 +1,31 @@
+import time
+
+from backend import tasks
+from tests.conftest import FakeSpotify
+
+
+def serial_walk(sp: FakeSpotify) -> list[dict]:
+    # One page after another, as liked songs were read before offsets were fetched concurrently.
+    items, offset = [], 0
+    while True:
+        page = tasks._backoff(sp.current_user_saved_tracks, limit=50, offset=offset)
+        items.extend(page["items"])
+        if not page["next"]:
+            return items
+        offset += 50
+
+
+def test_concurrent_offsets_cut_wall_clock_without_extra_calls(settings):
+    # 40 pages at 20 ms each: 0.8 s one after another.
+    serial_sp, parallel_sp = FakeSpotify(n_tracks=2000, latency=0.02), FakeSpotify(n_tracks=2000, latency=0.02)
+
+    started = time.perf_counter()
+    expected = serial_walk(serial_sp)
+    serial_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    items = tasks._paginate(parallel_sp.current_user_saved_tracks, page_size=50)
+    parallel_seconds = time.perf_counter() - started
+
+    assert items == expected
+    assert parallel_sp.calls == serial_sp.calls == {"current_user_saved_tracks": 40}
+    assert parallel_seconds < serial_seconds / 3
@@ -0,0 +1,79 @@
+import random
+
+from backend.playlist_edits import apply_playlist_edits, plan_playlist_edits, replace_cost, replace_playlist
+
+
+class FakePlaylist:
+    """A single playlist applying edits with Spotify's position semantics."""
+
+    def __init__(self, items: list[str]) -> None:
+        self.items = list(items)
+        self.calls = 0
+
+    def playlist_remove_specific_occurrences_of_items(self, playlist_id, items, snapshot_id=None):
+        self.calls += 1
+        positions = sorted((p for item in items for p in item["positions"]), reverse=True)
+        for pos in positions:
+            assert self.items[pos] == next(i["uri"] for i in items if pos in i["positions"])
+            del self.items[pos]
+        return {"snapshot_id": f"s{self.calls}"}
+
+    def playlist_reorder_items(self, playlist_id, range_start, insert_before, snapshot_id=None):
+        self.calls += 1
+        moved = self.items.pop(range_start)
+        self.items.insert(insert_before - 1 if range_start < insert_before else insert_before, moved)
+        return {"snapshot_id": f"s{self.calls}"}
+
+    def playlist_add_items(self, playlist_id, items, position=None):
+        self.calls += 1
+        assert len(items) <= 100
+        if position is None:
+            position = len(self.items)
+        self.items[position:position] = items
+        return {"snapshot_id": f"s{self.calls}"}
+
+    def playlist_replace_items(self, playlist_id, items):
+        self.calls += 1
+        assert len(items) <= 100
+        self.items = list(items)
+        return {"snapshot_id": f"s{self.calls}"}
+
+
+def _direct(fn, *args, **kwargs):
+    return fn(*args, **kwargs)
+
+
+def test_single_new_track_is_one_insert():
+    current = [f"t{i}" for i in range(500)]
+    desired = ["new"] + current
+
+    assert plan_playlist_edits(current, desired) == [{"op": "insert", "position": 0, "items": ["new"]}]
+
+
+def test_randomized_plans_reach_the_desired_order():
+    rng = random.Random(16)
+    for _ in range(3000):
+        pool = [f"t{i}" for i in range(rng.randint(1, 400))]
+        current = rng.sample(pool, rng.randint(0, len(pool)))
+        desired = list(current)
+        for _ in range(rng.randint(0, 6)):
+            edit = rng.choice(("add", "remove", "move", "duplicate"))
+            if edit == "add":
+                fresh = [t for t in pool if t not in desired]
+                if fresh:
+                    desired.insert(rng.randint(0, len(desired)), rng.choice(fresh))
+            elif edit == "remove" and desired:
+                desired.pop(rng.randrange(len(desired)))
+            elif edit == "move" and desired:
+                desired.insert(rng.randint(0, len(desired) - 1), desired.pop(rng.randrange(len(desired))))
+            elif edit == "duplicate" and current:
+                current.insert(rng.randint(0, len(current)), rng.choice(current))
+
+        ops = plan_playlist_edits(current, desired)
+        playlist = FakePlaylist(current)
+        if ops is None:
+            replace_playlist(playlist, "p", desired, _direct)
+        else:
+            apply_playlist_edits(playlist, "p", ops, _direct)
+        assert playlist.items == desired
+        assert playlist.calls <= replace_cost(len(desired))
@@ -0,0 +1,141 @@
+import time
+
+import pytest
+from spotipy.exceptions import SpotifyException
+
+from backend import tasks
+from backend.cache import configure_response_cache, get_response_cache
+from backend.config import Settings
+from backend.executors import current_workload
+from backend.governor import get_governor
+from backend.retry import RetryBudgetExceeded, RetryPolicy, current_deadline, deadline, is_rate_limited
+from tests.conftest import FakeSpotify
+
+
+class UnavailableSpotify(FakeSpotify):
+    def current_user_playlists(self, limit: int = 50, offset: int = 0) -> dict:
+        self._call("current_user_playlists")
+        raise SpotifyException(503, -1, "Service unavailable", headers={"content-type": "text/plain"})
+
+
+@pytest.fixture
+def single_attempt(monkeypatch):
+    monkeypatch.setitem(tasks._RETRY_POLICIES, current_workload(), RetryPolicy(max_attempts=1))
+
+
+@pytest.mark.parametrize("durable", ["true", "false"])
+def test_outage_serves_expired_list_payload(settings, make_ctx, single_attempt, monkeypatch, durable):
+    monkeypatch.setenv("CACHE_DURABLE", durable)
+    cache = configure_response_cache(Settings())
+    playlists = [{"id": "p1", "name": "One", "snapshot_id": "s1", "owner": {"id": "u1"}, "tracks": {"total": 3}}]
+    cache.set("playlists:u1", playlists, ttl=-1)
+
+    assert tasks._all_user_playlists(make_ctx(UnavailableSpotify())) == playlists
+
+
+@pytest.mark.parametrize("durable", ["true", "false"])
+def test_outage_marks_expired_dict_payload_stale(settings, monkeypatch, durable):
+    monkeypatch.setenv("CACHE_DURABLE", durable)
+    cache = configure_response_cache(Settings())
+    cache.set("overview:u1:short_term", {"counts": {"playlists_total": 4}}, ttl=-10_000)
+
+    def build():
+        raise RetryBudgetExceeded("Spotify is down")
+
+    served = tasks._cached_flight("overview:u1:short_term", build)
+
+    assert served["counts"] == {"playlists_total": 4}
+    assert served["stale"] is True
+    assert served["age_seconds"] >= 0
+
+
+def test_outage_without_any_copy_raises(settings):
+    def build():
+        raise RetryBudgetExceeded("Spotify is down")
+
+    with pytest.raises(RetryBudgetExceeded):
+        tasks._cached_flight("overview:u1:long_term", build)
+    assert get_response_cache().last_known("overview:u1:long_term") is None
+
+
+def failing(*errors):
+    """A call that raises ``errors`` in turn, then returns ``"ok"``; ``calls`` counts attempts."""
+    pending = list(errors)
+
+    def call():
+        call.calls += 1
+        if pending:
+            raise pending.pop(0)
+        return "ok"
+
+    call.calls = 0
+    return call
+
+
+def outage() -> SpotifyException:
+    return SpotifyException(503, -1, "Service unavailable", headers={"content-type": "text/plain"})
+
+
+def rate_limit(retry_after: int) -> SpotifyException:
+    return SpotifyException(429, -1, "Too many requests", headers={"Retry-After": str(retry_after)})
+
+
+def test_transient_failures_are_retried_until_the_call_succeeds():
+    call = failing(outage(), outage())
+    retries = []
+
+    assert RetryPolicy(max_attempts=3, base_delay=0.01).run(call, on_retry=lambda *args: retries.append(args)) == "ok"
+    assert call.calls == 3
+    assert [attempt for _, attempt, _ in retries] == [1, 2]
+
+
+def test_attempts_and_non_retryable_errors_stop_the_loop():
+    call = failing(outage(), outage(), outage())
+    with pytest.raises(RetryBudgetExceeded):
+        RetryPolicy(max_attempts=2, base_delay=0.01).run(call)
+    assert call.calls == 2
+
+    missing = failing(SpotifyException(404, -1, "Not found"))
+    with pytest.raises(SpotifyException):
+        RetryPolicy(max_attempts=4, base_delay=0.01).run(missing)
+    assert missing.calls == 1
+
+
+def test_no_wait_starts_that_would_end_past_the_deadline():
+    call = failing(rate_limit(30))
+    started = time.time()
+
+    with deadline(1.0):
+        with pytest.raises(RetryBudgetExceeded) as raised:
+            RetryPolicy(max_attempts=4).run(call)
+
+    assert call.calls == 1
+    assert raised.value.retry_after == 30
+    assert time.time() - started < 0.5
+
+
+def test_nested_deadlines_only_tighten():
+    with deadline(1.0):
+        outer = current_deadline()
+        with deadline(60.0):
+            assert current_deadline() == outer
+        with deadline(0.1):
+            assert current_deadline() < outer
+    assert current_deadline() is None
+
+
+def test_headerless_429_after_server_errors_is_not_a_rate_limit():
+    assert is_rate_limited(rate_limit(1))
+    assert is_rate_limited(SpotifyException(429, -1, "Max Retries", reason="too many 429 error responses"))
+    assert not is_rate_limited(SpotifyException(429, -1, "Max Retries", reason="too many 503 error responses"))
+
+
+def test_governor_pause_past_the_deadline_fails_fast(settings):
+    sp = FakeSpotify()
+    with get_governor().permit() as permit:
+        permit.throttled(30.0)
+
+    with deadline(1.0):
+        with pytest.raises(RetryBudgetExceeded):
+            tasks._backoff(sp.me)
+    assert sp.calls["me"] == 0
@@ -0,0 +1,37 @@
+import threading
+import time
+
+from backend import scheduler
+
+
+def test_concurrent_triggers_start_one_run(settings, monkeypatch):
+    release = threading.Event()
+    runs = []
+
+    def run_locked(settings, weights):
+        runs.append(threading.current_thread().name)
+        release.wait(5)
+        return {}
+
+    monkeypatch.setattr(scheduler, "_run_locked", run_locked)
+    barrier = threading.Barrier(8)
+    started = []
+
+    def trigger():
+        barrier.wait()
+        started.append(scheduler.start_nightly(settings))
+
+    threads = [threading.Thread(target=trigger) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert started.count(True) == 1
+    assert scheduler.scheduler_running()
+    release.set()
+    deadline = time.time() + 5
+    while scheduler.scheduler_running() and time.time() < deadline:
+        time.sleep(0.01)
+    assert not scheduler.scheduler_running()
+    assert runs == ["scheduler-run"]
@@ -0,0 +1,102 @@
+from backend import tasks
+from tests.conftest import FakeSpotify
+
+
+class VaultAccount(FakeSpotify):
+    """A ``FakeSpotify`` that also owns playlists, each with a snapshot bumped on every write."""
+
+    def __init__(self, playlists: dict[str, list[str]], n_tracks: int = 20) -> None:
+        super().__init__(n_tracks=n_tracks)
+        self.playlists = {"vault": [], **playlists}
+        self.descriptions: dict[str, str] = {}
+        self.snapshots = {pid: 0 for pid in self.playlists}
+
+    def edit(self, playlist_id: str) -> dict:
+        self.snapshots[playlist_id] += 1
+        return {"snapshot_id": f"{playlist_id}-{self.snapshots[playlist_id]}"}
+
+    def current_user_playlists(self, limit: int = 50, offset: int = 0) -> dict:
+        self._call("current_user_playlists")
+        items = [
+            {
+                "id": pid,
+                "name": "_vaulted" if pid == "vault" else pid,
+                "description": self.descriptions.get(pid, ""),
+                "owner": {"id": "u1"},
+                "snapshot_id": f"{pid}-{self.snapshots[pid]}",
+                "tracks": {"total": len(tracks)},
+            }
+            for pid, tracks in self.playlists.items()
+        ]
+        return self._page(items, limit, offset)
+
+    def playlist_tracks(self, playlist_id: str, fields=None, limit: int = 100, offset: int = 0) -> dict:
+        self._call("playlist_tracks")
+        items = [{"added_at": "2024-01-01T00:00:00Z", "track": {"id": tid}} for tid in self.playlists[playlist_id]]
+        return self._page(items, limit, offset)
+
+    def playlist_change_details(self, playlist_id: str, description: str = "") -> dict:
+        self._call("playlist_change_details")
+        self.descriptions[playlist_id] = description
+        return self.edit(playlist_id)
+
+    def playlist_add_items(self, playlist_id: str, items: list[str], position=None) -> dict:
+        self._call("playlist_add_items")
+        self.playlists[playlist_id] += items
+        return self.edit(playlist_id)
+
+    def playlist_remove_all_occurrences_of_items(self, playlist_id: str, items: list[str], snapshot_id=None) -> dict:
+        self._call("playlist_remove_all_occurrences_of_items")
+        self.playlists[playlist_id] = [tid for tid in self.playlists[playlist_id] if tid not in items]
+        return self.edit(playlist_id)
+
+    def expected_vault(self) -> set[str]:
+        sources = [tracks for pid, tracks in self.playlists.items() if pid != "vault"]
+        return {tid for tracks in sources for tid in tracks} | {f"t{i}" for i in range(self.n_tracks)}
+
+
+def test_unchanged_sources_are_not_reread(make_ctx):
+    sp = VaultAccount({"p1": ["x1", "x2"], "p2": ["x3", "t0"]})
+    ctx = make_ctx(sp)
+    first = tasks.run_vaulted_add(ctx)
+    assert set(sp.playlists["vault"]) == sp.expected_vault()
+    assert first["added"] == 23
+
+    sp.calls.clear()
+    again = tasks.run_vaulted_add(ctx)
+
+    assert (again["added"], again["removed"], again["sources_changed"]) == (0, 0, 0)
+    assert sp.calls["playlist_tracks"] == 0
+
+
+def test_a_track_leaves_the_vault_only_with_its_last_source(make_ctx):
+    sp = VaultAccount({"p1": ["x1", "shared"], "p2": ["x2", "shared"]})
+    ctx = make_ctx(sp)
+    tasks.run_vaulted_add(ctx)
+
+    sp.playlists["p1"].remove("shared")
+    sp.edit("p1")
+    sp.calls.clear()
+    one_left = tasks.run_vaulted_add(ctx)
+    assert (one_left["removed"], one_left["sources_changed"]) == (0, 1)
+    # Only the edited source is read again.
+    assert sp.calls["playlist_tracks"] == 1
+    assert "shared" in sp.playlists["vault"]
+
+    del sp.playlists["p2"]
+    gone = tasks.run_vaulted_add(ctx)
+    assert gone["removed"] == 2
+    assert set(sp.playlists["vault"]) == sp.expected_vault()
+
+
+def test_edits_made_outside_the_app_fall_back_to_a_full_diff(make_ctx):
+    sp = VaultAccount({"p1": ["x1"]})
+    ctx = make_ctx(sp)
+    tasks.run_vaulted_add(ctx)
+
+    sp.playlists["vault"].append("stray")
+    sp.edit("vault")
+    result = tasks.run_vaulted_add(ctx)
+
+    assert (result["added"], result["removed"]) == (0, 1)
+    assert set(sp.playlists["vault"]) == sp.expected_vault()
@@ -37,9 +37,53 @@ export async function fetchMe(): Promise<{ spotify_user_id: string; display_name
   return resp.json();
 }
 
+export type JobState = "queued" | "running" | "done" | "failed";
+
+export interface Job<TResult = unknown> {
+  job_id: string;
+  kind: string;
+  script: string;
+  state: JobState;
+  phase: string;
+  progress: { done?: number; total?: number };
+  result: TResult | null;
+  error: string | null;
+  created_at: number;
+  started_at: number | null;
+  finished_at: number | null;
+  queue_position: number;
+  throughput: { running: number; finished_last_hour: number; avg_seconds: number | null };
+}
+
+export async function fetchJob<TResult = unknown>(jobId: string): Promise<Job<TResult>> {
+  const token = getSessionToken();
+  const resp = await fetch(`${API_BASE}/jobs/${encodeURIComponent(jobId)}`, {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  if (!resp.ok) throw new Error(`Job status fetch failed: ${resp.status}`);
+  const data = await resp.json();
+  return data.job;
+}
+
+/** Poll a queued run until it finishes; `onProgress` sees every status read. */
+export async function waitForJob<TResult = unknown>(
+  jobId: string,
+  onProgress?: (job: Job<TResult>) => void,
+  intervalMs = 1000,
+): Promise<Job<TResult>> {
+  for (;;) {
+    const job = await fetchJob<TResult>(jobId);
+    onProgress?.(job);
+    if (job.state === "done") return job;
+    if (job.state === "failed") throw new Error(job.error || "Run failed.");
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
+
 export async function runScript(
   script: "vaulted" | "liked",
   payload?: { target_playlist_id?: string; target_playlist_name?: string },
+  onProgress?: (job: Job) => void,
 ): Promise<unknown> {
   const token = getSessionToken();
   const path = script === "vaulted" ? "/run/vaulted" : "/run/liked";
@@ -55,7 +99,9 @@ export async function runScript(
     const text = await resp.text();
     throw new Error(text || `Run failed: ${resp.status}`);
   }
-  return resp.json();
+  const { job_id } = await resp.json();
+  const job = await waitForJob(job_id, onProgress);
+  return { ok: true, script: job.script, result: job.result };
 }
 
 export async function fetchAutomationTargets(): Promise<{
@@ -311,6 +357,26 @@ export async function searchArtists(q: string): Promise<{
   return resp.json();
 }
 
+/**
+ * GET a stats endpoint that may answer a slice at a time (`complete: false`),
+ * following each `continuation` token until the scan is complete.
+ */
+async function fetchResumable<T>(path: string, label: string): Promise<T> {
+  const token = getSessionToken();
+  let cursor: string | null = null;
+  for (;;) {
+    const sep = path.includes("?") ? "&" : "?";
+    const url = cursor ? `${API_BASE}${path}${sep}cursor=${encodeURIComponent(cursor)}` : `${API_BASE}${path}`;
+    const resp = await fetch(url, {
+      headers: { Authorization: `Bearer ${token}` },
+    });
+    if (!resp.ok) throw new Error(`${label} fetch failed: ${resp.status}`);
+    const body = await resp.json();
+    if (body.data?.complete !== false) return body;
+    cursor = body.data.continuation;
+  }
+}
+
 export async function fetchArtistCatalog(artistId: string): Promise<{
   ok: boolean;
   data: {
@@ -331,28 +397,21 @@ export async function fetchArtistCatalog(artistId: string): Promise<{
     }>;
   };
 }> {
-  const token = getSessionToken();
-  const resp = await fetch(`${API_BASE}/stats/artist-catalog?artist_id=${encodeURIComponent(artistId)}`, {
-    headers: { Authorization: `Bearer ${token}` },
-  });
-  if (!resp.ok) throw new Error(`Artist catalog fetch failed: ${resp.status}`);
-  return resp.json();
+  return fetchResumable(`/stats/artist-catalog?artist_id=${encodeURIComponent(artistId)}`, "Artist catalog");
 }
 
-export async function fetchGenreBreakdown(): Promise<{
+/** With `approximate`, large libraries are estimated from a sample (with 95% intervals). */
+export async function fetchGenreBreakdown(approximate = false): Promise<{
   ok: boolean;
   data: {
-    genres: Array<{ genre: string; count: number; pct: number }>;
+    genres: Array<{ genre: string; count: number; pct: number; count_ci?: [number, number]; pct_ci?: [number, number] }>;
+    approximate: boolean;
+    sample_size?: number;
     total_artists: number;
     songs_scanned: number;
   };
 }> {
-  const token = getSessionToken();
-  const resp = await fetch(`${API_BASE}/stats/genre-breakdown`, {
-    headers: { Authorization: `Bearer ${token}` },
-  });
-  if (!resp.ok) throw new Error(`Genre breakdown fetch failed: ${resp.status}`);
-  return resp.json();
+  return fetchResumable(`/stats/genre-breakdown${approximate ? "?approximate=true" : ""}`, "Genre breakdown");
 }
 
 export async function fetchMoodTimeline(): Promise<{
@@ -406,31 +465,29 @@ export async function fetchPlaylistFreshness(): Promise<{
     };
   };
 }> {
-  const token = getSessionToken();
-  const resp = await fetch(`${API_BASE}/stats/playlist-freshness`, {
-    headers: { Authorization: `Bearer ${token}` },
-  });
-  if (!resp.ok) throw new Error(`Playlist freshness fetch failed: ${resp.status}`);
-  return resp.json();
+  return fetchResumable("/stats/playlist-freshness", "Playlist freshness");
+}
+
+export interface ArchiveStaleResult {
+  threshold: number;
+  prefix: string;
+  archived_count: number;
+  archived: Array<{
+    id: string;
+    old_name: string;
+    new_name: string;
+    freshness_score: number;
+  }>;
 }
 
 export async function runArchiveStale(
   maxFreshnessScore: number,
   prefix = "[Archive]",
+  onProgress?: (job: Job<ArchiveStaleResult>) => void,
 ): Promise<{
   ok: boolean;
   script: string;
-  result: {
-    threshold: number;
-    prefix: string;
-    archived_count: number;
-    archived: Array<{
-      id: string;
-      old_name: string;
-      new_name: string;
-      freshness_score: number;
-    }>;
-  };
+  result: ArchiveStaleResult;
 }> {
   const token = getSessionToken();
   const resp = await fetch(`${API_BASE}/run/archive-stale`, {
@@ -445,7 +502,9 @@ export async function runArchiveStale(
     const text = await resp.text();
     throw new Error(text || `Archive stale run failed: ${resp.status}`);
   }
-  return resp.json();
+  const { job_id } = await resp.json();
+  const job = await waitForJob<ArchiveStaleResult>(job_id, onProgress);
+  return { ok: true, script: job.script, result: job.result as ArchiveStaleResult };
 }
 
 export function captureSessionTokenFromUrl(): boolean {
@@ -139,7 +139,9 @@ type CatalogData = {
 };
 
 type GenreBreakdown = {
-  genres: Array<{ genre: string; count: number; pct: number }>;
+  genres: Array<{ genre: string; count: number; pct: number; count_ci?: [number, number] }>;
+  approximate?: boolean;
+  sample_size?: number;
   total_artists: number;
   songs_scanned: number;
   source?: "vaulted_playlist" | "liked_songs";
@@ -284,7 +286,7 @@ export default function Dashboard() {
       .finally(() => setLoadingPattern(false));
 
     setLoadingGenreBreakdown(true);
-    fetchGenreBreakdown()
+    fetchGenreBreakdown(true)
       .then((resp) => setGenreBreakdown(resp.data))
       .catch(() => setGenreBreakdown(null))
       .finally(() => setLoadingGenreBreakdown(false));
@@ -561,6 +563,9 @@ export default function Dashboard() {
                 <p className="text-xs text-muted-foreground">
                   From your library source
                   {genreBreakdown ? ` · ${genreBreakdown.songs_scanned.toLocaleString()} songs scanned` : ""}
+                  {genreBreakdown?.approximate
+                    ? ` · Estimated from ${genreBreakdown.sample_size?.toLocaleString()} of ${genreBreakdown.total_artists.toLocaleString()} artists`
+                    : ""}
                   {genreBreakdown?.source === "vaulted_playlist"
                     ? ` · Source: ${genreBreakdown.source_playlist_name || "Vaulted playlist"}`
                     : genreBreakdown?.source === "liked_songs"
@@ -588,8 +593,10 @@ export default function Dashboard() {
                         ))}
                       </Pie>
                       <Tooltip
-                        formatter={(val: number, name: string) => [
-                          `${val} artists`,
+                        formatter={(val: number, name: string, item: { payload?: { count_ci?: [number, number] } }) => [
+                          item.payload?.count_ci
+                            ? `~${val} artists (95% CI ${item.payload.count_ci[0]}–${item.payload.count_ci[1]})`
+                            : `${val} artists`,
                           name,
                         ]}
                       />
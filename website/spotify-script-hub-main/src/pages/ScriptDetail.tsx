@@ -10,7 +10,7 @@ import { ArrowLeft, Play, Eye } from "lucide-react";
 import { useEffect, useState } from "react";
 import { Separator } from "@/components/ui/separator";
 import { toast } from "@/components/ui/use-toast";
-import { fetchAutomationTargets, getSessionToken, runScript } from "@/lib/api";
+import { fetchAutomationTargets, getSessionToken, runScript, type Job } from "@/lib/api";
 
 export default function ScriptDetail() {
   const { scriptId } = useParams();
@@ -20,6 +20,7 @@ export default function ScriptDetail() {
   const [lastRunAt, setLastRunAt] = useState<string>("");
   const [lastOutput, setLastOutput] = useState<string>("");
   const [lastError, setLastError] = useState<string>("");
+  const [runningJob, setRunningJob] = useState<Job | null>(null);
   const runnableScript = scriptId === "vaulted-add" ? "vaulted" : scriptId === "liked-songs-mirror" ? "liked" : undefined;
   const usesTargetSelection = scriptId === "vaulted-add" || scriptId === "liked-songs-mirror";
   const [targetPlaylistOptions, setTargetPlaylistOptions] = useState<Array<{ value: string; label: string }>>([
@@ -124,7 +125,8 @@ export default function ScriptDetail() {
       }
     }
 
-    runScript(runnableScript, payload)
+    setRunningJob(null);
+    runScript(runnableScript, payload, setRunningJob)
       .then((data) => {
         const text = JSON.stringify(data);
         setLastRunAt(new Date().toISOString());
@@ -144,7 +146,10 @@ export default function ScriptDetail() {
           variant: "destructive",
         });
       })
-      .finally(() => setIsRunning(false));
+      .finally(() => {
+        setIsRunning(false);
+        setRunningJob(null);
+      });
   };
 
   return (
@@ -292,8 +297,16 @@ export default function ScriptDetail() {
             {isRunning ? (
               <div className="space-y-1">
                 <p>$ Running {script.name}...</p>
-                <p className="text-primary">→ Connecting to Spotify API...</p>
-                <p className="text-primary">→ Fetching library data...</p>
+                {runningJob?.state === "queued" ? (
+                  <p className="text-primary">→ Queued (position {runningJob.queue_position})</p>
+                ) : runningJob ? (
+                  <p className="text-primary">
+                    → {runningJob.phase}
+                    {runningJob.progress.total ? ` ${runningJob.progress.done ?? 0}/${runningJob.progress.total}` : ""}
+                  </p>
+                ) : (
+                  <p className="text-primary">→ Submitting...</p>
+                )}
                 <p className="animate-pulse">▌</p>
               </div>
             ) : (lastRunAt || lastOutput || lastError) ? (